@@ -0,0 +1,49 @@
+"""
+====================================================
+MULTISHOP - gunicorn settings
+Author  : Adarsh Pathak
+====================================================
+
+Picked up automatically from the working directory:
+    gunicorn multishop_project.wsgi:application
+
+Every worker warms up (store/warmup.py) BEFORE it accepts
+connections — after deploys and max_requests recycles the
+first customers no longer pay for template compilation,
+URL resolver population and empty catalog caches.
+====================================================
+"""
+
+import os
+
+from decouple import config
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '3'))
+
+# Recycle workers (memory growth), jittered so they do not
+# all restart — and warm up — at the same moment
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = max_requests // 10
+
+
+def on_starting(server):
+    # Cart summaries + catalog versions must be shared by all
+    # workers (settings.CACHES). server.cfg has the final worker
+    # count (-w on the command line wins over this file), and
+    # REDIS_URL is read like settings.py does (env or .env)
+    count = server.cfg.workers
+    if count > 1 and not config('REDIS_URL', default=None):
+        server.log.warning(
+            'REDIS_URL is not set: %s workers will each use their own '
+            'local memory cache. Set REDIS_URL in production.', count)
+
+
+def post_worker_init(worker):
+    # The app (and Django) is loaded by now, the worker has
+    # not accepted a connection yet
+    from store.warmup import warm_up
+
+    report = warm_up()
+    worker.log.info('Worker %s warmed up: %s', worker.pid, report)
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'multishop_project.settings')
+# Serve index / shop / shop_details from store/async_views.py
+os.environ.setdefault('STORE_ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
@@ -1,5 +1,5 @@
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import dj_database_url
 from django.contrib.messages import constants as messages
 
@@ -33,8 +33,11 @@ INSTALLED_APPS = [
 # ✅ WhiteNoise added for serving static files in production
 # ============================================================
 MIDDLEWARE = [
+    # First, so it also counts session / auth queries
+    'store.instrumentation.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # ← NEW
+    'store.db_router.PrimaryPinningMiddleware',    # ← read replicas
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,6 +59,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'store.context_processors.cart_summary',  # ← NEW
             ],
         },
     },
@@ -88,6 +92,38 @@ else:
         }
     }
 
+# ============================================================
+# READ REPLICAS (optional)
+# Comma separated URLs → DATABASES['replica_1'], ['replica_2'] ...
+# store/db_router.py sends catalog reads (Category / Product)
+# there, everything else stays on 'default' (the primary)
+# Local try-out: two SQLite files
+#   DATABASE_URL=sqlite:///db.sqlite3
+#   DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3
+# ============================================================
+DATABASE_REPLICA_URLS = config('DATABASE_REPLICA_URLS', default='', cast=Csv())
+
+for _index, _url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    DATABASES[f'replica_{_index}'] = dict(
+        dj_database_url.parse(_url),
+        # Tests: the replica is the test copy of 'default'
+        TEST={'MIRROR': 'default'},
+    )
+
+DATABASE_ROUTERS = ['store.db_router.ReplicaRouter']
+
+# ← SQLite (local tests / tools, every alias incl. replicas):
+#    take the write lock at BEGIN
+# WHY: Default DEFERRED transactions upgrade read → write lock
+#      mid-transaction, so concurrent checkouts fail with
+#      "database is locked" instead of waiting their turn
+for _database in DATABASES.values():
+    if _database['ENGINE'] == 'django.db.backends.sqlite3':
+        _database.setdefault('OPTIONS', {}).update({
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        })
+
 # ============================================================
 # PASSWORD VALIDATION
 # ============================================================
@@ -140,4 +176,73 @@ MESSAGE_TAGS = {
     messages.ERROR:   'danger',
 }
 
+# ============================================================
+# CACHE
+# Cart summaries live here, shared by every web worker:
+# a cart change in one worker must clear the summary the
+# OTHER workers would serve.
+# ⚠ REQUIRED in production (more than one gunicorn worker):
+#   REDIS_URL=redis://...   (e.g. the Railway Redis plugin)
+# Without it each process has its own local memory cache —
+# only correct for runserver / tests (one process).
+# ============================================================
+REDIS_URL = config('REDIS_URL', default=None)
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Catalog version (store/catalog_cache.py): a product save bumps
+# it in ONE cache. Shared cache → keep it forever; per-process
+# cache → other workers pick up a new version within this many
+# seconds
+STORE_CATALOG_VERSION_TIMEOUT = None if REDIS_URL else 30
+
+# ============================================================
+# PRODUCT SEARCH
+# Dotted path to a store.search backend class.
+# Empty = SQLite FTS5 on SQLite, plain database search elsewhere
+# ============================================================
+STORE_SEARCH_BACKEND = config('STORE_SEARCH_BACKEND', default='')
+
+# ============================================================
+# ANONYMOUS PAGE CACHE (shop + product pages)
+# Off by default — turn on per environment
+# ============================================================
+STORE_PAGE_CACHE_ENABLED = config('STORE_PAGE_CACHE_ENABLED', default=False, cast=bool)
+STORE_PAGE_CACHE_TIMEOUT = config('STORE_PAGE_CACHE_TIMEOUT', default=300, cast=int)
+STORE_PAGE_CACHE_STALE_TIMEOUT = config('STORE_PAGE_CACHE_STALE_TIMEOUT', default=60, cast=int)
+
+# ============================================================
+# ASYNC CATALOG VIEWS (store/async_views.py)
+# asgi.py turns this on, WSGI keeps the sync views
+# ============================================================
+STORE_ASYNC_VIEWS = config('STORE_ASYNC_VIEWS', default=False, cast=bool)
+
+# ============================================================
+# SQL QUERY INSTRUMENTATION (store/instrumentation.py)
+# Query count / SQL time / duplicate queries per request as
+# X-DB-* response headers + 'store.queries' log lines
+# ============================================================
+STORE_QUERY_INSTRUMENTATION = config('STORE_QUERY_INSTRUMENTATION', default=False, cast=bool)
+
+# ============================================================
+# LOGIN / SIGNUP THROTTLING (store/throttle.py)
+# Token buckets per client IP + username, checked before any
+# password hashing. PROXY_COUNT = trusted proxies in front of
+# the app (X-Forwarded-For), 0 = use REMOTE_ADDR
+# ============================================================
+STORE_THROTTLE_ENABLED = config('STORE_THROTTLE_ENABLED', default=True, cast=bool)
+STORE_THROTTLE_PROXY_COUNT = config('STORE_THROTTLE_PROXY_COUNT', default=0, cast=int)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
@@ -4,11 +4,21 @@ MULTISHOP - Admin Panel
 Author  : Adarsh Pathak
 ====================================================
 """
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from . import rollups
+
+from .exports import export_response, filter_orders
+from .paginators import EstimatedCountPaginator
 from .models import (
     Category, Vendor, Product,
     Cart, BillingAddress,
-    Order, OrderItem, Profile
+    Order, OrderItem, Profile,
+    StockReservation, DailySales
 )
 #  OLD: from .models import vendor_images
 # WHY:  Only imported one model — rest were commented out
@@ -16,6 +26,23 @@ from .models import (
 #         from admin panel
 
 
+# ============================================================
+# LARGE TABLE ADMIN (every table that grows with users/orders)
+#  OLD: Every changelist page ran an exact COUNT(*) twice
+#       (page count + "N total" next to the search box)
+#  NEW: Estimated count on unfiltered big tables, and no
+#       second "full result" COUNT on filtered lists
+# WHY: Both are full scans at millions of rows
+#  Search fields use '^' (prefix, LIKE 'term%') — no
+#  leading-wildcard scan. Case-insensitive indexes for them:
+#  migration 0012. Plans checked by explain_hot_queries
+#  (query_plans.ADMIN_SEARCHES)
+# ============================================================
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator              = EstimatedCountPaginator
+    show_full_result_count = False
+
+
 # ============================================================
 # CATEGORY ADMIN
 #  OLD: Was completely commented out — could not manage
@@ -28,14 +55,14 @@ from .models import (
 #         Old way, less clean code
 class CategoryAdmin(admin.ModelAdmin):
     # Columns shown in admin list page
-    list_display = ['name', 'slug']
+    list_display = ['name', 'slug', 'product_count']
 
     #  Auto-fills slug when you type name
     # Saves time, no need to type slug manually
     prepopulated_fields = {'slug': ('name',)}
 
     # Search bar in admin
-    search_fields = ['name']
+    search_fields = ['^name']
 
 
 # ============================================================
@@ -46,7 +73,7 @@ class CategoryAdmin(admin.ModelAdmin):
 #         Can approve vendors directly from list
 # ============================================================
 @admin.register(Vendor)
-class VendorAdmin(admin.ModelAdmin):
+class VendorAdmin(LargeTableAdmin):
     #  Shows more useful columns than old code
     list_display  = ['shop_name', 'user', 'phone', 'is_approved']
 
@@ -57,7 +84,9 @@ class VendorAdmin(admin.ModelAdmin):
     #  OLD: Had to click each vendor to approve
     list_editable = ['is_approved']
 
-    search_fields = ['shop_name']
+    search_fields = ['^shop_name']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
 
 
 # ============================================================
@@ -66,14 +95,23 @@ class VendorAdmin(admin.ModelAdmin):
 #  NEW: Full product management with filters
 # ============================================================
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdmin):
     list_display  = ['name', 'category', 'price',
                      'stock', 'is_available', 'is_featured']
 
     #  Filter by category, availability
     list_filter   = ['is_available', 'is_featured', 'category']
 
-    search_fields = ['name']
+    #  NEW: Category per row in the same query
+    #  OLD: One category query per product on the list page
+    list_select_related = ['category']
+
+    #  Prefix search (indexed) + exact slug
+    #  Also powers the product autocomplete on orders / carts
+    search_fields = ['^name', '=slug']
+
+    #  Vendor dropdown listed every vendor
+    raw_id_fields = ['vendor']
 
     #  Auto-fill slug from product name
     prepopulated_fields = {'slug': ('name',)}
@@ -81,6 +119,13 @@ class ProductAdmin(admin.ModelAdmin):
     #  Edit price/stock directly from list — saves time!
     list_editable = ['price', 'stock', 'is_available']
 
+    def save_model(self, request, obj, form, change):
+        #  Availability set by hand wins over the stock-out flag
+        #  (released stock must not re-show a product hidden here)
+        if 'is_available' in form.changed_data:
+            obj.sold_out = False
+        super().save_model(request, obj, form, change)
+
 
 # ============================================================
 # ORDER ITEMS shown INSIDE Order page
@@ -92,6 +137,19 @@ class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
 
+    #  NEW: Product search box instead of a dropdown
+    #  OLD: <select> with EVERY product, once per item row
+    autocomplete_fields = ['product']
+
+    #  Checkout snapshots: sales rollups are built from them,
+    #  so staff can't edit them (and no <select> per row)
+    readonly_fields = ['product_name', 'category', 'vendor', 'price']
+
+    def get_queryset(self, request):
+        #  Read-only FKs print str(obj.category) → one JOIN
+        #  instead of one query per row
+        return super().get_queryset(request).select_related('category', 'vendor')
+
 
 # ============================================================
 # ORDER ADMIN
@@ -99,11 +157,20 @@ class OrderItemInline(admin.TabularInline):
 #  NEW: See all orders, update status easily
 # ============================================================
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdmin):
     list_display  = ['id', 'user', 'total_amount',
                      'status', 'created_at']
     list_filter   = ['status']
-    search_fields = ['user__username']
+    search_fields = ['^user__username']
+
+    #  NEW: User loaded in the list query (JOIN)
+    #  OLD: One user query per row for the 'user' column
+    list_select_related = ['user']
+
+    #  User search box, billing address by id
+    #  OLD: Dropdowns with every user / every address
+    autocomplete_fields = ['user']
+    raw_id_fields = ['billing_address']
 
     #  Change order status directly from list
     list_editable = ['status']
@@ -111,6 +178,51 @@ class OrderAdmin(admin.ModelAdmin):
     #  Show items inside each order
     inlines       = [OrderItemInline]
 
+    #  NEW: Streaming CSV / JSONL export (store/exports.py)
+    #  OLD: Paging through this list to copy orders out
+    actions       = ['export_csv', 'export_jsonl']
+
+    def get_urls(self):
+        export = path(
+            'export/',
+            self.admin_site.admin_view(self.export_view),
+            name='store_order_export',
+        )
+        return [export] + super().get_urls()
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {
+            'export_statuses': Order.STATUS_CHOICES,
+            **(extra_context or {}),
+        }
+        return super().changelist_view(request, extra_context)
+
+    def export_view(self, request):
+        """?format=csv|jsonl&start=YYYY-MM-DD&end=YYYY-MM-DD&status=..."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            orders = filter_orders(
+                self.get_queryset(request),
+                start=request.GET.get('start'),
+                end=request.GET.get('end'),
+                status=request.GET.get('status'),
+            )
+            return export_response(orders, request.GET.get('format', 'csv'))
+        except ValidationError as error:
+            self.message_user(request, error.message, messages.ERROR)
+            return redirect('admin:store_order_changelist')
+
+    @admin.action(description='Export selected orders (CSV)',
+                  permissions=['view'])
+    def export_csv(self, request, queryset):
+        return export_response(queryset, 'csv')
+
+    @admin.action(description='Export selected orders (JSONL)',
+                  permissions=['view'])
+    def export_jsonl(self, request, queryset):
+        return export_response(queryset, 'jsonl')
+
 
 # ============================================================
 # CART ADMIN
@@ -118,19 +230,46 @@ class OrderAdmin(admin.ModelAdmin):
 #  NEW: See what users have in their carts
 # ============================================================
 @admin.register(Cart)
-class CartAdmin(admin.ModelAdmin):
+class CartAdmin(LargeTableAdmin):
     list_display  = ['user', 'product', 'quantity', 'created_at']
-    search_fields = ['user__username', 'product__name']
+    #  Username only: an OR across two joined tables
+    #  (user OR product) can never use an index
+    search_fields = ['^user__username']
+
+    #  NEW: One query for the page (was 2 extra per row)
+    list_select_related = ['user', 'product']
+    autocomplete_fields = ['user', 'product']
+
+
+# ============================================================
+# ORDER ITEM ADMIN
+#  NEW: Sales lines across all orders (e.g. every sale of
+#       one product) — the inline only shows one order
+# ============================================================
+@admin.register(OrderItem)
+class OrderItemAdmin(LargeTableAdmin):
+    #  Name snapshot: no Product join, deleted products still listed
+    list_display  = ['order', 'product_name', 'quantity', 'price']
+    search_fields = ['^product__name']
+
+    #  'order' column prints Order.__str__ → needs order.user
+    list_select_related = ['order__user']
+    autocomplete_fields = ['product']
+    raw_id_fields = ['order']
+    #  Checkout snapshots (see OrderItemInline)
+    readonly_fields = ['product_name', 'category', 'vendor', 'price']
 
 
 # ============================================================
 # BILLING ADDRESS ADMIN
 # ============================================================
 @admin.register(BillingAddress)
-class BillingAddressAdmin(admin.ModelAdmin):
+class BillingAddressAdmin(LargeTableAdmin):
     list_display  = ['user', 'first_name', 'last_name',
                      'city', 'country']
-    search_fields = ['first_name', 'last_name']
+    search_fields = ['^last_name', '^first_name']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
 
 
 # ============================================================
@@ -139,6 +278,53 @@ class BillingAddressAdmin(admin.ModelAdmin):
 #  NEW: See all user profiles
 # ============================================================
 @admin.register(Profile)
-class ProfileAdmin(admin.ModelAdmin):
+class ProfileAdmin(LargeTableAdmin):
     list_display  = ['user', 'phone', 'city', 'country']
-    search_fields = ['user__username']
\ No newline at end of file
+    search_fields = ['^user__username']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
+
+
+# ============================================================
+# STOCK RESERVATION ADMIN
+#  NEW: See which stock is currently held at checkout
+# ============================================================
+@admin.register(StockReservation)
+class StockReservationAdmin(LargeTableAdmin):
+    list_display  = ['product', 'user', 'quantity', 'expires_at']
+    list_select_related = ['product', 'user']
+    raw_id_fields = ['product', 'user']
+
+
+# ============================================================
+# SALES DASHBOARD
+#  NEW: Last 30 days, orders per status, top products /
+#       categories / vendors
+# WHY: Reads ONLY the rollup tables (rollups.py), so the page
+#      costs the same with 1k or 100M orders
+#  Admin index link → "Sales Dashboard"
+# ============================================================
+@admin.register(DailySales)
+class SalesDashboardAdmin(admin.ModelAdmin):
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Sales dashboard',
+            'opts': self.model._meta,
+            **rollups.dashboard(),
+            **(extra_context or {}),
+        }
+        return TemplateResponse(
+            request, 'admin/store/sales_dashboard.html', context)
@@ -1,5 +1,18 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ProductsConfig(AppConfig):
     name = 'store'
+
+    def ready(self):
+        # Registers signal handlers (search index, ...)
+        from . import signals  # noqa: F401
+
+        # Query instrumentation for connections opened later
+        # (worker threads, async views)
+        if settings.STORE_QUERY_INSTRUMENTATION:
+            from django.db.backends.signals import connection_created
+
+            from .instrumentation import install
+            connection_created.connect(install)
@@ -0,0 +1,87 @@
+"""
+====================================================
+MULTISHOP - Async Catalog Views (ASGI)
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEM:
+  Under uvicorn (asgi.py) every view in views.py is sync,
+  so each request is handed to a worker thread and back.
+
+NEW: Async versions of the read-heavy pages:
+        index, shop, shop_details
+     - Data comes from the async ORM API (aget, async for,
+       aaggregate, ain_bulk)
+     - Lookups that do not depend on each other are awaited
+       together with asyncio.gather. Only the cache reads
+       overlap: the async ORM sends every query to the same
+       thread-sensitive executor, so the SQL still runs one
+       statement after another
+     - Templates render in the sync thread: context processors
+       read request.user (session table) lazily
+
+     store/urls.py uses these when settings.STORE_ASYNC_VIEWS
+     is on — asgi.py turns it on, WSGI (gunicorn) keeps views.py
+====================================================
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404, render
+from django.utils.http import http_date
+
+from .catalog import CatalogQuery
+from .catalog_cache import aget_featured_products, aget_index_categories
+from .models import Product
+from .page_cache import anonymous_page_cache
+from .recommendations import arelated_products
+from .views import shop_context
+
+arender = sync_to_async(render)
+
+
+async def index(request):
+    categories, featured_products = await asyncio.gather(
+        aget_index_categories(),
+        aget_featured_products(),
+    )
+    context = {
+        'categories': categories,
+        'featured_products': featured_products,
+    }
+    return await arender(request, 'store/index.html', context)
+
+
+@anonymous_page_cache('shop', params=[
+    'category', 'min_price', 'max_price', 'search', 'cursor', 'page_size',
+])
+async def shop(request):
+    query = CatalogQuery.from_request(request.GET)
+    page, facets = await query.apage_and_facets()
+    return await arender(
+        request, 'store/shop.html', shop_context(request, query, page, facets)
+    )
+
+
+@anonymous_page_cache('shop_details')
+async def shop_details(request, slug):
+    # Related products are found through the slug too, so
+    # neither lookup waits for the other (the related list is
+    # usually a cache hit; the SQL still runs one at a time)
+    product, related_products = await asyncio.gather(
+        aget_object_or_404(
+            Product.objects.select_related('category', 'vendor'), slug=slug
+        ),
+        arelated_products(slug),
+    )
+
+    context = {
+        'product': product,
+        'related_products': related_products,
+    }
+    response = await arender(request, 'store/shop_details.html', context)
+    # Used by the page cache for conditional GET (304)
+    response['Last-Modified'] = http_date(product.updated_at.timestamp())
+    return response
+
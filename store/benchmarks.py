@@ -0,0 +1,64 @@
+"""
+====================================================
+MULTISHOP - Benchmark Helpers
+Author  : Adarsh Pathak
+====================================================
+
+Shared by the benchmark commands:
+  seed_catalog    → deterministic catalog (10k / 100k / 1M)
+  bench_endpoints → p50 / p95 / p99 + throughput per endpoint
+  loadtest        → WSGI vs ASGI requests per second
+
+Results carry the git revision, so JSON files from two
+commits can be compared side by side.
+====================================================
+"""
+
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+from django.db import connection
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def latency_summary(latencies_ms, elapsed, errors=0):
+    latencies = sorted(latencies_ms)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+            timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def environment():
+    return {
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'page_cache': getattr(settings, 'STORE_PAGE_CACHE_ENABLED', False),
+    }
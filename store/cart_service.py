@@ -0,0 +1,452 @@
+"""
+====================================================
+MULTISHOP - Cart Service
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEMS:
+1. base.html ran {{ request.user.cart.count }}
+   = extra COUNT query on EVERY page
+2. cart / checkout called item.get_total() in a loop
+   = one Product query per cart line (N+1)
+3. Shipping rule (free above ₹500) was copy-pasted
+   in views AND templates
+
+NEW:
+  get_cart_summary(user) → count, quantity, subtotal,
+      shipping, total from ONE aggregate query,
+      cached per user until the cart changes (header badge).
+      The cart + checkout pages ask for fresh=True: money
+      shown to the buyer never comes from the cache.
+  get_cart_lines(user)   → cart rows with product loaded
+      (select_related, no N+1)
+  invalidate_cart(user_id) → called from signals.py
+      whenever a Cart row or a carted Product changes
+  get_cart(request) → DatabaseCart / CookieCart backend,
+      anonymous carts live in a signed cookie
+  cart.apply({line: delta}) → several +/- clicks in ONE
+      transaction (cart page coalesces rapid clicks)
+
+Cart rows are unique per (user, product) and every
+quantity change is an atomic UPDATE ... SET quantity =
+quantity + n — concurrent clicks can neither duplicate a
+line nor lose an increment.
+====================================================
+"""
+
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Case, Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from .models import Cart, Product
+
+
+# ============================================================
+# SHIPPING RULES (single place)
+# ============================================================
+FREE_SHIPPING_THRESHOLD = Decimal('500')
+SHIPPING_CHARGE = Decimal('50')
+
+CART_SUMMARY_TIMEOUT = 60 * 15
+
+
+def shipping_for(subtotal):
+    return Decimal('0') if subtotal >= FREE_SHIPPING_THRESHOLD else SHIPPING_CHARGE
+
+
+# Same rule as Product.get_price(), but inside the database
+UNIT_PRICE = Case(
+    When(
+        Q(product__discount_price__isnull=False) & ~Q(product__discount_price=0),
+        then=F('product__discount_price'),
+    ),
+    default=F('product__price'),
+)
+
+LINE_TOTAL = ExpressionWrapper(
+    UNIT_PRICE * F('quantity'),
+    output_field=DecimalField(max_digits=12, decimal_places=2),
+)
+
+
+# ============================================================
+# CART SUMMARY
+# ============================================================
+class CartSummary:
+
+    def __init__(self, count=0, quantity=0, subtotal=Decimal('0')):
+        self.count = count            # number of cart lines
+        self.quantity = quantity      # number of units
+        self.subtotal = subtotal
+        self.shipping = shipping_for(subtotal)
+        self.total = subtotal + self.shipping
+
+    @property
+    def is_empty(self):
+        return self.count == 0
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'quantity': self.quantity,
+            'subtotal': self.subtotal,
+        }
+
+
+EMPTY_SUMMARY = CartSummary()
+
+
+def summary_cache_key(user_id):
+    return f'store:cart-summary:{user_id}'
+
+
+def get_cart_lines(user):
+    return (
+        Cart.objects.filter(user=user)
+        .select_related('product', 'product__category')
+        .order_by('created_at', 'id')
+    )
+
+
+def compute_cart_summary(user):
+    totals = Cart.objects.filter(user=user).aggregate(
+        count=Count('id'),
+        units=Coalesce(Sum('quantity'), 0),
+        subtotal=Coalesce(
+            Sum(LINE_TOTAL), Decimal('0'),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        ),
+    )
+    return CartSummary(
+        count=totals['count'],
+        quantity=totals['units'],
+        subtotal=totals['subtotal'],
+    )
+
+
+def get_cart_summary(user, fresh=False):
+    """fresh=True skips the cached copy (and refreshes it)."""
+    if not user.is_authenticated:
+        return EMPTY_SUMMARY
+
+    key = summary_cache_key(user.pk)
+    cached = None if fresh else cache.get(key)
+    if cached is not None:
+        return CartSummary(**cached)
+
+    summary = compute_cart_summary(user)
+    cache.set(key, summary.as_dict(), CART_SUMMARY_TIMEOUT)
+    return summary
+
+
+def invalidate_cart(*user_ids):
+    cache.delete_many([summary_cache_key(user_id) for user_id in user_ids])
+
+
+# ============================================================
+# CART BACKENDS
+# OLD: cart views were @login_required and every click was
+#      a Cart row INSERT / UPDATE
+# NEW: get_cart(request) picks a backend with one interface
+#        DatabaseCart → logged-in users (Cart rows)
+#        CookieCart   → anonymous users, a signed cookie
+#                       "12:1|45:3"  (product_id:quantity)
+#      Browsing + adding to cart anonymously writes NOTHING
+#      to the database. On login the cookie cart is merged
+#      into Cart rows (merge_cookie_cart).
+# ============================================================
+CART_COOKIE_NAME = 'store_cart'
+CART_COOKIE_SALT = 'store.cart'
+CART_COOKIE_MAX_AGE = 60 * 60 * 24 * 30
+# Keeps the cookie far below the 4KB browser limit
+MAX_COOKIE_LINES = 50
+MAX_LINE_QUANTITY = 99
+
+
+def parse_cart_cookie(value):
+    """'12:1|45:3' → {12: 1, 45: 3}  (bad entries are dropped)"""
+    quantities = {}
+    for entry in (value or '').split('|'):
+        product_id, _, quantity = entry.partition(':')
+        try:
+            product_id, quantity = int(product_id), int(quantity)
+        except ValueError:
+            continue
+        if product_id > 0 and quantity > 0:
+            quantities[product_id] = min(quantity, MAX_LINE_QUANTITY)
+        if len(quantities) >= MAX_COOKIE_LINES:
+            break
+    return quantities
+
+
+def _add_quantity(delta):
+    """
+    quantity + delta in SQL, kept in 0..MAX_LINE_QUANTITY
+    (0 is the floor of the CHECK constraint, the cap is the
+    same as the cookie cart's)
+    """
+    return Least(Greatest(F('quantity') + delta, 0), MAX_LINE_QUANTITY)
+
+
+def parse_quantity(value):
+    """
+    Add-to-cart form value → 1..MAX_LINE_QUANTITY
+    Raises ValueError on anything else.
+    """
+    quantity = int(value)
+    if not 1 <= quantity <= MAX_LINE_QUANTITY:
+        raise ValueError(f'Quantity must be 1..{MAX_LINE_QUANTITY}')
+    return quantity
+
+
+def format_cart_cookie(quantities):
+    return '|'.join(f'{pid}:{qty}' for pid, qty in quantities.items())
+
+
+def parse_cart_changes(body):
+    """
+    Batch endpoint body → {line id: delta}
+        {"changes": {"12": 3, "45": -1}}
+    Raises ValueError on anything else.
+    """
+    try:
+        changes = json.loads(body)['changes']
+        deltas = {int(line_id): int(delta) for line_id, delta in changes.items()}
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise ValueError('Expected {"changes": {"<line id>": <delta>}}')
+    if len(deltas) > MAX_COOKIE_LINES or any(
+            abs(delta) > MAX_LINE_QUANTITY for delta in deltas.values()):
+        raise ValueError('Too many changes')
+    return deltas
+
+
+class CookieCartLine:
+    """Looks like a Cart row to the templates (id = product id)."""
+
+    def __init__(self, product, quantity):
+        self.id = self.pk = product.pk
+        self.product = product
+        self.product_id = product.pk
+        self.quantity = quantity
+
+    def get_total(self):
+        return self.product.get_price() * self.quantity
+
+
+class DatabaseCart:
+
+    def __init__(self, user):
+        self.user = user
+
+    def lines(self):
+        return get_cart_lines(self.user)
+
+    def summary(self):
+        # Cart page / batch endpoint show these totals
+        return get_cart_summary(self.user, fresh=True)
+
+    def add(self, product, quantity=1):
+        """Returns True if a new line was created."""
+        # OLD: get_or_create + quantity += n + save() — two
+        #      concurrent clicks read the same quantity (one
+        #      increment lost) or both INSERTed (duplicate line)
+        # NEW: UPDATE with F(); INSERT only when there is no
+        #      line yet, and the unique constraint settles a race
+        # Only positive quantities: a 0 / negative delta would
+        # leave an empty line, and the CHECK constraint failing on
+        # INSERT would look like the race below
+        if quantity < 1:
+            raise ValueError('Quantity must be at least 1')
+        line = Cart.objects.filter(user=self.user, product=product)
+        if self._increment(line, quantity):
+            return False
+        try:
+            with transaction.atomic():
+                Cart.objects.create(
+                    user=self.user, product=product,
+                    quantity=min(quantity, MAX_LINE_QUANTITY))
+        except IntegrityError:
+            # The other click inserted it first
+            self._increment(line, quantity)
+            return False
+        return True
+
+    def _increment(self, lines, delta):
+        updated = lines.update(quantity=_add_quantity(delta))
+        # update() skips the Cart signals
+        if updated:
+            invalidate_cart(self.user.pk)
+        return updated
+
+    def update(self, line_id, action):
+        delta = {'increase': 1, 'decrease': -1}.get(action)
+        if delta is None:
+            get_object_or_404(Cart, id=line_id, user=self.user)
+        elif not self.apply({line_id: delta}):
+            raise Http404('No such cart line')
+
+    def apply(self, deltas):
+        """
+        {line id: +n / -n} in ONE transaction, constant queries:
+        one UPDATE (CASE per line) + one DELETE of emptied lines.
+        Lines of other users / unknown ids are ignored.
+        Returns the number of lines found.
+        """
+        lines = Cart.objects.filter(user=self.user, id__in=list(deltas))
+        with transaction.atomic(savepoint=False):
+            updated = self._increment(lines, Case(
+                *[When(id=line_id, then=delta) for line_id, delta in deltas.items()],
+                default=0,
+            ))
+            if updated:
+                lines.filter(quantity=0).delete()
+        return updated
+
+    def remove(self, line_id):
+        get_object_or_404(Cart, id=line_id, user=self.user).delete()
+
+    def save(self, response):
+        return response
+
+
+class CookieCart:
+
+    def __init__(self, request):
+        self.quantities = parse_cart_cookie(request.get_signed_cookie(
+            CART_COOKIE_NAME, default='', salt=CART_COOKIE_SALT))
+        self.changed = False
+        self._lines = None
+
+    def lines(self):
+        # One query for all products in the cookie
+        if self._lines is None:
+            products = (
+                Product.objects.filter(pk__in=list(self.quantities))
+                .select_related('category')
+                .in_bulk()
+            )
+            self._lines = [
+                CookieCartLine(products[pid], qty)
+                for pid, qty in self.quantities.items() if pid in products
+            ]
+        return self._lines
+
+    def summary(self):
+        if not self.quantities:
+            return EMPTY_SUMMARY
+        lines = self.lines()
+        return CartSummary(
+            count=len(lines),
+            quantity=sum(line.quantity for line in lines),
+            subtotal=sum((line.get_total() for line in lines), Decimal('0')),
+        )
+
+    def _set(self, product_id, quantity):
+        if quantity > 0:
+            self.quantities[product_id] = min(quantity, MAX_LINE_QUANTITY)
+        else:
+            self.quantities.pop(product_id, None)
+        self.changed = True
+        self._lines = None
+
+    def add(self, product, quantity=1):
+        if quantity < 1:
+            raise ValueError('Quantity must be at least 1')
+        created = product.pk not in self.quantities
+        if created and len(self.quantities) >= MAX_COOKIE_LINES:
+            raise ValueError('Cart is full')
+        self._set(product.pk, self.quantities.get(product.pk, 0) + quantity)
+        return created
+
+    def update(self, line_id, action):
+        if line_id not in self.quantities:
+            raise Http404('No such cart line')
+        if action == 'increase':
+            self._set(line_id, self.quantities[line_id] + 1)
+        elif action == 'decrease':
+            self._set(line_id, self.quantities[line_id] - 1)
+
+    def apply(self, deltas):
+        found = [line_id for line_id in deltas if line_id in self.quantities]
+        for line_id in found:
+            self._set(line_id, self.quantities[line_id] + deltas[line_id])
+        return len(found)
+
+    def remove(self, line_id):
+        if line_id not in self.quantities:
+            raise Http404('No such cart line')
+        self._set(line_id, 0)
+
+    def save(self, response):
+        if self.changed:
+            if self.quantities:
+                response.set_signed_cookie(
+                    CART_COOKIE_NAME, format_cart_cookie(self.quantities),
+                    salt=CART_COOKIE_SALT, max_age=CART_COOKIE_MAX_AGE,
+                    httponly=True, samesite='Lax',
+                )
+            else:
+                response.delete_cookie(CART_COOKIE_NAME, samesite='Lax')
+        return response
+
+
+def get_cart(request):
+    if request.user.is_authenticated:
+        return DatabaseCart(request.user)
+    return CookieCart(request)
+
+
+def merge_cookie_cart(request, user, response):
+    """
+    Called right after login: moves the anonymous cookie cart
+    into Cart rows. Lines the user already has get the cookie
+    quantity ADDED in SQL (one UPDATE, capped like every line),
+    so a click that lands during the merge is kept; the rest
+    go in with one bulk INSERT. If another request inserts one
+    of those first, the unique constraint fails the INSERT and
+    every line is added to instead.
+    Returns the number of merged lines.
+    """
+    quantities = CookieCart(request).quantities
+    if not quantities:
+        return 0
+
+    with transaction.atomic():
+        known = set(
+            Product.objects.filter(pk__in=list(quantities))
+            .values_list('pk', flat=True)
+        )
+        quantities = {
+            pid: qty for pid, qty in quantities.items() if pid in known}
+
+        lines = Cart.objects.filter(user=user, product_id__in=list(quantities))
+        existing = set(
+            lines.select_for_update().values_list('product_id', flat=True))
+        new = [pid for pid in quantities if pid not in existing]
+        try:
+            with transaction.atomic():
+                Cart.objects.bulk_create([
+                    Cart(user=user, product_id=pid, quantity=quantities[pid])
+                    for pid in new
+                ])
+        except IntegrityError:
+            new = []
+        if len(new) < len(quantities):
+            lines.exclude(product_id__in=new).update(quantity=_add_quantity(Case(
+                *[When(product_id=pid, then=Value(qty))
+                  for pid, qty in quantities.items()],
+                default=Value(0),
+            )))
+
+    # bulk writes skip the Cart signals
+    invalidate_cart(user.pk)
+    response.delete_cookie(CART_COOKIE_NAME, samesite='Lax')
+    return len(quantities)
@@ -0,0 +1,514 @@
+"""
+====================================================
+MULTISHOP - Catalog Query Engine
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEMS:
+1. shop view rendered EVERY available product on every hit
+   200k products = 200k rows fetched + rendered per request
+
+2. Product.objects.count() ran on the whole table
+   and ignored the filters the customer picked
+
+3. Invalid min_price / max_price (e.g. "abc") crashed the page
+
+4. Search was name__icontains (full scan, no ranking)
+   NEW: ids come ranked from the search backend (search.py)
+        and pages follow that ranking. Category / price /
+        availability filters run INSIDE the search, before
+        its result limit; counts use every match.
+
+NEW: CatalogQuery builds the shop page from a bounded
+     number of queries, whatever the catalog size:
+       1. page of products   (keyset pagination, LIMIT n+1)
+       2. total + price buckets (one conditional aggregate)
+       3. per-category counts   (one GROUP BY)
+       4. category list
+
+PRICE BUCKETS:
+  OLD: 4 fixed ranges (Under ₹500 ... ₹5,000 & above) —
+       a ₹40k-₹90k laptop category put everything in one
+  NEW: Boundaries are the category's price QUANTILES
+       (NTILE window, one query), rounded to 2 significant
+       digits, cached per catalog version.
+       Counts for the current category + search come from
+       ONE conditional aggregate, cached per filter
+       combination (also per catalog version).
+====================================================
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+from datetime import datetime
+from decimal import ROUND_FLOOR, Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import Ntile
+
+from .catalog_cache import acached_section, cached_section
+from .models import Category, Product
+from .search import get_search_backend
+
+
+# ============================================================
+# SETTINGS FOR THE SHOP PAGE
+# ============================================================
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 96
+
+# Price quantiles per category → up to this many buckets
+PRICE_BUCKET_COUNT = 5
+
+
+# ============================================================
+# CURSOR HELPERS
+# WHY: OFFSET pagination gets slower on every page because the
+#      database still walks all skipped rows.
+#      A keyset cursor remembers the LAST row we showed
+#      (created_at, id) and asks for rows strictly "after" it,
+#      which is an index range scan no matter how deep we go.
+#      id breaks ties when two products share created_at.
+# ============================================================
+# BigAutoField range: a bigger id in a crafted cursor would
+# overflow the database driver (500) instead of matching nothing
+MAX_CURSOR_ID = 2 ** 63 - 1
+
+
+def encode_cursor(product):
+    raw = f"{product.created_at.isoformat()}|{product.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Returns (created_at, id) or None if the cursor is invalid."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        created_at, pk = datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+    if not 0 < pk <= MAX_CURSOR_ID:
+        return None
+    return created_at, pk
+
+
+# Search results are ordered by rank, not created_at,
+# so their cursor is just a position in the ranked list
+def encode_rank_cursor(offset):
+    raw = f"rank|{offset}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_rank_cursor(cursor):
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        kind, offset = base64.urlsafe_b64decode(
+            padded.encode()).decode().split('|', 1)
+        return max(int(offset), 0) if kind == 'rank' else 0
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return 0
+
+
+def parse_price(value):
+    """Free-text price input → Decimal, or None if blank/invalid."""
+    if value in (None, ''):
+        return None
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        return None
+    if not price.is_finite() or price < 0:
+        return None
+    return price
+
+
+def parse_page_size(value):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+# ============================================================
+# PRICE BUCKET BOUNDARIES (catalog quantiles)
+# ============================================================
+def round_price(value):
+    """Down to 2 significant digits: 1234.50 → 1200, 4.57 → 4.5"""
+    if value <= 0:
+        return Decimal('0')
+    step = Decimal(1).scaleb(value.adjusted() - 1)
+    rounded = (value / step).to_integral_value(rounding=ROUND_FLOOR) * step
+    return rounded.quantize(Decimal('1') if step >= 1 else step)
+
+
+def format_price(value):
+    return f'₹{value:,.0f}' if value == value.to_integral_value() else f'₹{value:,.2f}'
+
+
+def price_tiles(category=None, buckets=PRICE_BUCKET_COUNT):
+    """(price, tile) of every available product — NTILE window."""
+    products = Product.objects.filter(is_available=True)
+    if category:
+        products = products.filter(category__slug=category)
+    return products.annotate(
+        tile=Window(Ntile(buckets), order_by=F('price').asc())
+    ).values('price', 'tile')
+
+
+def price_quantiles(category=None, buckets=PRICE_BUCKET_COUNT):
+    """
+    Lowest price of every NTILE(buckets) group of available
+    products, cheapest group first — ONE query:
+        SELECT MIN(price) FROM (
+            SELECT price, NTILE(5) OVER (ORDER BY price) AS tile ...
+        ) GROUP BY tile
+    """
+    tiles = price_tiles(category, buckets)
+    connection = connections[tiles.db]
+    quote = connection.ops.quote_name
+    sql, params = tiles.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT MIN(t.{quote("price")}) FROM ({sql}) t '
+            f'GROUP BY t.{quote("tile")} ORDER BY t.{quote("tile")}',
+            params,
+        )
+        # sqlite hands back floats
+        return [Decimal(str(low)) for (low,) in cursor.fetchall()]
+
+
+def bounds_from_quantiles(lows):
+    """Sorted inner boundaries, e.g. [450, 1200, 3900, 12000]."""
+    # The cheapest group is "Under ..." → no boundary of its own;
+    # rounding can merge close quantiles, and a boundary at or
+    # below the cheapest price would only make an empty bucket
+    if not lows:
+        return []
+    return sorted({price for price in map(round_price, lows[1:]) if price > lows[0]})
+
+
+def price_bounds_key(category):
+    return f'shop:price-bounds:{category or "*"}'
+
+
+def price_bucket_bounds(category=None):
+    return cached_section(
+        price_bounds_key(category),
+        lambda: bounds_from_quantiles(price_quantiles(category)),
+    )
+
+
+def price_buckets_for(bounds):
+    """[(label, low inclusive, high exclusive)], None = open ended"""
+    if not bounds:
+        return [('All prices', None, None)]
+    edges = [None, *bounds, None]
+    buckets = []
+    for low, high in zip(edges, edges[1:]):
+        if low is None:
+            label = f'Under {format_price(high)}'
+        elif high is None:
+            label = f'{format_price(low)} & above'
+        else:
+            label = f'{format_price(low)} - {format_price(high)}'
+        buckets.append((label, low, high))
+    return buckets
+
+
+# ============================================================
+# CATALOG PAGE (what the view gets back)
+# ============================================================
+class CatalogPage:
+
+    def __init__(self, products, next_cursor, page_size):
+        self.products = products
+        self.next_cursor = next_cursor
+        self.page_size = page_size
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+# ============================================================
+# CATALOG QUERY
+# ============================================================
+class CatalogQuery:
+
+    def __init__(self, category=None, min_price=None, max_price=None,
+                 search=None, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        self.category = category or None
+        self.min_price = min_price
+        self.max_price = max_price
+        self.search = (search or '').strip() or None
+        self.cursor = cursor or None
+        self.page_size = page_size
+        self._search_ids = None
+
+    @classmethod
+    def from_request(cls, params):
+        """Builds a query from request.GET."""
+        return cls(
+            category=params.get('category'),
+            min_price=parse_price(params.get('min_price')),
+            max_price=parse_price(params.get('max_price')),
+            search=params.get('search'),
+            cursor=params.get('cursor'),
+            page_size=parse_page_size(params.get('page_size')),
+        )
+
+    # --------------------------------------------------------
+    # QUERYSETS
+    # --------------------------------------------------------
+    def search_ids(self):
+        """
+        Ranked ids of the products that pass every filter (asked
+        once). Filters run inside the search, before its limit.
+        """
+        if self._search_ids is None:
+            self._search_ids = get_search_backend().search(
+                self.search, products=self.filtered(include_search=False))
+        return self._search_ids
+
+    def price_range(self):
+        condition = Q()
+        if self.min_price is not None:
+            condition &= Q(price__gte=self.min_price)
+        if self.max_price is not None:
+            condition &= Q(price__lte=self.max_price)
+        return condition
+
+    def filtered(self, include_category=True, include_price=True,
+                 include_search=True):
+        """
+        Available products with every filter applied.
+        include_category=False is used for category facets,
+        so each category shows how many products it WOULD have.
+        include_price=False does the same for price buckets.
+        The search filter is EVERY match (not the ranked,
+        limited ids), so totals and facet counts are exact.
+        """
+        products = Product.objects.filter(is_available=True)
+
+        if include_category and self.category:
+            products = products.filter(category__slug=self.category)
+        if include_price:
+            products = products.filter(self.price_range())
+        if include_search and self.search:
+            products = products.filter(
+                get_search_backend().match_condition(self.search))
+
+        return products
+
+    # --------------------------------------------------------
+    # PAGE OF PRODUCTS
+    # --------------------------------------------------------
+    def _keyset_queryset(self):
+        products = self.filtered().select_related('category').order_by(
+            '-created_at', '-id'
+        )
+
+        position = decode_cursor(self.cursor)
+        if position is not None:
+            created_at, pk = position
+            products = products.filter(
+                Q(created_at__lt=created_at) |
+                Q(created_at=created_at, id__lt=pk)
+            )
+
+        # Fetch one extra row to know if there is a next page
+        # WHY: Avoids a second COUNT query just for "Next" button
+        return products[:self.page_size + 1]
+
+    def _keyset_page(self, rows):
+        next_cursor = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            next_cursor = encode_cursor(rows[-1])
+        return CatalogPage(rows, next_cursor, self.page_size)
+
+    def _rank_window(self):
+        """Ranked, filtered ids → (page ids, next cursor)"""
+        ordered = self.search_ids()
+        offset = decode_rank_cursor(self.cursor)
+        page_ids = ordered[offset:offset + self.page_size]
+
+        next_cursor = None
+        if offset + self.page_size < len(ordered):
+            next_cursor = encode_rank_cursor(offset + self.page_size)
+        return page_ids, next_cursor
+
+    def page(self):
+        if self.search:
+            return self._ranked_page()
+        return self._keyset_page(list(self._keyset_queryset()))
+
+    def _ranked_page(self):
+        if not self.search_ids():
+            return CatalogPage([], None, self.page_size)
+
+        page_ids, next_cursor = self._rank_window()
+        products = Product.objects.select_related('category').in_bulk(page_ids)
+
+        return CatalogPage(
+            [products[pk] for pk in page_ids if pk in products],
+            next_cursor,
+            self.page_size,
+        )
+
+    # --------------------------------------------------------
+    # FACETS
+    # --------------------------------------------------------
+    def _price_aggregates(self, buckets):
+        # total honours the price filter, buckets do not —
+        # each bucket shows how many products it WOULD have
+        aggregates = {'total': Count('id', filter=self.price_range())}
+        for index, (_label, low, high) in enumerate(buckets):
+            condition = Q()
+            if low is not None:
+                condition &= Q(price__gte=low)
+            if high is not None:
+                condition &= Q(price__lt=high)
+            aggregates[f'bucket_{index}'] = Count('id', filter=condition)
+        return aggregates
+
+    @staticmethod
+    def _price_buckets(buckets, result):
+        return result['total'], [
+            {
+                'label': label,
+                'min': low,
+                'max': high,
+                'count': result[f'bucket_{index}'],
+            }
+            for index, (label, low, high) in enumerate(buckets)
+        ]
+
+    def _price_facets_key(self):
+        filters = repr((self.category, self.search, self.min_price, self.max_price))
+        return 'shop:price-facets:' + hashlib.md5(filters.encode()).hexdigest()
+
+    def price_facets(self):
+        """
+        Total + every price bucket in ONE query using
+        conditional aggregation: COUNT(...) FILTER (WHERE ...)
+        OLD way would be one COUNT per bucket.
+        Cached per filter combination until the catalog changes.
+        """
+        def build():
+            buckets = price_buckets_for(price_bucket_bounds(self.category))
+            return self._price_buckets(buckets, self.filtered(
+                include_price=False).aggregate(**self._price_aggregates(buckets)))
+        return cached_section(self._price_facets_key(), build)
+
+    def _category_counts(self):
+        return (
+            self.filtered(include_category=False)
+            .order_by()
+            .values_list('category_id')
+            .annotate(count=Count('id'))
+        )
+
+    @staticmethod
+    def _with_facet_counts(categories, counts):
+        for category in categories:
+            category.facet_count = counts.get(category.id, 0)
+        return categories, sum(counts.values())
+
+    def category_facets(self):
+        """
+        Categories with a facet_count attribute,
+        plus the count across all categories.
+        """
+        return self._with_facet_counts(
+            list(Category.objects.all()), dict(self._category_counts())
+        )
+
+    @staticmethod
+    def _facets(price_facets, category_facets):
+        total, price_buckets = price_facets
+        categories, all_categories_total = category_facets
+        return {
+            'total': total,
+            'price_buckets': price_buckets,
+            'categories': categories,
+            'all_categories_total': all_categories_total,
+        }
+
+    def facets(self):
+        return self._facets(self.price_facets(), self.category_facets())
+
+    # --------------------------------------------------------
+    # ASYNC (async_views.py)
+    # Same queries through the async ORM API. Queries that do
+    # not depend on each other are awaited together.
+    # --------------------------------------------------------
+    async def asearch_ids(self):
+        if self._search_ids is None:
+            # The search backends use raw cursors (sync only)
+            self._search_ids = await sync_to_async(get_search_backend().search)(
+                self.search, products=self.filtered(include_search=False))
+        return self._search_ids
+
+    async def aprice_facets(self):
+        async def abounds():
+            # Raw cursor (sync only)
+            return bounds_from_quantiles(
+                await sync_to_async(price_quantiles)(self.category))
+
+        async def build():
+            buckets = price_buckets_for(
+                await acached_section(price_bounds_key(self.category), abounds))
+            return self._price_buckets(buckets, await self.filtered(
+                include_price=False).aaggregate(**self._price_aggregates(buckets)))
+        return await acached_section(self._price_facets_key(), build)
+
+    async def apage(self):
+        if not self.search:
+            return self._keyset_page(
+                [product async for product in self._keyset_queryset()])
+
+        if not await self.asearch_ids():
+            return CatalogPage([], None, self.page_size)
+        page_ids, next_cursor = self._rank_window()
+        products = await Product.objects.select_related(
+            'category').ain_bulk(page_ids)
+        return CatalogPage(
+            [products[pk] for pk in page_ids if pk in products],
+            next_cursor,
+            self.page_size,
+        )
+
+    async def apage_and_facets(self):
+        """
+        (page, facets) — the whole shop page in one gather().
+        The cached sections are awaited side by side; the ORM
+        queries still run one after another on the shared
+        thread-sensitive executor.
+        """
+        page, price_facets, categories, counts = await asyncio.gather(
+            self.apage(),
+            self.aprice_facets(),
+            _alist(Category.objects.all()),
+            _alist(self._category_counts()),
+        )
+        facets = self._facets(
+            price_facets,
+            self._with_facet_counts(categories, dict(counts)),
+        )
+        return page, facets
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
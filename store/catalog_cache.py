@@ -0,0 +1,148 @@
+"""
+====================================================
+MULTISHOP - Catalog Cache
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEM:
+  index view queried all categories + featured products
+  on EVERY request, although they change a few times a day
+
+NEW: Version-keyed cache
+  - One "catalog version" number lives in the cache
+  - Every cached section key includes it:
+        store:index:categories:v<version>
+  - Any Product / Category save or delete bumps the version
+    (signals.py) → next request misses and rebuilds.
+    Old entries are never read again and just expire.
+  - Hot reads = cache lookups only, zero database queries
+  - The version must live in a cache ALL workers share
+    (settings.CACHES, REDIS_URL). With a per-process cache
+    it expires after STORE_CATALOG_VERSION_TIMEOUT seconds,
+    so a bump in one worker reaches the others that late.
+====================================================
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+
+from .models import Category, Product
+
+
+CATALOG_VERSION_KEY = 'store:catalog-version'
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+FEATURED_PRODUCTS_LIMIT = 8
+
+
+def _fresh_version():
+    # Time based, so a version lost from the cache
+    # (eviction / restart) is never reused
+    return time.time_ns()
+
+
+def version_timeout():
+    # None = never expires (shared cache)
+    return getattr(settings, 'STORE_CATALOG_VERSION_TIMEOUT', None)
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, _fresh_version(), version_timeout())
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, _fresh_version(), version_timeout())
+
+
+def bump_catalog_version_on_commit():
+    # WHY: Bumping before COMMIT would let another request
+    #      rebuild the cache from the OLD rows under the NEW version
+    transaction.on_commit(bump_catalog_version)
+
+
+def cached_section(name, build, timeout=CATALOG_CACHE_TIMEOUT):
+    key = f'store:{name}:v{get_catalog_version()}'
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, timeout)
+    return value
+
+
+# ============================================================
+# INDEX PAGE SECTIONS
+# ============================================================
+def get_index_categories():
+    return cached_section(
+        'index:categories',
+        lambda: list(Category.objects.all()),
+    )
+
+
+def featured_products():
+    return (
+        Product.objects.filter(is_featured=True, is_available=True)
+        .select_related('category')[:FEATURED_PRODUCTS_LIMIT]
+    )
+
+
+def get_featured_products():
+    return cached_section(
+        'index:featured',
+        lambda: list(featured_products()),
+    )
+
+
+def get_catalog_last_modified():
+    """Newest Product.updated_at as a unix timestamp (or None)."""
+    def build():
+        newest = Product.objects.aggregate(newest=Max('updated_at'))['newest']
+        # 0 instead of None so an empty catalog is cached too
+        return int(newest.timestamp()) if newest else 0
+
+    return cached_section('last-modified', build) or None
+
+
+# ============================================================
+# ASYNC (async_views.py)
+# Same keys and values as above, so sync and async workers
+# share one cache
+# ============================================================
+async def aget_catalog_version():
+    version = await cache.aget(CATALOG_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CATALOG_VERSION_KEY, _fresh_version(), version_timeout())
+        version = await cache.aget(CATALOG_VERSION_KEY)
+    return version
+
+
+async def acached_section(name, build, timeout=CATALOG_CACHE_TIMEOUT):
+    """`build` is a coroutine function here."""
+    key = f'store:{name}:v{await aget_catalog_version()}'
+    value = await cache.aget(key)
+    if value is None:
+        value = await build()
+        await cache.aset(key, value, timeout)
+    return value
+
+
+async def aget_index_categories():
+    async def build():
+        return [category async for category in Category.objects.all()]
+    return await acached_section('index:categories', build)
+
+
+async def aget_featured_products():
+    async def build():
+        return [product async for product in featured_products()]
+    return await acached_section('index:featured', build)
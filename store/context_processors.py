@@ -0,0 +1,20 @@
+"""
+====================================================
+MULTISHOP - Template Context Processors
+====================================================
+Registered in settings.TEMPLATES → context_processors
+====================================================
+"""
+from django.utils.functional import SimpleLazyObject
+
+from .cart_service import get_cart_summary
+
+
+def cart_summary(request):
+    # OLD: base.html ran {{ request.user.cart.count }} (COUNT per page)
+    # NEW: cached summary, only looked up if a template uses it
+    return {
+        'cart_summary': SimpleLazyObject(
+            lambda: get_cart_summary(request.user)
+        ),
+    }
@@ -0,0 +1,93 @@
+"""
+====================================================
+MULTISHOP - Co-purchase Scores ("bought together")
+Author  : Adarsh Pathak
+====================================================
+
+Batch side of the recommendations (numpy + scipy).
+Only imported by build_recommendations — web workers
+read the results from ProductRecommendation
+(recommendations.py) and never load numpy.
+
+  X  = orders × products basket matrix (1 = bought)
+  C  = Xᵀ·X → C[i, j] = orders containing both i and j
+  score(i, j) = C[i, j] / sqrt(orders(i) · orders(j))
+                (cosine — a best seller does not become
+                 everybody's top neighbour)
+
+Vectorized with sparse matrices, block of products at a
+time, so millions of order lines take minutes and memory
+is bounded by the block, not products².
+====================================================
+"""
+
+from array import array
+
+import numpy as np
+from scipy import sparse
+
+
+def read_lines(queryset, chunk_size=100_000):
+    """(order_ids, product_ids) int64 arrays from an OrderItem queryset."""
+    order_ids, product_ids = array('q'), array('q')
+    rows = queryset.values_list('order_id', 'product_id').iterator(
+        chunk_size=chunk_size)
+    for order_id, product_id in rows:
+        order_ids.append(order_id)
+        product_ids.append(product_id)
+    return (np.frombuffer(order_ids, dtype=np.int64),
+            np.frombuffer(product_ids, dtype=np.int64))
+
+
+def basket_matrix(order_ids, product_ids):
+    """
+    Sparse orders × products matrix (CSR, 0/1) and the product
+    id of every column.
+    """
+    _, order_index = np.unique(order_ids, return_inverse=True)
+    products, product_index = np.unique(product_ids, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(order_index), dtype=np.int32), (order_index, product_index)),
+        shape=(order_index.max(initial=-1) + 1, len(products)),
+    )
+    # Same product twice in one order still counts once
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix, products
+
+
+def top_neighbors(matrix, products, columns=None, counts=None, top=12,
+                  min_support=2, block_size=2000):
+    """
+    Yields (product_id, neighbour_ids, scores, supports) for each
+    column in `columns` (default: all), best first.
+    counts = orders per product (default: column sums of matrix;
+             pass the global counts when matrix is a subset)
+    """
+    if counts is None:
+        counts = np.asarray(matrix.sum(axis=0)).ravel()
+    columns = np.arange(len(products)) if columns is None else np.asarray(columns)
+    by_column = matrix.tocsc()
+
+    for start in range(0, len(columns), block_size):
+        block = columns[start:start + block_size]
+        # block × products co-purchase counts, ONE sparse product
+        together = (by_column[:, block].T @ matrix).tocsr()
+
+        for row, column in enumerate(block):
+            begin, end = together.indptr[row], together.indptr[row + 1]
+            neighbours = together.indices[begin:end]
+            support = together.data[begin:end]
+            keep = (neighbours != column) & (support >= min_support)
+            neighbours, support = neighbours[keep], support[keep]
+
+            scores = support / np.sqrt(
+                float(counts[column]) * counts[neighbours].astype(np.float64))
+            if len(scores) > top:
+                best = np.argpartition(-scores, top - 1)[:top]
+                neighbours, support, scores = (
+                    neighbours[best], support[best], scores[best])
+            # Score high → low, then product id for stable ranks
+            order = np.lexsort((products[neighbours], -scores))
+            yield (int(products[column]), products[neighbours[order]],
+                   scores[order], support[order])
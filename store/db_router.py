@@ -0,0 +1,144 @@
+"""
+====================================================
+MULTISHOP - Read Replica Router
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEM:
+  One database did everything. During a sale, thousands of
+  visitors browsing index / shop / product pages competed with
+  checkouts for the same primary server.
+
+NEW: settings.DATABASE_REPLICA_URLS → DATABASES['replica_N']
+  - Catalog READS (Category, Product) go to a random replica
+  - Everything else — Cart, Order, auth, sessions — and every
+    WRITE stays on 'default' (the primary)
+
+  Read-your-writes (replicas lag behind the primary):
+  - Once a request writes, the rest of that request reads
+    the catalog from the primary too
+  - Inside transaction.atomic() catalog reads use the primary
+    (stock checks must see the rows being changed)
+  - POST / PUT / DELETE requests are pinned from the start
+  - PrimaryPinningMiddleware sets a short cookie after a write,
+    so the visitor's NEXT requests (redirect after POST, admin
+    changelist after save) also read from the primary
+
+  No replicas configured → everything is 'default', as before
+====================================================
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+REPLICA_PREFIX = 'replica_'
+CATALOG_MODELS = {'store.category', 'store.product'}
+
+PIN_COOKIE_NAME = 'store_db_pin'
+# Longer than the replication lag we expect
+PIN_SECONDS = 10
+
+_pinned = ContextVar('store_db_pinned', default=False)
+_wrote = ContextVar('store_db_wrote', default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES
+            if alias.startswith(REPLICA_PREFIX)]
+
+
+def pin_to_primary():
+    _pinned.set(True)
+    _wrote.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+def wrote_to_primary():
+    return _wrote.get()
+
+
+@contextmanager
+def pinning_scope(pinned=False):
+    """Fresh pinning state, e.g. for one request."""
+    tokens = _pinned.set(pinned), _wrote.set(False)
+    try:
+        yield
+    finally:
+        _pinned.reset(tokens[0])
+        _wrote.reset(tokens[1])
+
+
+# ============================================================
+# ROUTER (settings.DATABASE_ROUTERS)
+# ============================================================
+class ReplicaRouter:
+
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        if not self.replicas or model._meta.label_lower not in CATALOG_MODELS:
+            return DEFAULT_DB_ALIAS
+        if is_pinned() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return not db.startswith(REPLICA_PREFIX)
+
+
+# ============================================================
+# MIDDLEWARE (settings.MIDDLEWARE)
+# ============================================================
+class PrimaryPinningMiddleware:
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _starts_pinned(self, request):
+        return (
+            request.method not in ('GET', 'HEAD', 'OPTIONS')
+            or PIN_COOKIE_NAME in request.COOKIES
+        )
+
+    def _pin_next_requests(self, response):
+        # Only a write starts a pin — pinned reads do not extend it
+        if wrote_to_primary() and replica_aliases():
+            response.set_cookie(
+                PIN_COOKIE_NAME, '1', max_age=PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with pinning_scope(self._starts_pinned(request)):
+            return self._pin_next_requests(self.get_response(request))
+
+    async def __acall__(self, request):
+        with pinning_scope(self._starts_pinned(request)):
+            return self._pin_next_requests(await self.get_response(request))
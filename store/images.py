@@ -0,0 +1,154 @@
+"""
+====================================================
+MULTISHOP - Responsive Image Derivatives
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEM:
+  Product / Category / Vendor / Profile images were served
+  at their ORIGINAL upload size. A shop grid of 50 cards
+  downloaded megabytes of full-resolution photos to show
+  them 200px tall.
+
+NEW: When an image is saved, Pillow writes resized +
+     recompressed copies next to it:
+        products/phone.jpg
+        products/derivatives/phone-320w.webp
+        products/derivatives/phone-320w.jpg
+        products/derivatives/phone-640w.webp  ...
+     {% responsive_image %} (templatetags/store_images.py)
+     emits srcset so the browser downloads the smallest
+     copy that is sharp enough for the screen.
+
+     Existing media: python manage.py generate_image_derivatives
+====================================================
+"""
+
+import io
+import posixpath
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+
+DERIVATIVE_WIDTHS = (320, 640, 1024)
+
+# format → (file extension, Pillow save options)
+DERIVATIVE_FORMATS = {
+    'webp': ('webp', {'format': 'WEBP', 'quality': 80, 'method': 4}),
+    'jpeg': ('jpg',  {'format': 'JPEG', 'quality': 82, 'optimize': True,
+                      'progressive': True}),
+}
+
+WIDTHS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def derivative_name(name, width, image_format):
+    folder, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    extension = DERIVATIVE_FORMATS[image_format][0]
+    return posixpath.join(folder, 'derivatives', f'{stem}-{width}w.{extension}')
+
+
+def _widths_cache_key(name):
+    return f'store:image-widths:{name}'
+
+
+# ============================================================
+# GENERATE
+# ============================================================
+def generate_derivatives(name, storage=default_storage, force=False):
+    """
+    Writes every derivative of one stored image.
+    Returns the widths that exist afterwards.
+    Widths wider than the original are skipped (no upscaling).
+    """
+    with storage.open(name, 'rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+
+    widths = [width for width in DERIVATIVE_WIDTHS if width < original.width]
+
+    for width in widths:
+        height = round(original.height * width / original.width)
+        resized = None
+        for image_format, (_ext, options) in DERIVATIVE_FORMATS.items():
+            target = derivative_name(name, width, image_format)
+            if not force and storage.exists(target):
+                continue
+            if resized is None:
+                resized = original.resize((width, height), Image.LANCZOS)
+
+            frame = resized
+            if image_format == 'jpeg' and frame.mode not in ('RGB', 'L'):
+                frame = frame.convert('RGB')
+
+            buffer = io.BytesIO()
+            frame.save(buffer, **options)
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(buffer.getvalue()))
+
+    remember_widths(name, widths)
+    return widths
+
+
+def remember_widths(name, widths):
+    cache.set(_widths_cache_key(name), widths, WIDTHS_CACHE_TIMEOUT)
+
+
+def available_widths(name, storage=default_storage):
+    """
+    Widths with derivatives on disk for this image.
+    Cached, so templates do not stat files on every render.
+    """
+    key = _widths_cache_key(name)
+    widths = cache.get(key)
+    if widths is None:
+        widths = [
+            width for width in DERIVATIVE_WIDTHS
+            if storage.exists(derivative_name(name, width, 'jpeg'))
+        ]
+        remember_widths(name, widths)
+    return widths
+
+
+def srcset(name, image_format, storage=default_storage):
+    return ', '.join(
+        f'{storage.url(derivative_name(name, width, image_format))} {width}w'
+        for width in available_widths(name, storage)
+    )
+
+
+# ============================================================
+# MODEL HOOK (called from signals.py)
+# ============================================================
+def generate_for_image(image, storage=default_storage):
+    """
+    Generates derivatives for an ImageField value once.
+    WHY: Uploads always get a new file name, so if we already
+         know the widths for this name there is nothing to do
+         (saving a product's price does not re-encode photos)
+    """
+    if not image or not image.name:
+        return []
+    known = cache.get(_widths_cache_key(image.name))
+    if known is not None:
+        return known
+    if not storage.exists(image.name):
+        return []
+    return generate_derivatives(image.name, storage=storage)
+
+
+def pick_derivative(name, display_width, image_format='webp',
+                    storage=default_storage):
+    """
+    What a browser would download for `display_width` CSS pixels:
+    the smallest derivative at least that wide, else the original.
+    """
+    for width in available_widths(name, storage):
+        if width >= display_width:
+            return derivative_name(name, width, image_format)
+    return name
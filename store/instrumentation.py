@@ -0,0 +1,169 @@
+"""
+====================================================
+MULTISHOP - SQL Query Instrumentation
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEM:
+  N+1 queries reached production unnoticed:
+    {{ category.products.count }} in templates
+    item.get_total() per cart line
+    {{ order }} → __str__ loading the user per row in admin
+  Nothing measured how many queries a page ran.
+
+NEW:
+  QueryRecorder        → counts queries, total SQL time and
+                         repeated query FINGERPRINTS
+                         (same SQL shape run again and again
+                         = the N+1 signature)
+  QueryInstrumentationMiddleware
+                       → per request, when
+                         settings.STORE_QUERY_INSTRUMENTATION
+                         is on:
+                           X-DB-Query-Count: 5
+                           X-DB-Query-Time: 3.2
+                           X-DB-Duplicate-Queries: 0
+                           Server-Timing: db;dur=3.2;desc="5 queries"
+                         + one log line on 'store.queries'
+                           (WARNING with fingerprints on duplicates)
+  store/tests.py QueryBudgetTests uses QueryRecorder to give
+  every URL in store/urls.py a fixed query budget.
+====================================================
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger('store.queries')
+
+_current = ContextVar('store_query_recorder', default=None)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN \((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """
+    SQL shape without values:
+      ... WHERE id = 7 AND name IN ('a', 'b')
+      ... WHERE id = ? AND name IN (...)
+    """
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+# ============================================================
+# RECORDING
+# WHY: connection.execute_wrapper() works without DEBUG=True
+#      (connection.queries is only filled in DEBUG)
+# ============================================================
+def _record(execute, sql, params, many, context):
+    recorder = _current.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        while recorder is not None:
+            recorder.queries.append((sql, duration))
+            recorder = recorder.parent
+
+
+def install(connection, **kwargs):
+    """Adds the recording wrapper to one connection (idempotent)."""
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+class QueryRecorder:
+    """
+    with QueryRecorder() as recorded:
+        ...
+    recorded.count, recorded.total_ms, recorded.duplicates()
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.parent = None
+        self._token = None
+
+    def __enter__(self):
+        # Connections of this thread. Connections opened by other
+        # threads (async views) are covered by the
+        # connection_created hook in apps.py
+        for connection in connections.all():
+            install(connection)
+        self.parent = _current.get()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _current.reset(self._token)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_ms(self):
+        return sum(duration for _, duration in self.queries) * 1000
+
+    def duplicates(self):
+        """{fingerprint: times run} for shapes that ran more than once"""
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        return {shape: n for shape, n in counts.most_common() if n > 1}
+
+    def duplicate_count(self):
+        """Extra executions — 0 means no repeated query shape"""
+        return sum(n - 1 for n in self.duplicates().values())
+
+
+# ============================================================
+# MIDDLEWARE (settings.MIDDLEWARE, first entry)
+# ============================================================
+class QueryInstrumentationMiddleware:
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'STORE_QUERY_INSTRUMENTATION', False):
+            # Removed from the chain: zero cost when off
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorded:
+            response = self.get_response(request)
+
+        total_ms = recorded.total_ms
+        duplicates = recorded.duplicates()
+        extra = sum(n - 1 for n in duplicates.values())
+
+        response['X-DB-Query-Count'] = str(recorded.count)
+        response['X-DB-Query-Time'] = f'{total_ms:.1f}'
+        response['X-DB-Duplicate-Queries'] = str(extra)
+        response['Server-Timing'] = (
+            f'db;dur={total_ms:.1f};desc="{recorded.count} queries"')
+
+        summary = '%s %s %s: %d queries, %.1f ms, %d duplicates'
+        args = (request.method, request.path, response.status_code,
+                recorded.count, total_ms, extra)
+        if duplicates:
+            shapes = '\n'.join(f'  {n}× {shape}' for shape, n in duplicates.items())
+            logger.warning(summary + '\n%s', *args, shapes)
+        else:
+            logger.info(summary, *args)
+        return response
@@ -0,0 +1,253 @@
+"""
+====================================================
+MULTISHOP - Inventory Reservations
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEMS:
+1. Product.stock was never decremented at checkout
+   → we sold more than we had during sales
+2. A naive fix (read stock, subtract in Python, save)
+   is a race: two buyers read stock=1, both save stock=0
+   and BOTH get the last item
+
+NEW:
+  reserve()  takes stock with a CONDITIONAL UPDATE
+               UPDATE product SET stock = stock - n
+               WHERE id IN (..) AND stock >= n
+             The database checks and subtracts in one step,
+             so two buyers can never take the same unit.
+             The whole cart is ONE statement over the primary
+             key, so rows are locked in id order and two carts
+             with the same products cannot deadlock.
+  commit()   hold → sale (stock stays taken)
+  release()  hold → back on the shelf
+  release_expired()  returns abandoned holds
+             (also run by: python manage.py release_expired_holds)
+
+  is_available flips to False when stock hits 0 (sold_out
+  remembers why), and back to True when released stock
+  makes it > 0 — only for products WE hid, never for ones
+  an admin turned off.
+====================================================
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.utils import timezone
+
+from .catalog_cache import bump_catalog_version_on_commit
+from .models import Category, Product, StockReservation
+
+
+HOLD_DURATION = timedelta(minutes=15)
+
+
+class OutOfStockError(Exception):
+
+    def __init__(self, product_ids):
+        self.product_ids = list(product_ids)
+        super().__init__(f'Not enough stock for products {self.product_ids}')
+
+
+# ============================================================
+# AVAILABILITY FLAGS
+# WHY: queryset.update() skips model signals, so category
+#      counters and the catalog cache version (signals.py)
+#      are updated here by hand
+# ============================================================
+def _set_availability(product_ids, available):
+    if available:
+        changed = Product.objects.filter(
+            pk__in=product_ids, is_available=False, sold_out=True, stock__gt=0)
+    else:
+        changed = Product.objects.filter(
+            pk__in=product_ids, is_available=True, stock=0)
+
+    rows = list(changed.order_by().values_list('pk', 'category_id'))
+    if not rows:
+        return []
+
+    Product.objects.filter(pk__in=[pk for pk, _ in rows]).update(
+        is_available=available, sold_out=not available)
+    step = 1 if available else -1
+    deltas = Counter()
+    for _pk, category_id in rows:
+        deltas[category_id] += step
+    Category.objects.adjust_product_counts(deltas)
+    bump_catalog_version_on_commit()
+    return [pk for pk, _ in rows]
+
+
+def _per_product(quantities):
+    """CASE id WHEN .. THEN quantity END"""
+    return Case(
+        *[When(pk=pid, then=Value(qty)) for pid, qty in quantities.items()],
+        output_field=PositiveIntegerField(),
+    )
+
+
+def _take_stock(quantities):
+    """
+    Takes stock for the whole cart in ONE conditional UPDATE:
+        UPDATE product SET stock = stock - CASE id WHEN .. END
+        WHERE id IN (..) AND stock >= CASE id WHEN .. END
+    If any product is short, the update is rolled back and
+    the short product ids are returned.
+    """
+    needed = _per_product(quantities)
+    with transaction.atomic():
+        updated = Product.objects.filter(
+            pk__in=list(quantities), stock__gte=needed
+        ).update(stock=F('stock') - needed)
+        if updated == len(quantities):
+            return []
+        transaction.set_rollback(True)
+
+    stock = dict(
+        Product.objects.filter(pk__in=list(quantities))
+        .values_list('pk', 'stock')
+    )
+    short = [pid for pid in sorted(quantities)
+             if stock.get(pid, 0) < quantities[pid]]
+    # Someone released stock in between: still report failure
+    return short or sorted(quantities)
+
+
+# ============================================================
+# PUBLIC API
+# ============================================================
+def reserve(user, quantities, ttl=HOLD_DURATION):
+    """
+    quantities = {product_id: quantity}
+    Takes ALL the stock or NONE of it (OutOfStockError).
+    Returns the created StockReservation rows.
+    """
+    quantities = {pid: qty for pid, qty in quantities.items() if qty > 0}
+    if not quantities:
+        return []
+
+    with transaction.atomic():
+        failed = _take_stock(quantities)
+        if failed:
+            # Abandoned holds might be sitting on that stock
+            if release_expired(product_ids=failed):
+                failed = _take_stock(quantities)
+            if failed:
+                raise OutOfStockError(failed)
+
+        _set_availability(list(quantities), available=False)
+
+        expires_at = timezone.now() + ttl
+        holds = StockReservation.objects.bulk_create([
+            StockReservation(
+                product_id=product_id,
+                user=user,
+                quantity=quantity,
+                expires_at=expires_at,
+            )
+            for product_id, quantity in sorted(quantities.items())
+        ])
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # MySQL: no ids back from a bulk INSERT, and commit() /
+            # release() find holds by id
+            holds = list(StockReservation.objects.filter(
+                user=user, product_id__in=list(quantities),
+                expires_at=expires_at).order_by('product_id', 'pk'))
+        return holds
+
+
+def commit(reservations):
+    """
+    Hold becomes a sale: stock stays taken, hold row goes away.
+    Returns the number of holds deleted — fewer than passed in
+    means another request already committed / released them.
+    """
+    deleted, _ = StockReservation.objects.filter(
+        pk__in=[reservation.pk for reservation in reservations]
+    ).delete()
+    return deleted
+
+
+def _release_locked(reservations):
+    """release() for rows the caller locked with select_for_update()."""
+    totals = Counter()
+    for reservation in reservations:
+        totals[reservation.product_id] += reservation.quantity
+    if not totals:
+        return 0
+
+    StockReservation.objects.filter(
+        pk__in=[reservation.pk for reservation in reservations]
+    ).delete()
+    Product.objects.filter(pk__in=list(totals)).update(
+        stock=F('stock') + _per_product(totals))
+    _set_availability(list(totals), available=True)
+    return len(reservations)
+
+
+def release(reservations):
+    """
+    Puts held stock back on the shelf. Returns number released.
+    Only holds still in the database count: two requests
+    releasing the same hold give its stock back ONCE.
+    """
+    if not reservations:
+        return 0
+    with transaction.atomic():
+        # A hold deleted by a concurrent request is skipped here
+        # (locking reads see the latest committed rows)
+        rows = list(
+            StockReservation.objects.filter(
+                pk__in=[reservation.pk for reservation in reservations])
+            .select_for_update().order_by('product_id', 'pk')
+        )
+        return _release_locked(rows)
+
+
+def release_expired(product_ids=None, now=None):
+    """Releases holds past their expiry. Returns number released."""
+    expired = StockReservation.objects.filter(
+        expires_at__lte=now or timezone.now())
+    if product_ids is not None:
+        expired = expired.filter(product_id__in=product_ids)
+    # Lock the rows so two workers never release the same hold twice
+    with transaction.atomic():
+        rows = list(expired.select_for_update().order_by('product_id', 'pk'))
+        return _release_locked(rows)
+
+
+def active_holds(user, lock=False):
+    holds = StockReservation.objects.filter(
+        user=user, expires_at__gt=timezone.now())
+    if lock:
+        # Same order as release_expired(): no lock-order deadlocks
+        holds = holds.select_for_update().order_by('product_id', 'pk')
+    return list(holds)
+
+
+def hold_quantities(user, quantities, ttl=HOLD_DURATION):
+    """
+    Makes sure the user holds exactly `quantities`.
+    Matching holds are extended, anything else is re-reserved.
+    """
+    with transaction.atomic():
+        # Locked: a second checkout by the same user waits here
+        # instead of releasing / extending the same holds
+        holds = active_holds(user, lock=True)
+        held = Counter()
+        for hold in holds:
+            held[hold.product_id] += hold.quantity
+
+        if holds and dict(held) == {
+                pid: qty for pid, qty in quantities.items() if qty > 0}:
+            StockReservation.objects.filter(
+                pk__in=[hold.pk for hold in holds]
+            ).update(expires_at=timezone.now() + ttl)
+            return holds
+
+        _release_locked(holds)
+        return reserve(user, quantities, ttl=ttl)
@@ -0,0 +1,106 @@
+"""
+Rebuilds the sales rollup tables from the order history.
+
+Usage:
+    python manage.py backfill_rollups
+    python manage.py backfill_rollups --batch-size 20000
+
+Run once after the rollup migration, and whenever the totals
+drifted (bulk status updates, orders written with bulk_create,
+e.g. seed_catalog). New orders keep the tables up to date on
+their own (rollups.py).
+
+Orders are read in id ranges of --batch-size. Each range is
+aggregated by the database (GROUP BY) and added with the same
+upsert the live updates use, so memory stays flat however long
+the history is. Everything runs in ONE transaction: readers
+see the old totals until the new ones are complete.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+from store.models import (
+    CategorySales, DailySales, Order, OrderItem, ProductSales, StatusSales,
+    VendorSales,
+)
+from store.rollups import NOT_COUNTED_STATUSES, increment
+
+
+ROLLUPS = [DailySales, ProductSales, CategorySales, VendorSales, StatusSales]
+
+# OrderItem column → (rollup model, key)
+# Category / vendor: the snapshot taken at checkout
+ITEM_ROLLUPS = [
+    ('product_id',  ProductSales,  'product'),
+    ('category_id', CategorySales, 'category'),
+    ('vendor_id',   VendorSales,   'vendor'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the sales rollup tables from the order history (batched)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Orders per batch')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        processed = 0
+        with transaction.atomic():
+            for model in ROLLUPS:
+                model.objects.all().delete()
+
+            last_id = 0
+            while True:
+                ids = list(
+                    Order.objects.filter(pk__gt=last_id).order_by('pk')
+                    .values_list('pk', flat=True)[:options['batch_size']])
+                if not ids:
+                    break
+                self.add_range(last_id, ids[-1])
+                last_id = ids[-1]
+                processed += len(ids)
+                self.stdout.write(f'  {processed:,} orders')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rolled up {processed:,} orders in {elapsed:.1f}s'))
+
+    def add_range(self, after_id, last_id):
+        """Adds orders after_id < id <= last_id to every rollup."""
+        orders = Order.objects.filter(pk__gt=after_id, pk__lte=last_id)
+        sales = orders.exclude(status__in=NOT_COUNTED_STATUSES)
+        items = OrderItem.objects.filter(
+            order__pk__gt=after_id, order__pk__lte=last_id,
+        ).exclude(order__status__in=NOT_COUNTED_STATUSES)
+
+        increment(StatusSales, 'status', {
+            row['status']: {'orders': row['orders'], 'revenue': row['revenue']}
+            for row in orders.values('status').annotate(
+                orders=Count('pk'), revenue=Sum('total_amount')).order_by()
+        })
+
+        daily = {
+            row['day']: {'orders': row['orders'], 'revenue': row['revenue']}
+            for row in sales.annotate(day=TruncDate('created_at'))
+            .values('day').annotate(
+                orders=Count('pk'), revenue=Sum('total_amount')).order_by()
+        }
+        for row in (items.annotate(day=TruncDate('order__created_at'))
+                    .values('day').annotate(units=Sum('quantity')).order_by()):
+            daily[row['day']]['units'] = row['units']
+        increment(DailySales, 'date', daily)
+
+        for lookup, model, key in ITEM_ROLLUPS:
+            increment(model, key, {
+                row[lookup]: {'units': row['units'], 'revenue': row['revenue']}
+                for row in items.values(lookup).annotate(
+                    units=Sum('quantity'),
+                    revenue=Sum(F('price') * F('quantity')),
+                ).order_by()
+            })
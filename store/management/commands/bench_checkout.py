@@ -0,0 +1,82 @@
+"""
+Counts database round trips of the checkout pipeline.
+
+Usage:
+    python manage.py bench_checkout
+    python manage.py bench_checkout --sizes 1 10 100 500
+
+Creates a throwaway user, category and products, runs
+place_order() for each cart size and rolls everything back,
+so it is safe to run against a dev database.
+"""
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from store.models import Cart, Category, Product
+from store.orders import place_order
+
+
+BILLING = {
+    'first_name': 'Bench', 'last_name': 'User', 'email': 'bench@example.com',
+    'phone': '9999999999', 'address': '1 Bench Street', 'city': 'Pune',
+    'state': 'MH', 'pin_code': '411001', 'notes': '',
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Show checkout round trips for carts of different sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=[1, 10, 100])
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'lines':>6} {'queries':>8} {'ms':>9}")
+        for size in options['sizes']:
+            queries, elapsed = self.measure(size)
+            self.stdout.write(f'{size:>6} {queries:>8} {elapsed * 1000:>9.1f}')
+
+    def measure(self, size):
+        result = None
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user('bench-checkout-user')
+                category = Category.objects.create(
+                    name='Bench', slug='bench-checkout-category')
+                Product.objects.bulk_create([
+                    Product(
+                        category=category,
+                        name=f'Bench {i}',
+                        slug=f'bench-checkout-{i}',
+                        description='',
+                        price=Decimal('10.00') + i,
+                        image='products/bench.jpg',
+                        stock=1000,
+                    )
+                    for i in range(size)
+                ])
+                # MySQL: no ids back from a bulk INSERT
+                product_ids = Product.objects.filter(
+                    category=category).values_list('pk', flat=True)
+                Cart.objects.bulk_create([
+                    Cart(user=user, product_id=product_id, quantity=2)
+                    for product_id in product_ids
+                ])
+
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as queries:
+                    place_order(user, BILLING)
+                result = (len(queries), time.perf_counter() - started)
+                raise Rollback()
+        except Rollback:
+            pass
+        return result
@@ -0,0 +1,223 @@
+"""
+Latency + throughput per endpoint on a seeded catalog.
+
+Usage:
+    python manage.py seed_catalog --size 100k
+    python manage.py bench_endpoints
+    python manage.py bench_endpoints --requests 500 --concurrency 8
+    python manage.py bench_endpoints --endpoints shop shop_details
+    python manage.py bench_endpoints --base-url http://127.0.0.1:8000
+    python manage.py bench_endpoints --output bench-$(git rev-parse --short HEAD).json
+
+Default: Django test client in this process (also reports
+queries per request). --base-url: real HTTP against a running
+server on the same database.
+
+Endpoints
+    shop          /shop/ with a rotation of filters, search, deep cursor
+    shop_details  random seeded product pages
+    cart          logged-in seeded shopper with a cart
+    checkout      checkout page (holds stock) for those shoppers
+"""
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from store.benchmarks import environment, latency_summary
+from store.catalog import CatalogQuery
+from store.instrumentation import QueryRecorder
+from store.models import Cart, Category, Product
+from store.management.commands.seed_catalog import PREFIX
+
+
+ENDPOINTS = ['shop', 'shop_details', 'cart', 'checkout']
+
+
+class Command(BaseCommand):
+    help = 'Measure p50/p95/p99 latency and throughput of store endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS,
+                            default=ENDPOINTS)
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Measured requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--base-url',
+                            help='Benchmark a running server instead')
+        parser.add_argument('--output', help='Write JSON results to a file')
+        parser.add_argument('--json', action='store_true',
+                            help='Print JSON instead of a table')
+
+    def handle(self, *args, **options):
+        shoppers = list(
+            Cart.objects.filter(user__username__startswith=f'{PREFIX}-user-')
+            .order_by('user_id').values_list('user_id', flat=True)
+            .distinct()[:50])
+        if not shoppers:
+            raise CommandError('No seeded data, run: manage.py seed_catalog')
+        self.base_url = (options['base_url'] or '').rstrip('/')
+        self.sessions = {}
+
+        targets = {
+            'shop': self.shop_urls(),
+            'shop_details': [
+                reverse('store:shop_details', args=[slug]) for slug in
+                Product.objects.filter(slug__startswith=f'{PREFIX}-product-')
+                .order_by('?').values_list('slug', flat=True)[:200]
+            ],
+            'cart': [reverse('store:cart')],
+            'checkout': [reverse('store:checkout')],
+        }
+        logged_in = {'cart', 'checkout'}
+
+        results = {}
+        for name in options['endpoints']:
+            users = shoppers if name in logged_in else [None]
+            results[name] = self.run(targets[name], users, options)
+
+        report = {
+            'environment': environment(),
+            'catalog': {
+                'products': Product.objects.count(),
+                'categories': Category.objects.count(),
+            },
+            'options': {
+                key: options[key] for key in
+                ('requests', 'warmup', 'concurrency', 'base_url')
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f'{"endpoint":<14} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} '
+            f'{"p99 ms":>8} {"errors":>7} {"queries":>8}')
+        for name, row in results.items():
+            self.stdout.write(
+                f'{name:<14} {row["rps"]:>8.1f} {row["p50_ms"]:>8.1f} '
+                f'{row["p95_ms"]:>8.1f} {row["p99_ms"]:>8.1f} '
+                f'{row["errors"]:>7} {row.get("queries_per_request", "-"):>8}')
+
+    def shop_urls(self):
+        shop = reverse('store:shop')
+        category = Category.objects.filter(
+            slug__startswith=f'{PREFIX}-').order_by('id').first()
+        # A cursor 20 pages deep (keyset pagination should not care)
+        deep = CatalogQuery(page_size=24)
+        for _ in range(20):
+            page = deep.page()
+            if not page.has_next:
+                break
+            deep.cursor = page.next_cursor
+        return [
+            shop,
+            f'{shop}?category={category.slug}' if category else shop,
+            f'{shop}?min_price=500&max_price=5000',
+            f'{shop}?search=wireless',
+            f'{shop}?cursor={deep.cursor}' if deep.cursor else shop,
+        ]
+
+    # --------------------------------------------------------
+    # RUN ONE ENDPOINT
+    # --------------------------------------------------------
+    def run(self, urls, users, options):
+        sequence = count()
+
+        def worker(requests):
+            client = self.make_client()
+            latencies, errors, queries = [], 0, 0
+            for _ in range(requests):
+                number = next(sequence)
+                url = urls[number % len(urls)]
+                user_id = users[number % len(users)]
+                started = time.perf_counter()
+                with QueryRecorder() as recorded:
+                    status = self.fetch(client, url, user_id)
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += status >= 400
+                queries += recorded.count
+            return latencies, errors, queries
+
+        def threaded_worker(requests):
+            try:
+                return worker(requests)
+            finally:
+                # Each pool thread opened its own connections
+                connections.close_all()
+
+        # Log shoppers in before the clock starts
+        for user_id in users:
+            if user_id is not None:
+                self.session_cookie(user_id)
+        worker(options['warmup'])
+
+        threads = max(1, options['concurrency'])
+        share = [options['requests'] // threads] * threads
+        share[0] += options['requests'] - sum(share)
+
+        started = time.perf_counter()
+        if threads == 1:
+            outcomes = [worker(share[0])]
+        else:
+            with ThreadPoolExecutor(threads) as pool:
+                outcomes = list(pool.map(threaded_worker, share))
+        elapsed = time.perf_counter() - started
+
+        summary = latency_summary(
+            [ms for latencies, _, _ in outcomes for ms in latencies],
+            elapsed,
+            errors=sum(errors for _, errors, _ in outcomes),
+        )
+        if not self.base_url:
+            summary['queries_per_request'] = round(
+                sum(queries for _, _, queries in outcomes)
+                / max(summary['requests'], 1), 1)
+        return summary
+
+    def make_client(self):
+        return None if self.base_url else Client()
+
+    def session_cookie(self, user_id):
+        if user_id not in self.sessions:
+            client = Client()
+            client.force_login(User.objects.get(pk=user_id))
+            self.sessions[user_id] = client.cookies[
+                settings.SESSION_COOKIE_NAME].value
+        return self.sessions[user_id]
+
+    def fetch(self, client, url, user_id):
+        if client is not None:
+            if user_id is not None:
+                client.cookies[settings.SESSION_COOKIE_NAME] = \
+                    self.session_cookie(user_id)
+            return client.get(url).status_code
+
+        request = urllib.request.Request(self.base_url + url)
+        if user_id is not None:
+            request.add_header(
+                'Cookie',
+                f'{settings.SESSION_COOKIE_NAME}={self.session_cookie(user_id)}')
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+        except (urllib.error.URLError, ConnectionError):
+            return 599
@@ -0,0 +1,60 @@
+"""
+Bytes of product images transferred for one shop page.
+
+Usage:
+    python manage.py bench_image_bytes
+    python manage.py bench_image_bytes --page-size 50 --display-width 300 --dpr 2
+
+Compares the original uploads with what {% responsive_image %}
+lets the browser pick (smallest WebP derivative that covers
+display-width × device-pixel-ratio).
+"""
+import json
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from store.catalog import CatalogQuery
+from store.images import pick_derivative
+
+
+class Command(BaseCommand):
+    help = 'Compare image bytes per shop page: originals vs derivatives'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--display-width', type=int, default=300)
+        parser.add_argument('--dpr', type=float, default=2.0)
+        parser.add_argument('--json', action='store_true')
+
+    def size_of(self, name):
+        try:
+            return default_storage.size(name)
+        except OSError:
+            return 0
+
+    def handle(self, *args, **options):
+        page = CatalogQuery(page_size=options['page_size']).page()
+        target = int(options['display_width'] * options['dpr'])
+
+        original_bytes = derivative_bytes = 0
+        for product in page.products:
+            name = product.image.name
+            original_bytes += self.size_of(name)
+            derivative_bytes += self.size_of(pick_derivative(name, target))
+
+        result = {
+            'images': len(page.products),
+            'target_width': target,
+            'original_bytes': original_bytes,
+            'derivative_bytes': derivative_bytes,
+            'saved_percent': round(
+                100 * (1 - derivative_bytes / original_bytes), 1
+            ) if original_bytes else 0.0,
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+            return
+        for key, value in result.items():
+            self.stdout.write(f'{key:>18}: {value}')
@@ -0,0 +1,96 @@
+"""
+CPU cost of a login attempt: hashed vs rejected by the throttle.
+
+Usage:
+    python manage.py bench_login_throttle
+    python manage.py bench_login_throttle --attempts 200 --json
+
+Two phases through the Django test client (full middleware
+stack, no network), same wrong-password POST every time:
+    unthrottled → STORE_THROTTLE_ENABLED off, every attempt
+                  runs authenticate() (one password hash)
+    throttled   → one IP + username; after the bucket is
+                  empty every attempt is a 429
+Reports process CPU time per attempt (time.process_time),
+so the numbers do not depend on machine load.
+"""
+import json
+import logging
+import time
+import uuid
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from store.benchmarks import environment
+from store.throttle import LOGIN_PER_IP, LOGIN_PER_USERNAME
+
+
+# TEST-NET-2, never a real client
+BENCH_IP = '198.51.100.7'
+
+
+class Command(BaseCommand):
+    help = 'Measure CPU per login attempt: hashed vs rejected by the throttle'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=50,
+                            help='Attempts per phase')
+        parser.add_argument('--json', action='store_true',
+                            help='Print JSON instead of a table')
+
+    def handle(self, *args, **options):
+        attempts = options['attempts']
+        username = f'bench-{uuid.uuid4().hex[:12]}'
+        client = Client(REMOTE_ADDR=BENCH_IP)
+        url = reverse('store:login')
+
+        def attempt():
+            started = time.process_time()
+            response = client.post(url, {'username': username,
+                                         'password': 'wrong-password'})
+            return response.status_code, (time.process_time() - started) * 1000
+
+        with override_settings(STORE_THROTTLE_ENABLED=False):
+            unthrottled = [attempt()[1] for _ in range(attempts)]
+
+        self.clear_buckets(username)
+        # Django logs every 429 as a warning
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            throttled = [attempt() for _ in range(attempts)]
+        finally:
+            request_logger.setLevel(level)
+            self.clear_buckets(username)
+        rejected = [cpu for status, cpu in throttled if status == 429]
+
+        hashed_ms = sum(unthrottled) / len(unthrottled)
+        rejected_ms = sum(rejected) / len(rejected) if rejected else 0.0
+        report = {
+            'environment': environment(),
+            'attempts': attempts,
+            'hashed_cpu_ms': round(hashed_ms, 3),
+            'rejected': len(rejected),
+            'rejected_cpu_ms': round(rejected_ms, 3),
+            'speedup': round(hashed_ms / rejected_ms, 1) if rejected_ms else None,
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f"Hashed attempt   {report['hashed_cpu_ms']:>9.3f} ms CPU")
+        self.stdout.write(f"Rejected attempt {report['rejected_cpu_ms']:>9.3f} ms CPU "
+                          f"({report['rejected']} of {attempts} rejected)")
+        if report['speedup']:
+            self.stdout.write(self.style.SUCCESS(
+                f"A rejected attempt is {report['speedup']}x cheaper"))
+
+    def clear_buckets(self, username):
+        cache.delete_many([
+            LOGIN_PER_IP.cache_key(BENCH_IP),
+            LOGIN_PER_USERNAME.cache_key(username),
+        ])
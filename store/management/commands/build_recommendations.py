@@ -0,0 +1,155 @@
+"""
+Builds "frequently bought together" recommendations.
+
+Usage:
+    python manage.py build_recommendations            # incremental
+    python manage.py build_recommendations --full
+    python manage.py build_recommendations --top 20 --min-support 3
+
+Incremental (default once a full run exists): only products
+in orders created or changed since the last run are
+recomputed. Their scores need every order that contains
+them, so exactly those orders are read — not the whole
+history. Cron it every few minutes; run --full nightly.
+
+Cancelled orders are ignored. Scores: copurchase.py.
+"""
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from store.copurchase import basket_matrix, read_lines, top_neighbors
+from store.models import OrderItem, ProductRecommendation
+from store.rollups import NOT_COUNTED_STATUSES
+
+
+# Orders committed while the previous run was reading are
+# picked up again by looking back a little further
+OVERLAP = timedelta(minutes=10)
+
+
+class Command(BaseCommand):
+    help = 'Compute co-purchase recommendations (full or incremental)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Recompute every product')
+        parser.add_argument('--top', type=int, default=12,
+                            help='Recommendations kept per product')
+        parser.add_argument('--min-support', type=int, default=2,
+                            help='Orders two products must share')
+        parser.add_argument('--block-size', type=int, default=2000,
+                            help='Products scored (and written) per batch')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        self.run_at = timezone.now()
+        self.options = options
+        # Lines of deleted products (product_id NULL) are skipped
+        lines = OrderItem.objects.filter(product__isnull=False).exclude(
+            order__status__in=NOT_COUNTED_STATUSES)
+
+        last_run = ProductRecommendation.objects.aggregate(
+            last=Max('computed_at'))['last']
+        full = options['full'] or last_run is None
+
+        if full:
+            touched = None
+        else:
+            # Products of new / re-statused orders (cancelled too:
+            # their pairs must disappear)
+            touched = set(
+                OrderItem.objects.filter(order__updated_at__gte=last_run - OVERLAP,
+                                         product__isnull=False)
+                .values_list('product_id', flat=True).distinct())
+            if not touched:
+                self.stdout.write('Nothing changed since the last run')
+                return
+            lines = lines.filter(order__in=OrderItem.objects.filter(
+                product_id__in=touched).values('order_id'))
+
+        order_ids, product_ids = read_lines(lines)
+        self.stdout.write(f'{len(order_ids):,} order lines read '
+                          f'({time.perf_counter() - started:.1f}s)')
+        matrix, products = basket_matrix(order_ids, product_ids)
+
+        if full:
+            columns, counts = None, None
+        else:
+            columns = np.flatnonzero(np.isin(products, list(touched)))
+            # Neighbours' order counts must cover ALL their orders,
+            # not just the ones read here
+            counts = self.order_counts(products)
+
+        written = self.write(top_neighbors(
+            matrix, products, columns=columns, counts=counts,
+            top=options['top'], min_support=options['min_support'],
+            block_size=options['block_size'],
+        ))
+
+        # Products that lost every pair (e.g. orders cancelled)
+        stale = ProductRecommendation.objects.filter(computed_at__lt=self.run_at)
+        if not full:
+            stale = stale.filter(product_id__in=touched)
+        stale.delete()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Full' if full else 'Incremental'} run: {written:,} products "
+            f"scored from {len(order_ids):,} order lines in {elapsed:.1f}s"))
+
+    def order_counts(self, products, chunk_size=1000):
+        counts = np.zeros(len(products), dtype=np.int64)
+        position = {product_id: index for index, product_id in
+                    enumerate(products.tolist())}
+        for start in range(0, len(products), chunk_size):
+            chunk = products[start:start + chunk_size].tolist()
+            rows = (
+                OrderItem.objects
+                .exclude(order__status__in=NOT_COUNTED_STATUSES)
+                .filter(product_id__in=chunk)
+                .values('product_id')
+                .annotate(orders=Count('order_id', distinct=True))
+                .values_list('product_id', 'orders')
+            )
+            for product_id, orders in rows:
+                counts[position[product_id]] = orders
+        return counts
+
+    def write(self, neighbours):
+        """Replaces each product's rows, one transaction per block."""
+        written = 0
+        block = []
+        for result in neighbours:
+            block.append(result)
+            if len(block) >= self.options['block_size']:
+                written += self.replace(block)
+                block = []
+        if block:
+            written += self.replace(block)
+        return written
+
+    def replace(self, block):
+        rows = [
+            ProductRecommendation(
+                product_id=product_id,
+                recommended_id=int(recommended_id),
+                rank=rank,
+                score=float(score),
+                orders_together=int(support),
+                computed_at=self.run_at,
+            )
+            for product_id, recommended_ids, scores, supports in block
+            for rank, (recommended_id, score, support) in enumerate(
+                zip(recommended_ids, scores, supports), start=1)
+        ]
+        with transaction.atomic():
+            ProductRecommendation.objects.filter(
+                product_id__in=[product_id for product_id, *_ in block]).delete()
+            ProductRecommendation.objects.bulk_create(rows, batch_size=5000)
+        return len(block)
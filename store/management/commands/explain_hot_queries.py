@@ -0,0 +1,50 @@
+"""
+EXPLAINs the storefront's hot queries (store/query_plans.py)
+and fails when any of them reads a whole table.
+
+Usage:
+    python manage.py explain_hot_queries
+    python manage.py explain_hot_queries --database replica_1
+    python manage.py explain_hot_queries -v 2      # print the plans
+
+WHY: A dropped index or a new filter does not break a test,
+     it only makes a page slow once the tables are big.
+     Run it in CI / before deploy: exit status 1 on a full scan.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store import query_plans
+
+
+class Command(BaseCommand):
+    help = 'Fail when a hot storefront query falls back to a full table scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database',
+                            help='Database alias (default: where the query is routed)')
+
+    def handle(self, *args, **options):
+        hot_queries = query_plans.HOT_QUERIES
+        failed = []
+        for name, build in hot_queries:
+            queryset = build()
+            if options['database']:
+                queryset = queryset.using(options['database'])
+            scanned, plan = query_plans.full_scans(queryset)
+
+            if scanned:
+                failed.append(name)
+                self.stdout.write(self.style.ERROR(
+                    f"FULL SCAN  {name}: {', '.join(scanned)}"))
+            else:
+                self.stdout.write(f'ok         {name}')
+            if options['verbosity'] >= 2:
+                self.stdout.write(json.dumps(plan, indent=2, default=str))
+
+        if failed:
+            raise CommandError(
+                f'{len(failed)} of {len(hot_queries)} hot queries scan a whole table')
+        self.stdout.write(self.style.SUCCESS(
+            f'All {len(hot_queries)} hot queries use an index'))
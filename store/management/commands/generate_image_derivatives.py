@@ -0,0 +1,76 @@
+"""
+Backfills responsive image derivatives for existing media.
+
+Usage:
+    python manage.py generate_image_derivatives
+    python manage.py generate_image_derivatives --workers 8 --force
+
+Resizing is CPU bound, so images are processed in a pool of
+worker processes (one per CPU by default).
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from store.images import generate_derivatives, remember_widths
+from store.models import Category, Product, Profile, Vendor
+
+
+IMAGE_MODELS = [Product, Category, Vendor, Profile]
+
+
+def _generate(name, force):
+    try:
+        return name, generate_derivatives(name, force=force), None
+    except (OSError, ValueError) as error:
+        return name, None, str(error)
+
+
+class Command(BaseCommand):
+    help = 'Generate resized WebP/JPEG derivatives for all stored images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--force', action='store_true',
+                            help='Re-encode derivatives that already exist')
+
+    def image_names(self):
+        seen = set()
+        for model in IMAGE_MODELS:
+            names = (
+                model.objects.exclude(image='').exclude(image__isnull=True)
+                .values_list('image', flat=True)
+                .iterator(chunk_size=2000)
+            )
+            for name in names:
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+
+    def handle(self, *args, **options):
+        names = list(self.image_names())
+        # Worker processes must not inherit open DB connections
+        connections.close_all()
+
+        started = time.perf_counter()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = [pool.submit(_generate, name, options['force'])
+                       for name in names]
+            for future in as_completed(futures):
+                name, widths, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                    continue
+                # Workers have their own cache, so record widths here too
+                remember_widths(name, widths)
+                done += 1
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {done} images ({failed} failed) in {elapsed:.1f}s'
+        ))
@@ -0,0 +1,362 @@
+"""
+Streams a CSV / JSONL product feed into the catalog (upsert).
+
+Usage:
+    python manage.py import_products feed.csv
+    python manage.py import_products prices.jsonl --batch-size 5000
+    zcat feed.csv.gz | python manage.py import_products - --format csv
+    python manage.py import_products feed.csv --dry-run
+
+Columns / keys (header row for CSV, one object per line for JSONL):
+    slug            existing slug → UPDATE that product
+                    missing       → NEW product, unique slug from name
+    name, category (category slug), vendor (vendor shop slug,
+    e.g. "Pune Gadgets" → pune-gadgets), price, discount_price,
+    stock, description, image, is_available, is_featured
+Only the columns present in the row are written (an empty CSV
+cell counts as absent), so a "slug,price,stock" feed reprices
+without touching anything else.
+
+Memory stays flat: rows are read one at a time, each batch is
+written and committed before the next one is read.
+Per batch: 1 query to find existing slugs, bulk_create +
+bulk_update, 1 query for cart owners (summary cache), search
+index rows. Category counters + catalog version at the end.
+"""
+from collections import Counter
+import csv
+import io
+import json
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from store.cart_service import invalidate_cart
+from store.catalog_cache import bump_catalog_version_on_commit
+from store.models import Cart, Category, Product, Vendor
+from store.search import get_search_backend
+
+
+# feed column → parser
+FIELD_PARSERS = {
+    'name':           lambda value: str(value).strip(),
+    'description':    lambda value: str(value).strip(),
+    'image':          lambda value: str(value).strip(),
+    'price':          lambda value: parse_decimal(value, required=True),
+    'discount_price': lambda value: parse_decimal(value),
+    'stock':          lambda value: parse_stock(value),
+    'is_available':   lambda value: parse_bool(value),
+    'is_featured':    lambda value: parse_bool(value),
+}
+REQUIRED_FOR_CREATE = ['name', 'category', 'price']
+UPDATE_BATCH_SIZE = 200
+SLUG_MAX_LENGTH = Product._meta.get_field('slug').max_length
+#  Extra suffixes read per base, candidates per slug IN (..)
+SLUG_LOOKAHEAD = 3
+SLUG_QUERY_CHUNK = 1000
+
+
+class RowError(ValueError):
+    pass
+
+
+def parse_decimal(value, required=False):
+    if value in (None, ''):
+        if required:
+            raise RowError('price is required')
+        return None
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation:
+        raise RowError(f'not a number: {value!r}')
+    if not number.is_finite() or number < 0:
+        raise RowError(f'invalid amount: {value!r}')
+    return number.quantize(Decimal('0.01'))
+
+
+def parse_stock(value):
+    try:
+        stock = int(value)
+    except (TypeError, ValueError):
+        raise RowError(f'stock is not a whole number: {value!r}')
+    if stock < 0:
+        raise RowError('stock cannot be negative')
+    return stock
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+# ============================================================
+# FEED READERS (generators → constant memory)
+# ============================================================
+def read_csv(handle):
+    # Empty cell = column not given for this row (JSONL null clears)
+    for line_number, row in enumerate(csv.DictReader(handle), start=2):
+        yield line_number, {
+            column: value for column, value in row.items()
+            if column and value not in ('', None)
+        }
+
+
+def read_jsonl(handle):
+    for line_number, line in enumerate(handle, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as error:
+            yield line_number, RowError(f'invalid JSON: {error.msg}')
+            continue
+        yield line_number, row
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def slug_candidate(base, suffix):
+    """phone, 1 → phone   phone, 4 → phone-4 (base cut to fit)"""
+    if suffix == 1:
+        return base
+    return f'{base[:SLUG_MAX_LENGTH - len(str(suffix)) - 1]}-{suffix}'
+
+
+def unique_slugs(bases, reserved=()):
+    """
+    Unique slugs for a batch of new products:
+        phone, phone → phone-4, phone-5  (phone … phone-3 taken)
+    Only the exact candidates are read (slug IN (..), one query
+    per SLUG_QUERY_CHUNK): per base as many suffixes as the
+    batch needs + SLUG_LOOKAHEAD, so memory follows the batch,
+    not the number of 'product-N' slugs already in the catalog.
+    A base that runs out of free candidates reads its next window.
+    """
+    wanted = Counter(bases)
+    taken = set(reserved)
+    checked = {}    # base → suffixes 1..n already read
+
+    def read(windows):
+        candidates = []
+        for base, (first, last) in windows.items():
+            candidates += [slug_candidate(base, n) for n in range(first, last + 1)]
+            checked[base] = last
+        for chunk in batched(candidates, SLUG_QUERY_CHUNK):
+            taken.update(Product.objects.filter(slug__in=chunk)
+                         .values_list('slug', flat=True))
+
+    read({base: (1, count + SLUG_LOOKAHEAD) for base, count in wanted.items()})
+
+    next_suffix, result = {}, []
+    for base in bases:
+        suffix = next_suffix.get(base, 1)
+        while True:
+            if suffix > checked[base]:
+                read({base: (suffix, suffix + wanted[base] + SLUG_LOOKAHEAD)})
+            slug = slug_candidate(base, suffix)
+            if slug not in taken:
+                break
+            suffix += 1
+        taken.add(slug)
+        next_suffix[base] = suffix + 1
+        result.append(slug)
+    return result
+
+
+class Command(BaseCommand):
+    help = 'Stream a CSV / JSONL product feed into the catalog (bulk upsert)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Feed file, or '-' for stdin")
+        parser.add_argument('--format', choices=list(READERS))
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validate and count, write nothing')
+        parser.add_argument('--max-errors', type=int, default=100,
+                            help='Stop after this many bad rows')
+
+    def handle(self, *args, **options):
+        feed_format = options['format'] or (
+            'jsonl' if options['path'].endswith(('.jsonl', '.ndjson')) else 'csv')
+
+        # Small lookup tables, loaded once
+        categories = list(Category.objects.only('id', 'name', 'slug'))
+        self.categories = {category.slug: category for category in categories}
+        self.categories_by_id = {category.id: category for category in categories}
+        self.vendors = {
+            slugify(shop_name): pk
+            for pk, shop_name in Vendor.objects.values_list('id', 'shop_name')
+        }
+        self.dry_run = options['dry_run']
+        self.max_errors = options['max_errors']
+        self.stats = {'created': 0, 'updated': 0, 'errors': 0}
+
+        started = time.perf_counter()
+        with self.open(options['path']) as handle:
+            rows = READERS[feed_format](handle)
+            for number, batch in enumerate(
+                    batched(rows, options['batch_size']), start=1):
+                self.import_batch(batch)
+                processed = self.stats['created'] + self.stats['updated']
+                self.stdout.write(
+                    f'batch {number}: {processed:,} rows '
+                    f'({processed / (time.perf_counter() - started):,.0f} rows/s)')
+
+        if not self.dry_run and (self.stats['created'] or self.stats['updated']):
+            with transaction.atomic():
+                # bulk writes skip the model signals (signals.py)
+                Category.objects.recount_products()
+                bump_catalog_version_on_commit()
+
+        elapsed = time.perf_counter() - started
+        processed = self.stats['created'] + self.stats['updated']
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Checked' if self.dry_run else 'Imported'} {processed:,} rows "
+            f"({self.stats['created']:,} new, {self.stats['updated']:,} updated, "
+            f"{self.stats['errors']:,} errors) in {elapsed:.1f}s — "
+            f"{processed / elapsed if elapsed else 0:,.0f} rows/s"))
+
+    def open(self, path):
+        if path == '-':
+            return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig')
+        try:
+            return open(path, encoding='utf-8-sig', newline='')
+        except OSError as error:
+            raise CommandError(f'Cannot read {path}: {error}')
+
+    def error(self, line_number, message):
+        self.stats['errors'] += 1
+        self.stderr.write(f'line {line_number}: {message}')
+        if self.stats['errors'] >= self.max_errors:
+            raise CommandError(f'Stopped after {self.max_errors} bad rows')
+
+    # --------------------------------------------------------
+    # ONE BATCH
+    # --------------------------------------------------------
+    def parse(self, row):
+        """Feed row → (slug, {model field: value}) for the columns present."""
+        if isinstance(row, Exception):
+            raise row
+        if not isinstance(row, dict):
+            raise RowError('row is not an object')
+
+        values = {}
+        for column, parse_value in FIELD_PARSERS.items():
+            if column in row:
+                values[column] = parse_value(row[column])
+
+        if row.get('category'):
+            category = self.categories.get(slugify(row['category']))
+            if category is None:
+                raise RowError(f"unknown category {row['category']!r}")
+            values['category'] = category
+        if 'vendor' in row:
+            vendor_id = None
+            if row['vendor']:
+                vendor_id = self.vendors.get(slugify(row['vendor']))
+                if vendor_id is None:
+                    raise RowError(f"unknown vendor {row['vendor']!r}")
+            values['vendor_id'] = vendor_id
+        return slugify(row.get('slug') or ''), values
+
+    def check_new(self, values):
+        missing = [field for field in REQUIRED_FOR_CREATE if not values.get(field)]
+        if missing:
+            raise RowError(f"new product needs {', '.join(missing)}")
+
+    def import_batch(self, batch):
+        rows, creates = {}, []
+        for line_number, row in batch:
+            try:
+                slug, values = self.parse(row)
+                if slug:
+                    # Same slug twice in one batch: the later row wins
+                    rows[slug] = (line_number, values)
+                else:
+                    self.check_new(values)
+                    creates.append((None, values))
+            except RowError as error:
+                self.error(line_number, error)
+
+        with transaction.atomic():
+            existing = Product.objects.in_bulk(list(rows), field_name='slug')
+            to_update, changed_fields = [], {'updated_at'}
+            for slug, (line_number, values) in rows.items():
+                product = existing.get(slug)
+                if product is None:
+                    # Unknown slug → create it under that slug
+                    try:
+                        self.check_new(values)
+                    except RowError as error:
+                        self.error(line_number, error)
+                        continue
+                    creates.append((slug, values))
+                    continue
+                for field, value in values.items():
+                    setattr(product, field, value)
+                # 'vendor_id' → 'vendor' for bulk_update
+                changed_fields.update(
+                    field.removesuffix('_id') for field in values)
+                to_update.append(product)
+
+            new_products = self.build_new(creates)
+            self.stats['created'] += len(new_products)
+            self.stats['updated'] += len(to_update)
+            if self.dry_run:
+                transaction.set_rollback(True)
+                return
+
+            now = timezone.now()
+            for product in to_update:
+                product.updated_at = now
+                # Search rows need the category name (no query per row)
+                product.category = self.categories_by_id[product.category_id]
+            if to_update:
+                # Big CASE WHEN statements get slow; a few hundred rows each
+                Product.objects.bulk_update(
+                    to_update, sorted(changed_fields), batch_size=UPDATE_BATCH_SIZE)
+            Product.objects.bulk_create(new_products)
+            if not connection.features.can_return_rows_from_bulk_insert:
+                # MySQL: no ids back from a bulk INSERT
+                new_products = list(
+                    Product.objects.select_related('category')
+                    .filter(slug__in=[product.slug for product in new_products]))
+            self.after_write(to_update, new_products)
+
+    def build_new(self, creates):
+        """Product objects with unique slugs for the batch's new rows."""
+        explicit = {slug for slug, _ in creates if slug}
+        generated = iter(unique_slugs(
+            [slugify(values['name'])[:SLUG_MAX_LENGTH] or 'product'
+             for slug, values in creates if not slug],
+            reserved=explicit,
+        ))
+        return [
+            Product(slug=slug or next(generated), **values)
+            for slug, values in creates
+        ]
+
+    def after_write(self, updated, created):
+        """What signals.py would have done on every save()."""
+        get_search_backend().index_products(updated + created)
+
+        if updated:
+            owners = set(
+                Cart.objects.filter(product__in=updated)
+                .values_list('user_id', flat=True))
+            if owners:
+                invalidate_cart(*owners)
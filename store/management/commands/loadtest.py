@@ -0,0 +1,160 @@
+"""
+Requests per second: WSGI (gunicorn, sync views)
+vs ASGI (uvicorn, store/async_views.py).
+
+Usage:
+    python manage.py loadtest
+    python manage.py loadtest --duration 20 --concurrency 64 --workers 4
+    python manage.py loadtest --servers asgi --path /shop/ --json
+
+Starts each server on a local port with the same database,
+hammers the catalog pages from a thread pool for --duration
+seconds and prints throughput + latency percentiles.
+Needs gunicorn and uvicorn on PATH.
+"""
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from store.benchmarks import environment, latency_summary
+from store.models import Product
+
+
+SERVERS = {
+    'wsgi': lambda port, workers: [
+        'gunicorn', 'multishop_project.wsgi:application',
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+        '--log-level', 'warning',
+    ],
+    'asgi': lambda port, workers: [
+        'uvicorn', 'multishop_project.asgi:application',
+        '--host', '127.0.0.1', '--port', str(port),
+        '--workers', str(workers), '--log-level', 'warning',
+    ],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = 'Compare catalog requests/sec under gunicorn (WSGI) and uvicorn (ASGI)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', nargs='+', choices=list(SERVERS),
+                            default=list(SERVERS))
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='URL path to request (repeatable)')
+        parser.add_argument('--duration', type=float, default=10.0)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--json', action='store_true')
+
+    def default_paths(self):
+        paths = ['/', '/shop/']
+        product = Product.objects.filter(is_available=True).first()
+        if product is not None:
+            paths.append(f'/product/{product.slug}/')
+        return paths
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or self.default_paths()
+        results = {}
+        for name in options['servers']:
+            results[name] = self.run_server(name, paths, options)
+
+        if options['json']:
+            self.stdout.write(json.dumps(
+                {'environment': environment(), 'results': results}))
+            return
+        self.stdout.write(
+            f'{"server":>6} {"requests":>9} {"errors":>7} {"req/s":>9} '
+            f'{"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}')
+        for name, row in results.items():
+            self.stdout.write(
+                f'{name:>6} {row["requests"]:>9} {row["errors"]:>7} '
+                f'{row["rps"]:>9.1f} {row["p50_ms"]:>8.1f} '
+                f'{row["p95_ms"]:>8.1f} {row["p99_ms"]:>8.1f}')
+
+    # --------------------------------------------------------
+    # ONE SERVER
+    # --------------------------------------------------------
+    def run_server(self, name, paths, options):
+        port = free_port()
+        command = SERVERS[name](port, options['workers'])
+        if shutil.which(command[0]) is None:
+            raise CommandError(f'{command[0]} is not installed')
+
+        env = dict(os.environ)
+        env['DJANGO_SETTINGS_MODULE'] = os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'multishop_project.settings')
+        # asgi.py turns async views on, make sure WSGI does not
+        env['STORE_ASYNC_VIEWS'] = 'True' if name == 'asgi' else 'False'
+
+        process = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=sys.stderr,
+        )
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            self.wait_until_ready(base_url + paths[0], process)
+            return self.hammer(base_url, paths, options)
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def wait_until_ready(self, url, process, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'server exited with {process.returncode}')
+            try:
+                urllib.request.urlopen(url, timeout=2).read()
+                return
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.2)
+        raise CommandError(f'server did not answer {url} in {timeout}s')
+
+    def hammer(self, base_url, paths, options):
+        deadline = time.monotonic() + options['duration']
+
+        def client(offset):
+            latencies, errors, index = [], 0, offset
+            while time.monotonic() < deadline:
+                url = base_url + paths[index % len(paths)]
+                index += 1
+                started = time.perf_counter()
+                try:
+                    urllib.request.urlopen(url, timeout=30).read()
+                except (urllib.error.URLError, ConnectionError):
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+            return latencies, errors
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            outcomes = list(pool.map(client, range(options['concurrency'])))
+        elapsed = time.monotonic() - started
+
+        return latency_summary(
+            [ms for found, _ in outcomes for ms in found],
+            elapsed,
+            errors=sum(errors for _, errors in outcomes),
+        )
@@ -0,0 +1,30 @@
+"""
+Rebuilds the product search index in bulk.
+
+Usage:
+    python manage.py rebuild_search_index
+    python manage.py rebuild_search_index --batch-size 5000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product full-text search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        started = time.perf_counter()
+        indexed = backend.rebuild(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{type(backend).__name__}: indexed {indexed} products '
+            f'in {elapsed:.2f}s'
+        ))
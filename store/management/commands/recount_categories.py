@@ -0,0 +1,23 @@
+"""
+Recomputes Category.product_count for every category.
+
+Usage:
+    python manage.py recount_categories
+
+WHY: Counters are kept up to date on every Product save/delete,
+     but bulk operations (bulk_create, queryset.update, raw SQL)
+     skip signals. Run this after those to repair drift.
+"""
+from django.core.management.base import BaseCommand
+
+from store.models import Category
+
+
+class Command(BaseCommand):
+    help = 'Recompute available-product counters on all categories'
+
+    def handle(self, *args, **options):
+        updated = Category.objects.recount_products()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recounted products for {updated} categories'
+        ))
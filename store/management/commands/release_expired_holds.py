@@ -0,0 +1,23 @@
+"""
+Puts stock from expired checkout holds back on the shelf.
+
+Usage:
+    python manage.py release_expired_holds
+
+Holds are also released on demand when a product runs out,
+but running this from cron every few minutes keeps the
+shop page stock counts accurate.
+"""
+from django.core.management.base import BaseCommand
+
+from store.inventory import release_expired
+
+
+class Command(BaseCommand):
+    help = 'Release expired stock reservations'
+
+    def handle(self, *args, **options):
+        released = release_expired()
+        self.stdout.write(self.style.SUCCESS(
+            f'Released {released} expired holds'
+        ))
@@ -0,0 +1,266 @@
+"""
+Seeds a deterministic benchmark catalog.
+
+Usage:
+    python manage.py seed_catalog --size 10k
+    python manage.py seed_catalog --size 100k --seed 7
+    python manage.py seed_catalog --size 1m --replace --skip-search-index
+    python manage.py seed_catalog --products 2500
+
+Same --size + --seed → same rows (names, prices, carts, orders),
+so benchmark runs on two commits compare like with like.
+Everything is written with bulk_create in batches; all seeded
+rows use the 'seed-' slug / username prefix and --replace
+removes them first.
+"""
+import random
+import time
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from store.catalog_cache import bump_catalog_version
+from store.models import Cart, Category, Order, OrderItem, Product, Vendor
+from store.search import get_search_backend
+
+
+PREFIX = 'seed'
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+SEED_PASSWORD = 'seed-pass-123'
+SEED_IMAGE = 'products/seed.jpg'
+
+ADJECTIVES = [
+    'Classic', 'Smart', 'Wireless', 'Organic', 'Premium', 'Compact',
+    'Portable', 'Vintage', 'Ultra', 'Eco', 'Deluxe', 'Mini',
+]
+NOUNS = [
+    'Phone', 'Laptop', 'Headphones', 'Shirt', 'Sneakers', 'Watch',
+    'Backpack', 'Lamp', 'Blender', 'Novel', 'Camera', 'Chair',
+    'Speaker', 'Bottle', 'Jacket', 'Keyboard',
+]
+STATUSES = [status for status, _ in Order.STATUS_CHOICES]
+
+
+def plan_for(products):
+    """Row counts for every table, derived from the product count."""
+    users = max(100, products // 10)
+    return {
+        'products': products,
+        'categories': max(20, products // 5_000),
+        'vendors': max(10, products // 200),
+        'users': users,
+        'carts': users // 5,          # users with a cart
+        'orders': users // 2,
+        # Products used by carts / orders (popular items)
+        'popular': min(products, 10_000),
+    }
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Seed a deterministic catalog (10k / 100k / 1m products) for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=list(SIZES), default='10k')
+        parser.add_argument('--products', type=int,
+                            help='Exact product count (overrides --size)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--replace', action='store_true',
+                            help='Delete previously seeded rows first')
+        parser.add_argument('--skip-search-index', action='store_true')
+
+    def handle(self, *args, **options):
+        plan = plan_for(options['products'] or SIZES[options['size']])
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        if Category.objects.filter(slug__startswith=f'{PREFIX}-').exists():
+            if not options['replace']:
+                raise CommandError(
+                    'Seeded rows already exist, use --replace to recreate them')
+            self.step('Removing old seed data', self.remove_seeded)
+
+        started = time.perf_counter()
+        categories = self.step('Categories', self.seed_categories, plan)
+        vendors = self.step('Vendors', self.seed_vendors, plan)
+        self.step('Products', self.seed_products, plan, categories, vendors)
+        users = self.step('Users', self.seed_users, plan)
+        popular = self.step('Popular products', self.popular_products, plan)
+        self.step('Carts', self.seed_carts, plan, users, popular)
+        self.step('Orders', self.seed_orders, plan, users, popular)
+
+        # bulk_create skips model signals → rebuild what they maintain
+        self.step('Category counters', Category.objects.recount_products)
+        if not options['skip_search_index']:
+            self.step('Search index', get_search_backend().rebuild)
+        self.step('Sales rollups', call_command, 'backfill_rollups',
+                  '--batch-size', str(self.batch_size), stdout=StringIO())
+        bump_catalog_version()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {plan['products']:,} products in {elapsed:.1f}s "
+            f"({plan['products'] / elapsed:,.0f} products/s)"))
+
+    def step(self, label, function, *args, **kwargs):
+        started = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.stdout.write(f'{label:<20} {time.perf_counter() - started:>8.2f}s')
+        return result
+
+    # --------------------------------------------------------
+    # STEPS
+    # --------------------------------------------------------
+    def remove_seeded(self):
+        with transaction.atomic():
+            # Cascades to vendors, carts, orders and products
+            User.objects.filter(username__startswith=f'{PREFIX}-').delete()
+            Category.objects.filter(slug__startswith=f'{PREFIX}-').delete()
+
+    def seed_categories(self, plan):
+        Category.objects.bulk_create([
+            Category(name=f'Seed Category {i}', slug=f'{PREFIX}-category-{i}')
+            for i in range(plan['categories'])
+        ])
+        return list(
+            Category.objects.filter(slug__startswith=f'{PREFIX}-category-')
+            .order_by('id').values_list('id', flat=True))
+
+    def create_users(self, usernames):
+        # One hash for every seeded user (hashing is the slow part)
+        password = make_password(SEED_PASSWORD)
+        for batch in batched(usernames, self.batch_size):
+            User.objects.bulk_create([
+                User(username=name, email=f'{name}@example.com',
+                     password=password)
+                for name in batch
+            ])
+        ids = dict(
+            User.objects.filter(username__in=usernames)
+            .values_list('username', 'id'))
+        return [ids[name] for name in usernames]
+
+    def seed_vendors(self, plan):
+        user_ids = self.create_users(
+            [f'{PREFIX}-vendor-{i}' for i in range(plan['vendors'])])
+        Vendor.objects.bulk_create([
+            Vendor(user_id=user_id, shop_name=f'Seed Shop {i}',
+                   is_approved=True)
+            for i, user_id in enumerate(user_ids)
+        ])
+        return list(
+            Vendor.objects.filter(user_id__in=user_ids)
+            .order_by('id').values_list('id', flat=True))
+
+    def make_product(self, index, categories, vendors):
+        rng = self.rng
+        name = (f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} '
+                f'{index:07d}')
+        price = Decimal(int(rng.lognormvariate(7, 1.2)) + 49)
+        discount = None
+        if rng.random() < 0.2:
+            discount = (price * Decimal('0.8')).quantize(Decimal('1'))
+        return Product(
+            category_id=rng.choice(categories),
+            vendor_id=rng.choice(vendors),
+            name=name,
+            slug=f'{PREFIX}-product-{index}',
+            description=f'{name} — seeded for benchmarks.',
+            price=price,
+            discount_price=discount,
+            image=SEED_IMAGE,
+            stock=rng.randint(0, 500),
+            is_available=rng.random() > 0.05,
+            is_featured=rng.random() < 0.01,
+        )
+
+    def seed_products(self, plan, categories, vendors):
+        rows = (self.make_product(i, categories, vendors)
+                for i in range(plan['products']))
+        for number, batch in enumerate(batched(rows, self.batch_size), 1):
+            with transaction.atomic():
+                Product.objects.bulk_create(batch)
+            if number % 20 == 0:
+                self.stdout.write(f'  {number * self.batch_size:,} products')
+
+    def seed_users(self, plan):
+        return self.create_users(
+            [f'{PREFIX}-user-{i}' for i in range(plan['users'])])
+
+    def popular_products(self, plan):
+        """(id, unit price, name, category, vendor) of a deterministic sample of products."""
+        indexes = sorted(self.rng.sample(range(plan['products']), plan['popular']))
+        popular = []
+        for batch in batched(indexes, 1_000):
+            rows = dict(
+                (slug, (pk, discount or price, name, category_id, vendor_id))
+                for slug, pk, price, discount, name, category_id, vendor_id
+                in Product.objects.filter(
+                    slug__in=[f'{PREFIX}-product-{i}' for i in batch]
+                ).values_list('slug', 'id', 'price', 'discount_price', 'name',
+                              'category_id', 'vendor_id')
+            )
+            popular.extend(rows[f'{PREFIX}-product-{i}'] for i in batch)
+        return popular
+
+    def seed_carts(self, plan, users, popular):
+        shoppers = self.rng.sample(users, plan['carts'])
+        rows = (
+            Cart(user_id=user_id, product_id=product_id,
+                 quantity=self.rng.randint(1, 3))
+            for user_id in shoppers
+            for product_id, *_ in self.rng.sample(
+                popular, min(len(popular), self.rng.randint(1, 5)))
+        )
+        for batch in batched(rows, self.batch_size):
+            Cart.objects.bulk_create(batch)
+
+    def seed_orders(self, plan, users, popular):
+        for batch in batched(range(plan['orders']), self.batch_size):
+            baskets = [
+                [(product, self.rng.randint(1, 3)) for product in
+                 self.rng.sample(popular, min(len(popular), self.rng.randint(1, 4)))]
+                for _ in batch
+            ]
+            with transaction.atomic():
+                orders = Order.objects.bulk_create([
+                    Order(
+                        user_id=self.rng.choice(users),
+                        total_amount=sum(product[1] * qty for product, qty in basket),
+                        item_count=sum(qty for _, qty in basket),
+                        status=self.rng.choice(STATUSES),
+                    )
+                    for basket in baskets
+                ])
+                order_ids = self.inserted_ids(Order, orders)
+                OrderItem.objects.bulk_create([
+                    OrderItem(order_id=order_id, product_id=product_id,
+                              product_name=name, category_id=category_id,
+                              vendor_id=vendor_id, quantity=qty, price=price)
+                    for order_id, basket in zip(order_ids, baskets)
+                    for (product_id, price, name, category_id, vendor_id), qty in basket
+                ])
+
+    def inserted_ids(self, model, objects):
+        if connection.features.can_return_rows_from_bulk_insert:
+            return [obj.pk for obj in objects]
+        # MySQL does not return ids from a bulk INSERT. Inside this
+        # transaction the rows just inserted are the newest ones
+        newest = model.objects.order_by('-id').values_list('id', flat=True)
+        return sorted(newest[:len(objects)])
@@ -0,0 +1,152 @@
+"""
+Cold-start time of a web worker, from `python -X importtime`.
+
+Usage:
+    python manage.py startup_report
+    python manage.py startup_report --runs 5 --top 25
+    python manage.py startup_report --budget-ms 1500          # CI: fail above
+    python manage.py startup_report --output startup-$(git rev-parse --short HEAD).json
+
+Each run is a fresh interpreter doing what a gunicorn worker
+does: import the WSGI application (django.setup(), settings,
+apps, middleware), then store.warmup.warm_up(). Reported:
+    import  → wall time until the application object exists
+    warm-up → time per warm-up step
+    import time per top-level package (django, store, ...)
+    slowest single modules (own time, -X importtime)
+The median run is reported, so one noisy run does not fail CI.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from store.benchmarks import environment
+
+
+WORKER_SCRIPT = '''
+import json, time
+started = time.perf_counter()
+from multishop_project.wsgi import application
+loaded = time.perf_counter()
+from store.warmup import warm_up
+report = warm_up() if {warm_up} else {{}}
+print(json.dumps({{
+    'import_ms': (loaded - started) * 1000,
+    'warmup_ms': (time.perf_counter() - loaded) * 1000,
+    'warmup': report,
+}}))
+'''
+
+# "import time:       412 |       1830 |   django.db.models"
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+def parse_importtime(stderr):
+    """{module: own import time in µs}"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            own, _cumulative, _indent, module = match.groups()
+            modules[module] = int(own)
+    return modules
+
+
+def by_package(modules):
+    packages = {}
+    for module, own in modules.items():
+        package = module.split('.')[0]
+        packages[package] = packages.get(package, 0) + own
+    return packages
+
+
+def slowest(times, top):
+    return [
+        {'name': name, 'ms': round(us / 1000, 1)}
+        for name, us in sorted(times.items(), key=lambda item: -item[1])[:top]
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Measure worker cold-start time (imports + warm-up) with -X importtime'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3,
+                            help='Fresh interpreters to start (median is kept)')
+        parser.add_argument('--top', type=int, default=15,
+                            help='Slowest modules to list')
+        parser.add_argument('--no-warmup', action='store_true',
+                            help='Imports only')
+        parser.add_argument('--budget-ms', type=float,
+                            help='Fail when import + warm-up exceeds this')
+        parser.add_argument('--output', help='Write JSON results to a file')
+        parser.add_argument('--json', action='store_true',
+                            help='Print JSON instead of a table')
+
+    def handle(self, *args, **options):
+        runs = sorted(
+            (self.run_worker(not options['no_warmup'])
+             for _ in range(max(1, options['runs']))),
+            key=lambda run: run['total_ms'],
+        )
+        run = runs[len(runs) // 2]
+
+        report = {
+            'environment': environment(),
+            'runs': len(runs),
+            'total_ms': round(run['total_ms'], 1),
+            'import_ms': round(run['import_ms'], 1),
+            'warmup_ms': round(run['warmup_ms'], 1),
+            'warmup': run['warmup'],
+            'modules_imported': len(run['modules']),
+            'packages': slowest(by_package(run['modules']), options['top']),
+            'slowest_modules': slowest(run['modules'], options['top']),
+        }
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.print_table(report)
+
+        budget = options['budget_ms']
+        if budget is not None and report['total_ms'] > budget:
+            raise CommandError(
+                f"Cold start {report['total_ms']:.0f} ms is over the "
+                f"{budget:.0f} ms budget")
+
+    def run_worker(self, warm_up):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'multishop_project.settings'))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             WORKER_SCRIPT.format(warm_up=warm_up)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f'Worker failed to start:\n{result.stderr[-2000:]}')
+        run = json.loads(result.stdout.strip().splitlines()[-1])
+        run['total_ms'] = run['import_ms'] + run['warmup_ms']
+        run['modules'] = parse_importtime(result.stderr)
+        return run
+
+    def print_table(self, report):
+        self.stdout.write(
+            f"Cold start {report['total_ms']:.0f} ms "
+            f"(import {report['import_ms']:.0f} ms + warm-up "
+            f"{report['warmup_ms']:.0f} ms, median of {report['runs']})")
+        for step, result in report['warmup'].items():
+            self.stdout.write(f"  warm-up {step:<14} {result['ms']:>8.1f} ms  "
+                              f"({result['items']} items)")
+        for title, key in (('package', 'packages'), ('module', 'slowest_modules')):
+            self.stdout.write(f"{title:<44} {'import':>10}")
+            for entry in report[key]:
+                self.stdout.write(f"  {entry['name']:<42} {entry['ms']:>7.1f} ms")
+        self.stdout.write(f"{report['modules_imported']} modules imported")
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+# ============================================================
+# FTS5 full-text index for product search (SQLite only)
+# WHY: Other databases use DatabaseSearchBackend,
+#      so this migration does nothing on MySQL / PostgreSQL
+# ============================================================
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS store_product_fts "
+        "USING fts5(name, category, description, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO store_product_fts (rowid, name, category, description) "
+        "SELECT p.id, p.name, c.name, p.description "
+        "FROM store_product p JOIN store_category c ON c.id = p.category_id"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS store_product_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
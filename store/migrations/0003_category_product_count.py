@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-17 07:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_available_products(apps, schema_editor):
+    Category = apps.get_model('store', 'Category')
+    Product = apps.get_model('store', 'Product')
+    available = (
+        Product.objects.filter(category=OuterRef('pk'), is_available=True)
+        .order_by()
+        .values('category')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Category.objects.update(product_count=Coalesce(Subquery(available), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_available_products, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-17 08:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_stockreservation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='billingaddress',
+            name='first_name',
+            field=models.CharField(db_index=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='billingaddress',
+            name='last_name',
+            field=models.CharField(db_index=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='name',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='vendor',
+            name='shop_name',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 6.0.2 on 2026-10-17 08:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('units', models.BigIntegerField(default=0)),
+                ('revenue', models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=16)),
+                ('date', models.DateField(unique=True)),
+                ('orders', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Sales Dashboard',
+                'verbose_name_plural': 'Sales Dashboard',
+            },
+        ),
+        migrations.CreateModel(
+            name='StatusSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=20, unique=True)),
+                ('orders', models.BigIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CategorySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('units', models.BigIntegerField(default=0)),
+                ('revenue', models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=16)),
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sales', to='store.category')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('units', models.BigIntegerField(default=0)),
+                ('revenue', models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=16)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sales', to='store.product')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='VendorSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('units', models.BigIntegerField(default=0)),
+                ('revenue', models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=16)),
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sales', to='store.vendor')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
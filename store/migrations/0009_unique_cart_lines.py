@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-17 08:25
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_lines(apps, schema_editor):
+    """Keeps the oldest row of each (user, product), with the summed quantity."""
+    Cart = apps.get_model('store', 'Cart')
+    duplicates = (
+        Cart.objects.order_by()
+        .values('user_id', 'product_id')
+        .annotate(lines=Count('id'), keep=Min('id'), quantity=Sum('quantity'))
+        .filter(lines__gt=1)
+    )
+    for line in list(duplicates):
+        Cart.objects.filter(pk=line['keep']).update(quantity=line['quantity'])
+        Cart.objects.filter(
+            user_id=line['user_id'], product_id=line['product_id'],
+        ).exclude(pk=line['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_lines, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='cart',
+            name='cart_user_product_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.UniqueConstraint(fields=('user', 'product'), name='unique_cart_line'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 6.0.2 on 2026-10-17 08:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def snapshot_existing_orders(apps, schema_editor):
+    Order = apps.get_model('store', 'Order')
+    OrderItem = apps.get_model('store', 'OrderItem')
+    Product = apps.get_model('store', 'Product')
+    OrderItem.objects.update(product_name=Coalesce(
+        Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('name')[:1]),
+        models.Value(''),
+    ))
+    units = (
+        OrderItem.objects.filter(order=OuterRef('pk'))
+        .order_by()
+        .values('order')
+        .annotate(total=Sum('quantity'))
+        .values('total')
+    )
+    Order.objects.update(item_count=Coalesce(Subquery(units), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_unique_cart_lines'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_name',
+            field=models.CharField(default='', max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='product',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.product'),
+        ),
+        migrations.RunPython(snapshot_existing_orders, migrations.RunPython.noop),
+    ]
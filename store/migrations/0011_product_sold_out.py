@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_order_history_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sold_out',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db import migrations
+
+
+# ============================================================
+# Case-insensitive indexes for the admin search boxes
+# WHY: '^field' = istartswith, '=field' = iexact. A plain
+#      b-tree index serves neither:
+#        SQLite      "col" LIKE 'term%'  → needs COLLATE NOCASE
+#        PostgreSQL  UPPER("col"::text) LIKE UPPER('term%')
+#                    → needs the UPPER() expression, with
+#                      text_pattern_ops for LIKE
+#        MySQL       case-insensitive collation: the plain
+#                    db_index already serves LIKE 'term%'
+# ============================================================
+SEARCH_COLUMNS = [
+    ('store', 'Product', 'name'),
+    ('store', 'Product', 'slug'),
+    ('store', 'Vendor', 'shop_name'),
+    ('store', 'BillingAddress', 'first_name'),
+    ('store', 'BillingAddress', 'last_name'),
+    # '^user__username' on orders, carts, profiles ...
+    ('auth', 'User', 'username'),
+]
+
+INDEX_SQL = {
+    'sqlite': 'CREATE INDEX IF NOT EXISTS {name} ON {table} ({column} COLLATE NOCASE)',
+    'postgresql': 'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+                  '(UPPER({column}::text) text_pattern_ops)',
+}
+
+
+def _indexes(apps, schema_editor):
+    quote = schema_editor.quote_name
+    for app_label, model_name, column in SEARCH_COLUMNS:
+        table = apps.get_model(app_label, model_name)._meta.db_table
+        yield quote(f'{table}_{column}_search'), quote(table), quote(column)
+
+
+def create_search_indexes(apps, schema_editor):
+    sql = INDEX_SQL.get(schema_editor.connection.vendor)
+    if sql is None:
+        return
+    for name, table, column in _indexes(apps, schema_editor):
+        schema_editor.execute(sql.format(name=name, table=table, column=column))
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in INDEX_SQL:
+        return
+    for name, _table, _column in _indexes(apps, schema_editor):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('store', '0011_product_sold_out'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-17 08:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def snapshot_sales_attribution(apps, schema_editor):
+    # Best guess for past orders: the product's current
+    # category / vendor (what the rollups used until now)
+    OrderItem = apps.get_model('store', 'OrderItem')
+    Product = apps.get_model('store', 'Product')
+    product = Product.objects.filter(pk=OuterRef('product_id'))
+    OrderItem.objects.filter(product__isnull=False).update(
+        category_id=Subquery(product.values('category_id')[:1]),
+        vendor_id=Subquery(product.values('vendor_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0012_admin_prefix_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='category',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='store.category'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='vendor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='store.vendor'),
+        ),
+        migrations.RunPython(snapshot_sales_attribution, migrations.RunPython.noop),
+    ]
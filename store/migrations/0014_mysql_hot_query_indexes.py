@@ -0,0 +1,52 @@
+from django.db import migrations, models
+
+
+# ============================================================
+# Hot-query indexes for MySQL (local development database)
+# WHY: MySQL has no partial indexes, so Django skips the
+#      condition=Q(is_available=True) indexes of migration 0008
+#      there. Same columns with is_available as a key column
+#      instead of a condition. PostgreSQL / SQLite keep the
+#      smaller partial indexes only.
+# ============================================================
+MYSQL_INDEXES = [
+    #  shop, no category: newest first (keyset cursor)
+    models.Index(fields=['is_available', '-created_at', '-id'],
+                 name='product_avail_newest_my_idx'),
+    #  shop by category + "same category" + category facet counts
+    models.Index(fields=['category', 'is_available', '-created_at', '-id'],
+                 name='product_cat_newest_my_idx'),
+    #  price quantiles / buckets / price range per category
+    models.Index(fields=['category', 'is_available', 'price'],
+                 name='product_cat_price_my_idx'),
+    #  index page: featured products
+    models.Index(fields=['is_featured', 'is_available', '-created_at'],
+                 name='product_featured_my_idx'),
+]
+
+
+def add_mysql_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    Product = apps.get_model('store', 'Product')
+    for index in MYSQL_INDEXES:
+        schema_editor.add_index(Product, index)
+
+
+def remove_mysql_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    Product = apps.get_model('store', 'Product')
+    for index in MYSQL_INDEXES:
+        schema_editor.remove_index(Product, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_orderitem_sales_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_mysql_indexes, remove_mysql_indexes),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def delete_empty_lines(apps, schema_editor):
+    # Left by add-to-cart posts with quantity 0 / negative
+    Cart = apps.get_model('store', 'Cart')
+    Cart.objects.filter(quantity=0).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0014_mysql_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_empty_lines, migrations.RunPython.noop),
+    ]
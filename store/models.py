@@ -24,7 +24,9 @@ OLD CODE PROBLEMS:
 ====================================================
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 # Using Django's built-in User model
 # OLD: Created custom User_SignupForm and admin_signupform
@@ -36,6 +38,31 @@ from django.contrib.auth.models import User
 # ============================================================
 # TABLE 1: CATEGORY
 # ============================================================
+class CategoryManager(models.Manager):
+
+    def adjust_product_counts(self, deltas):
+        """
+        deltas = {category_id: +1 / -1, ...}
+        Uses F() so concurrent saves never lose an update.
+        """
+        for category_id, delta in deltas.items():
+            if delta:
+                self.filter(pk=category_id).update(
+                    product_count=F('product_count') + delta
+                )
+
+    def recount_products(self):
+        """Recomputes every counter in ONE UPDATE statement."""
+        available = (
+            Product.objects.filter(category=OuterRef('pk'), is_available=True)
+            .order_by()
+            .values('category')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        return self.update(product_count=Coalesce(Subquery(available), 0))
+
+
 class Category(models.Model):
 
     # Added slug for SEO-friendly URLs like /category/electronics/
@@ -49,6 +76,16 @@ class Category(models.Model):
 
     description = models.TextField(blank=True)
 
+    #  Number of AVAILABLE products in this category
+    #  OLD: {{ category.products.count }} in templates
+    #       = one COUNT query per category on every page
+    #       (and it counted unavailable products too)
+    #  NEW: kept up to date on Product save/delete (signals.py)
+    #       Fix drift with: python manage.py recount_categories
+    product_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CategoryManager()
+
     class Meta:
         verbose_name = 'Category'
         verbose_name_plural = 'Categories'  #  Correct plural in admin panel
@@ -74,7 +111,8 @@ class Vendor(models.Model):
         related_name='vendor'
     )
 
-    shop_name = models.CharField(max_length=200)
+    #  Indexed: admin prefix search (^shop_name)
+    shop_name = models.CharField(max_length=200, db_index=True)
 
     #  Renamed to 'vendors/' consistent with other upload folders
     #  OLD: 'vendor_images/' — inconsistent naming
@@ -116,7 +154,8 @@ class Product(models.Model):
         null=True, blank=True
     )
 
-    name = models.CharField(max_length=200)
+    #  Indexed: admin prefix search (^name) — LIKE 'term%'
+    name = models.CharField(max_length=200, db_index=True)
 
     #  Slug for clean URLs like /product/iphone-15/
     #  OLD: No slug
@@ -145,6 +184,11 @@ class Product(models.Model):
     is_available = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
 
+    #  Set when the LAST unit was reserved (inventory.py hid it)
+    # WHY: Released stock only re-shows these — a product an
+    #      admin hid with is_available stays hidden
+    sold_out = models.BooleanField(default=False, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -152,10 +196,50 @@ class Product(models.Model):
         verbose_name = 'Product'
         verbose_name_plural = 'Products'
         ordering = ['-created_at']
+        #  Indexes for the storefront's hot filters
+        #  (checked by: python manage.py explain_hot_queries)
+        #  OLD: only single-column FK indexes → the database
+        #       filtered / sorted thousands of rows per request
+        #  Partial (WHERE is_available): the storefront never
+        #  reads unavailable products, so they stay out of the
+        #  index. Django renders filter(is_available=True) as
+        #  WHERE "is_available", which SQLite can only match to
+        #  a partial index. MySQL has no partial indexes →
+        #  Django skips them there; migration 0014 adds the same
+        #  columns with is_available as a key column instead.
+        indexes = [
+            #  shop, no category: newest first (keyset cursor)
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(is_available=True),
+                name='product_available_newest_idx'),
+            #  shop by category + "same category" top-up
+            #  + category facet counts
+            models.Index(
+                fields=['category', '-created_at', '-id'],
+                condition=models.Q(is_available=True),
+                name='product_category_newest_idx'),
+            #  price quantiles / buckets / price range per category
+            models.Index(
+                fields=['category', 'price'],
+                condition=models.Q(is_available=True),
+                name='product_category_price_idx'),
+            #  index page: featured products (a handful of rows)
+            models.Index(
+                fields=['-created_at'],
+                condition=models.Q(is_featured=True, is_available=True),
+                name='product_featured_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    #  Save + category counter update happen in ONE transaction
+    #  WHY: post_save handlers (signals.py) run inside this block
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     #  Helper method to check if product is on sale
     def is_on_sale(self):
         return self.discount_price is not None
@@ -200,6 +284,14 @@ class Cart(models.Model):
     class Meta:
         verbose_name = 'Cart Item'
         verbose_name_plural = 'Cart Items'
+        constraints = [
+            #  OLD: get_or_create + quantity += 1 → two fast clicks
+            #       made two rows for one product (or lost a click)
+            #  NEW: one line per product; cart_service upserts
+            #       against it. Also THE index for add_to_cart
+            models.UniqueConstraint(
+                fields=['user', 'product'], name='unique_cart_line'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} → {self.product.name}"
@@ -223,8 +315,9 @@ class BillingAddress(models.Model):
         related_name='billing_addresses'
     )
 
-    first_name = models.CharField(max_length=50)
-    last_name = models.CharField(max_length=50)
+    #  Indexed: admin prefix search (one address per order)
+    first_name = models.CharField(max_length=50, db_index=True)
+    last_name = models.CharField(max_length=50, db_index=True)
     email = models.EmailField()
     phone = models.CharField(max_length=15)
     address = models.CharField(max_length=255)
@@ -273,6 +366,11 @@ class Order(models.Model):
 
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
 
+    #  Units in the order, written once at checkout
+    # WHY: order lists show "3 items" without counting
+    #      OrderItem rows for every order on the page
+    item_count = models.PositiveIntegerField(default=0)
+
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -286,6 +384,10 @@ class Order(models.Model):
         verbose_name = 'Order'
         verbose_name_plural = 'Orders'
         ordering = ['-created_at']
+        indexes = [
+            #  profile: a user's latest orders, no sort step
+            models.Index(fields=['user', '-created_at'], name='order_user_newest_idx'),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} — {self.user.username}"
@@ -304,9 +406,35 @@ class OrderItem(models.Model):
         related_name='items'
     )
 
+    #  OLD: on_delete=CASCADE — deleting a product silently
+    #       removed it from every customer's order history
+    #  NEW: SET_NULL + product_name snapshot below
     product = models.ForeignKey(
         Product,
-        on_delete=models.CASCADE
+        on_delete=models.SET_NULL,
+        null=True
+    )
+
+    #  Product name at time of purchase (like price)
+    # WHY: order history renders without joining Product
+    #      and stays correct after a rename or delete
+    product_name = models.CharField(max_length=200, default='')
+
+    #  Category / vendor at time of purchase (sales rollups)
+    # WHY: a sale stays counted where it was made — moving the
+    #      product later must not move (or break) its old sales
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+'
+    )
+    vendor = models.ForeignKey(
+        Vendor,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
     )
 
     #  Store price at time of purchase
@@ -316,7 +444,7 @@ class OrderItem(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
 
     def __str__(self):
-        return f"{self.product.name} × {self.quantity}"
+        return f"{self.product_name} × {self.quantity}"
 
     def get_total(self):
         return self.price * self.quantity
@@ -352,4 +480,163 @@ class Profile(models.Model):
     date_of_birth = models.DateField(blank=True, null=True)
 
     def __str__(self):
-        return f"{self.user.username} Profile"
\ No newline at end of file
+        return f"{self.user.username} Profile"
+
+# ============================================================
+# TABLE 9: STOCK RESERVATION
+#  Time-limited hold on product stock during checkout
+#  OLD: Product.stock was never decremented — we oversold!
+#  NEW: Stock is taken off the product the moment it is held.
+#       The hold is either turned into an order (row deleted,
+#       stock stays taken) or it expires and the stock goes
+#       back on the shelf. See inventory.py
+# ============================================================
+class StockReservation(models.Model):
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='reservations'
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='stock_reservations',
+        null=True, blank=True
+    )
+
+    quantity = models.PositiveIntegerField()
+
+    #  Indexed — expired holds are found by this column
+    expires_at = models.DateTimeField(db_index=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Stock Reservation'
+        verbose_name_plural = 'Stock Reservations'
+
+    def __str__(self):
+        return f"{self.quantity} × {self.product_id} (until {self.expires_at})"
+
+
+# ============================================================
+# TABLES 10-14: SALES ROLLUPS
+#  OLD: No reporting — every revenue question aggregated the
+#       whole Order / OrderItem history on the fly
+#  NEW: Running totals, one row per day / product / category /
+#       vendor / order status. Incremented in the same
+#       transaction as the order (rollups.py), rebuilt with:
+#           python manage.py backfill_rollups
+#  Cancelled orders are left out of everything except the
+#  per-status table.
+# ============================================================
+class SalesRollup(models.Model):
+
+    units = models.BigIntegerField(default=0)
+
+    #  Indexed — dashboard shows the top N by revenue
+    revenue = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0, db_index=True)
+
+    class Meta:
+        abstract = True
+
+
+class DailySales(SalesRollup):
+
+    date = models.DateField(unique=True)
+    orders = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Sales Dashboard'
+        verbose_name_plural = 'Sales Dashboard'
+
+    def __str__(self):
+        return f"{self.date}: {self.revenue}"
+
+
+class ProductSales(SalesRollup):
+
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, related_name='sales')
+
+    def __str__(self):
+        return f"{self.product_id}: {self.units} units"
+
+
+class CategorySales(SalesRollup):
+
+    category = models.OneToOneField(
+        Category, on_delete=models.CASCADE, related_name='sales')
+
+    def __str__(self):
+        return f"{self.category_id}: {self.units} units"
+
+
+class VendorSales(SalesRollup):
+
+    vendor = models.OneToOneField(
+        Vendor, on_delete=models.CASCADE, related_name='sales')
+
+    def __str__(self):
+        return f"{self.vendor_id}: {self.units} units"
+
+
+class StatusSales(models.Model):
+
+    status = models.CharField(
+        max_length=20, choices=Order.STATUS_CHOICES, unique=True)
+    orders = models.BigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.status}: {self.orders}"
+
+
+# ============================================================
+# TABLE 15: PRODUCT RECOMMENDATION ("bought together")
+#  OLD: shop_details showed 4 arbitrary products from the
+#       same category, one query per page view
+#  NEW: Top products bought in the same orders, computed by
+#           python manage.py build_recommendations
+#       (copurchase.py). Pages read rank 1..N by product.
+# ============================================================
+class ProductRecommendation(models.Model):
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='recommendations'
+    )
+
+    recommended = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='recommended_for'
+    )
+
+    #  1 = best match
+    rank = models.PositiveSmallIntegerField()
+
+    #  Cosine similarity of the two products' order sets
+    score = models.FloatField()
+
+    #  Number of orders containing both
+    orders_together = models.PositiveIntegerField()
+
+    #  Start of the run that wrote the row (incremental refresh)
+    computed_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = 'Product Recommendation'
+        verbose_name_plural = 'Product Recommendations'
+        constraints = [
+            #  Also THE index for "recommendations of product X"
+            models.UniqueConstraint(
+                fields=['product', 'rank'], name='unique_recommendation_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} → {self.recommended_id} (#{self.rank})"
@@ -0,0 +1,194 @@
+"""
+====================================================
+MULTISHOP - Checkout Pipeline
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEMS:
+1. BillingAddress, Order and EVERY OrderItem were created
+   with separate objects.create() calls in a Python loop
+   100 cart lines = 100+ round trips to the database
+2. No transaction — a crash halfway left an Order
+   with missing items and a cart that was never cleared
+3. Cart lines were read twice (once for totals, once for items)
+
+NEW: place_order() does everything in ONE transaction:
+       1. read + lock cart lines once (product joined) — a
+          double-submitted checkout waits, then finds the
+          cart empty
+       2. hold the stock (inventory.py) — OutOfStockError
+          if any product ran out, nothing is written
+       3. snapshot prices, product names, category / vendor
+          + totals in the same pass (order history and sales
+          rollups never join Product)
+       4. insert billing address + order
+       5. bulk insert all order items
+       6. turn the stock hold into a sale + clear the cart
+       7. add the order to the sales rollups (rollups.py)
+     Round trips stay the same for 1 or 100 cart lines.
+
+     order_history() → a user's orders, newest first,
+     keyset-paginated, items in ONE prefetch query.
+====================================================
+"""
+
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Prefetch, Q
+
+from . import rollups
+from .cart_service import get_cart_lines, shipping_for
+from .catalog import decode_cursor, encode_cursor
+from .inventory import OutOfStockError, commit, hold_quantities
+from .models import BillingAddress, Cart, Order, OrderItem, Product
+
+
+ORDER_HISTORY_PAGE_SIZE = 10
+
+
+BILLING_FIELDS = [
+    'first_name', 'last_name', 'email', 'phone', 'address',
+    'city', 'state', 'pin_code', 'notes',
+]
+
+
+class EmptyCartError(Exception):
+    pass
+
+
+def billing_data_from(post):
+    return {field: post.get(field) for field in BILLING_FIELDS}
+
+
+def cart_quantities(lines):
+    quantities = Counter()
+    for line in lines:
+        quantities[line.product_id] += line.quantity
+    return quantities
+
+
+def hold_cart(user, lines=None):
+    """
+    Holds stock for the user's cart while they fill in checkout.
+    Pass the cart lines if the caller already read them.
+    """
+    if lines is None:
+        lines = get_cart_lines(user)
+    return hold_quantities(user, cart_quantities(lines))
+
+
+def place_order(user, billing_data):
+    """
+    Turns the user's cart into an Order.
+    Raises EmptyCartError if there is nothing to buy,
+    inventory.OutOfStockError if stock ran out.
+    """
+    with transaction.atomic():
+        # Only the cart rows: locking the joined products would
+        # queue every checkout of the same product behind this one
+        lines = list(get_cart_lines(user).select_for_update(of=('self',)))
+        if not lines:
+            raise EmptyCartError()
+
+        # Reuses the hold from the checkout page if cart is unchanged
+        holds = hold_quantities(user, cart_quantities(lines))
+
+        # One pass: price + name snapshot, subtotal, unit count
+        # WHY: Product price / name might change later,
+        #      OrderItem remembers what the customer bought
+        items = []
+        subtotal = Decimal('0')
+        item_count = 0
+        for line in lines:
+            price = line.product.get_price()
+            subtotal += price * line.quantity
+            item_count += line.quantity
+            items.append(OrderItem(
+                product=line.product,
+                product_name=line.product.name,
+                category_id=line.product.category_id,
+                vendor_id=line.product.vendor_id,
+                quantity=line.quantity,
+                price=price,
+            ))
+
+        billing = BillingAddress.objects.create(user=user, **billing_data)
+        order = Order.objects.create(
+            user=user,
+            billing_address=billing,
+            total_amount=subtotal + shipping_for(subtotal),
+            item_count=item_count,
+            status='pending',
+        )
+
+        for item in items:
+            item.order = order
+        OrderItem.objects.bulk_create(items)
+
+        if commit(holds) != len(holds):
+            # Another request turned these holds into its own sale
+            raise OutOfStockError(sorted({hold.product_id for hold in holds}))
+
+        Cart.objects.filter(pk__in=[line.pk for line in lines]).delete()
+
+        # Sales rollups, same transaction (rollups.py)
+        rollups.record_order(order, [
+            (item.product_id, item.category_id,
+             item.vendor_id, item.quantity, item.get_total())
+            for item in items
+        ])
+
+    return order
+
+
+# ============================================================
+# ORDER HISTORY
+#  OLD: profile showed the last 5 orders, no items — listing
+#       items meant order.items + item.product per order (N+1)
+#  NEW: keyset pages (same cursor as the shop) + items in one
+#       prefetch, names from the OrderItem snapshot
+# ============================================================
+class OrderHistoryPage:
+
+    def __init__(self, orders, next_cursor):
+        self.orders = orders
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def order_history(user, cursor=None, page_size=ORDER_HISTORY_PAGE_SIZE):
+    """
+    3 queries per page, however many orders / items:
+    orders, their items, slugs of products still in the shop
+    (product links only — deleted products keep their name).
+    """
+    orders = (
+        Order.objects.filter(user=user)
+        # (user, -created_at) index, id breaks ties
+        .order_by('-created_at', '-id')
+        .prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.order_by('id')),
+            Prefetch('items__product',
+                     queryset=Product.objects.only('id', 'slug')),
+        )
+    )
+    position = decode_cursor(cursor)
+    if position is not None:
+        created_at, pk = position
+        orders = orders.filter(
+            Q(created_at__lt=created_at) |
+            Q(created_at=created_at, id__lt=pk)
+        )
+
+    # One extra row = is there a next page, no COUNT
+    rows = list(orders[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1])
+    return OrderHistoryPage(rows, next_cursor)
@@ -0,0 +1,216 @@
+"""
+====================================================
+MULTISHOP - Anonymous Page Cache
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEM:
+  Most traffic is anonymous browsing of shop / shop_details,
+  and every hit rendered the template + queried the database
+
+NEW: @anonymous_page_cache on those views (opt-in with
+     settings.STORE_PAGE_CACHE_ENABLED)
+  - Only anonymous GET/HEAD without pending messages
+  - Key = view + catalog version + NORMALIZED query params
+      ?search=Phone&utm_source=x  and  ?search=phone
+      share one entry (unknown params are ignored)
+  - ETag (content hash) + Last-Modified (Product.updated_at)
+      → browsers revalidate and get 304 Not Modified
+  - Stale-while-revalidate: an expired entry is still served
+      while ONE request re-renders it, so expiry never
+      turns into a burst of slow renders
+  - CSRF tokens are swapped for a placeholder before storing
+      and a fresh token is put back for every visitor
+====================================================
+"""
+
+import hashlib
+import re
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+from .catalog import parse_page_size, parse_price
+from .catalog_cache import get_catalog_last_modified, get_catalog_version
+
+
+CSRF_PLACEHOLDER = b'__STORE_PAGE_CACHE_CSRF__'
+CSRF_INPUT_RE = re.compile(
+    rb'(name="csrfmiddlewaretoken" value=")[^"]+(")'
+)
+
+# How each cache-key parameter is normalized
+PARAM_NORMALIZERS = {
+    'category':  lambda value: value.strip().lower(),
+    'search':    lambda value: ' '.join(value.lower().split()),
+    'min_price': lambda value: _normalize_price(value),
+    'max_price': lambda value: _normalize_price(value),
+    'cursor':    lambda value: value.strip(),
+    'page_size': lambda value: str(parse_page_size(value)),
+}
+
+
+def _normalize_price(value):
+    price = parse_price(value)
+    return '' if price is None else f'{price.normalize():f}'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ============================================================
+# CACHE KEY
+# ============================================================
+def page_cache_key(name, request, params, view_kwargs):
+    parts = [f'{key}={value}' for key, value in sorted(view_kwargs.items())]
+    for param in sorted(params):
+        raw = request.GET.get(param, '')
+        value = PARAM_NORMALIZERS.get(param, str.strip)(raw)
+        if value:
+            parts.append(f'{param}={value}')
+    digest = hashlib.md5('&'.join(parts).encode()).hexdigest()
+    return f'store:page:{name}:v{get_catalog_version()}:{digest}'
+
+
+def _is_cacheable_request(request):
+    return (
+        _setting('STORE_PAGE_CACHE_ENABLED', False)
+        and request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and len(messages.get_messages(request)) == 0
+    )
+
+
+# ============================================================
+# STORE / SERVE
+# ============================================================
+def _build_entry(response):
+    content = CSRF_INPUT_RE.sub(
+        rb'\1' + CSRF_PLACEHOLDER + rb'\2', response.content)
+
+    last_modified = parse_http_date_safe(response.get('Last-Modified', ''))
+    if last_modified is None:
+        last_modified = get_catalog_last_modified()
+
+    fresh_for = _setting('STORE_PAGE_CACHE_TIMEOUT', 300)
+    return {
+        'content': content,
+        'content_type': response['Content-Type'],
+        'etag': '"%s"' % hashlib.md5(content).hexdigest(),
+        'last_modified': last_modified,
+        'fresh_until': time.time() + fresh_for,
+    }
+
+
+def _respond(request, entry, state):
+    content = entry['content']
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(
+            CSRF_PLACEHOLDER, get_token(request).encode())
+
+    response = HttpResponse(content, content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    if entry['last_modified']:
+        response['Last-Modified'] = http_date(entry['last_modified'])
+    response['Cache-Control'] = 'max-age=0, stale-while-revalidate=%d' % (
+        _setting('STORE_PAGE_CACHE_STALE_TIMEOUT', 60))
+    response['X-Page-Cache'] = state
+    # Logged-in users (session cookie) get a different page
+    patch_vary_headers(response, ['Cookie'])
+
+    return get_conditional_response(
+        request,
+        etag=entry['etag'],
+        last_modified=entry['last_modified'],
+        response=response,
+    )
+
+
+def _lookup(name, request, params, view_kwargs):
+    """
+    (key, entry, state) for a cacheable request, else None.
+    entry is None when the view has to render.
+    """
+    if not _is_cacheable_request(request):
+        return None
+
+    key = page_cache_key(name, request, params, view_kwargs)
+    entry = cache.get(key)
+    state = 'HIT'
+
+    if entry is not None and entry['fresh_until'] < time.time():
+        # Stale: only the request that wins the lock re-renders,
+        # everyone else keeps getting the stale copy
+        stale_for = _setting('STORE_PAGE_CACHE_STALE_TIMEOUT', 60)
+        if cache.add(f'{key}:refresh', 1, stale_for):
+            entry = None
+        else:
+            state = 'STALE'
+    return key, entry, state
+
+
+def _store(request, key, response):
+    """Caches a fresh render. Returns the entry, or None if uncacheable."""
+    if (response.status_code != 200
+            or getattr(response, 'streaming', False)
+            or len(messages.get_messages(request)) > 0):
+        return None
+    entry = _build_entry(response)
+    cache.set(key, entry,
+              _setting('STORE_PAGE_CACHE_TIMEOUT', 300)
+              + _setting('STORE_PAGE_CACHE_STALE_TIMEOUT', 60))
+    cache.delete(f'{key}:refresh')
+    return entry
+
+
+def anonymous_page_cache(name, params=()):
+    """
+    @anonymous_page_cache('shop', params=['category', 'search'])
+    Works on sync views and async views (async_views.py).
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                # request.user / messages may touch the session table,
+                # so the lookup runs in the sync thread
+                found = await sync_to_async(_lookup)(
+                    name, request, params, kwargs)
+                if found is None:
+                    return await view(request, *args, **kwargs)
+
+                key, entry, state = found
+                if entry is None:
+                    response = await view(request, *args, **kwargs)
+                    entry = await sync_to_async(_store)(request, key, response)
+                    if entry is None:
+                        return response
+                    state = 'MISS'
+                return _respond(request, entry, state)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            found = _lookup(name, request, params, kwargs)
+            if found is None:
+                return view(request, *args, **kwargs)
+
+            key, entry, state = found
+            if entry is None:
+                response = view(request, *args, **kwargs)
+                entry = _store(request, key, response)
+                if entry is None:
+                    return response
+                state = 'MISS'
+            return _respond(request, entry, state)
+        return wrapper
+    return decorator
@@ -0,0 +1,67 @@
+"""
+====================================================
+MULTISHOP - Estimated Count Paginator (admin)
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEM:
+  Every admin changelist page ran SELECT COUNT(*) over
+  the whole table. On millions of orders / cart rows
+  that is a full index scan on EVERY page view.
+
+NEW:
+  EstimatedCountPaginator → for an UNFILTERED big table
+  uses the row estimate the database already keeps:
+    MySQL       information_schema.TABLES.TABLE_ROWS
+    PostgreSQL  pg_class.reltuples
+  Filtered lists (search, list_filter) and small tables
+  still get an exact COUNT — the filter narrows the scan
+  and the number shown must be right.
+  SQLite has no estimate → always exact.
+====================================================
+"""
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+# Below this an exact COUNT is cheap enough
+ESTIMATE_THRESHOLD = 100_000
+
+
+def estimated_row_count(model, using='default'):
+    """Planner estimate of the table size, None when unknown."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT TABLE_ROWS FROM information_schema.TABLES '
+                'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+                [table])
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    # reltuples is -1 for a never analyzed table
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+
+    estimate_threshold = ESTIMATE_THRESHOLD
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if getattr(queryset, 'query', None) is not None and not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.estimate_threshold:
+                return estimate
+        return super().count
@@ -0,0 +1,148 @@
+"""
+====================================================
+MULTISHOP - Hot Query Plans
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEM:
+  Nothing noticed when a storefront query stopped using
+  its index (dropped index, changed filter, new ORDER BY)
+  — it just got slower as the tables grew.
+
+NEW:
+  HOT_QUERIES = the queries every page view runs, built
+  by the SAME functions the views call. full_scans()
+  EXPLAINs one and returns the tables it reads in full:
+    SQLite      EXPLAIN QUERY PLAN → "SCAN <table>"
+    PostgreSQL  EXPLAIN (FORMAT JSON) → "Seq Scan"
+                (enable_seqscan off: a small test table
+                 would be scanned anyway — we ask whether
+                 an index path EXISTS)
+    MySQL       EXPLAIN → type = ALL
+  ADMIN_SEARCHES = the admin changelist search boxes,
+  built by the ModelAdmins themselves.
+  Checked before deploy by:
+      python manage.py explain_hot_queries
+====================================================
+"""
+
+import json
+import re
+from decimal import Decimal
+
+from django.contrib import admin
+from django.db import connections, transaction
+
+from .cart_service import get_cart_lines
+from .catalog import CatalogQuery, price_tiles
+from .catalog_cache import featured_products
+from .models import (
+    BillingAddress, Cart, Order, OrderItem, Product, Profile, Vendor,
+)
+from .recommendations import recommended_products, same_category_products
+
+
+# Plans do not depend on the values, only on their shape
+SAMPLE_SLUG = 'sample'
+SAMPLE_ID = 1
+
+
+# (name, queryset factory)
+HOT_QUERIES = [
+    ('index: featured products', featured_products),
+    ('shop: newest page',
+     lambda: CatalogQuery()._keyset_queryset()),
+    ('shop: category page',
+     lambda: CatalogQuery(category=SAMPLE_SLUG)._keyset_queryset()),
+    ('shop: category + price range page',
+     lambda: CatalogQuery(category=SAMPLE_SLUG, min_price=Decimal('100'),
+                          max_price=Decimal('500'))._keyset_queryset()),
+    ('shop: category facet counts',
+     lambda: CatalogQuery()._category_counts()),
+    ('shop: price quantiles',
+     lambda: price_tiles(SAMPLE_SLUG)),
+    ('shop: price bucket counts',
+     lambda: CatalogQuery(category=SAMPLE_SLUG).filtered(
+         include_price=False).values('price')),
+    ('shop_details: product',
+     lambda: Product.objects.filter(slug=SAMPLE_SLUG)),
+    ('shop_details: bought together',
+     lambda: recommended_products(SAMPLE_SLUG)[:4]),
+    ('shop_details: same category',
+     lambda: same_category_products(SAMPLE_SLUG, [SAMPLE_ID])[:4]),
+    ('add_to_cart: existing line',
+     lambda: Cart.objects.filter(user_id=SAMPLE_ID, product_id=SAMPLE_ID)),
+    ('cart: lines',
+     lambda: get_cart_lines(SAMPLE_ID)),
+    ('profile: latest orders',
+     lambda: Order.objects.filter(user_id=SAMPLE_ID).order_by('-created_at')[:5]),
+]
+
+
+def admin_search(model, term=SAMPLE_SLUG):
+    """What the model's changelist runs for a search box term."""
+    model_admin = admin.site.get_model_admin(model)
+    queryset, _duplicates = model_admin.get_search_results(
+        None, model._default_manager.all(), term)
+    return queryset
+
+
+# Big tables with a search box (LargeTableAdmin)
+ADMIN_SEARCHES = [
+    (f'admin: {model._meta.verbose_name} search',
+     lambda model=model: admin_search(model))
+    for model in (Product, Vendor, Order, Cart, OrderItem,
+                  BillingAddress, Profile)
+]
+
+HOT_QUERIES += ADMIN_SEARCHES
+
+
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+
+def explain(queryset):
+    """Raw plan rows of a queryset (vendor specific)."""
+    connection = connections[queryset.db]
+    sql, params = queryset.query.sql_with_params()
+    with transaction.atomic(using=queryset.db), connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+        if connection.vendor == 'postgresql':
+            # SET LOCAL → gone when the transaction ends
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            return json.loads(plan) if isinstance(plan, str) else plan
+        cursor.execute(f'EXPLAIN {sql}', params)
+        columns = [column[0].lower() for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _pg_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from _pg_nodes(child)
+
+
+def full_scans(queryset):
+    """
+    (tables read in full, raw plan) — subqueries and derived
+    tables only count when they read a real table in full.
+    """
+    connection = connections[queryset.db]
+    tables = set(connection.introspection.table_names())
+    plan = explain(queryset)
+
+    if connection.vendor == 'sqlite':
+        scanned = [match.group(1) for match in map(SQLITE_SCAN.match, plan) if match]
+    elif connection.vendor == 'postgresql':
+        scanned = [
+            node.get('Relation Name')
+            for entry in plan for node in _pg_nodes(entry['Plan'])
+            if node['Node Type'] == 'Seq Scan'
+        ]
+    else:
+        scanned = [row.get('table') for row in plan if row.get('type') == 'ALL']
+    return sorted({table for table in scanned if table in tables}), plan
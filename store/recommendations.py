@@ -0,0 +1,63 @@
+"""
+====================================================
+MULTISHOP - Product Recommendations (read side)
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEM:
+  Product.objects.filter(category=...).exclude(id=...)[:4]
+  → whatever 4 products the database returned first.
+
+NEW:
+  related_products(slug) → "frequently bought together"
+    1. ProductRecommendation rows, best rank first
+       (precomputed by build_recommendations, copurchase.py)
+    2. topped up from the same category when a product has
+       fewer (new products, no orders yet)
+  Both lookups work from the slug, so the async view can
+  run them alongside the product query.
+====================================================
+"""
+
+from .models import Product
+
+
+RELATED_PRODUCTS_LIMIT = 4
+
+
+def recommended_products(slug):
+    return (
+        Product.objects
+        .filter(recommended_for__product__slug=slug, is_available=True)
+        .order_by('recommended_for__rank')
+    )
+
+
+def same_category_products(slug, exclude_ids=()):
+    return (
+        Product.objects
+        .filter(category__products__slug=slug, is_available=True)
+        .exclude(slug=slug)
+        .exclude(pk__in=list(exclude_ids))
+    )
+
+
+def related_products(slug, limit=RELATED_PRODUCTS_LIMIT):
+    related = list(recommended_products(slug)[:limit])
+    if len(related) < limit:
+        related += same_category_products(
+            slug, [product.pk for product in related])[:limit - len(related)]
+    return related
+
+
+async def arelated_products(slug, limit=RELATED_PRODUCTS_LIMIT):
+    related = [
+        product async for product in recommended_products(slug)[:limit]
+    ]
+    if len(related) < limit:
+        related += [
+            product async for product in same_category_products(
+                slug, [product.pk for product in related]
+            )[:limit - len(related)]
+        ]
+    return related
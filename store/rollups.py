@@ -0,0 +1,235 @@
+"""
+====================================================
+MULTISHOP - Sales Rollups
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEM:
+  "Revenue this month?" / "best selling products?"
+  = SUM over the whole Order + OrderItem history,
+  slower with every order ever placed.
+
+NEW:
+  Running totals in the rollup tables (models.py):
+    DailySales     date     → orders, units, revenue
+    ProductSales   product  → units, revenue
+    CategorySales  category → units, revenue
+    VendorSales    vendor   → units, revenue
+    StatusSales    status   → orders, revenue
+
+  Kept up to date INCREMENTALLY, inside the order's own
+  transaction:
+    place_order()            → record_order(order, lines)
+    status change (signals)  → record_status_change()
+    order deleted (signals)  → record_order(order, sign=-1)
+  Each table takes ONE upsert statement per order:
+    INSERT ... ON CONFLICT (key) DO UPDATE
+        SET units = units + excluded.units
+  (ON DUPLICATE KEY UPDATE on MySQL) — no read, no lock
+  held longer than the order transaction itself.
+
+  Cancelled orders only count in StatusSales.
+  Category / vendor = the product's at the time of sale
+  (OrderItem snapshot): a cancellation subtracts from the
+  rows the sale was added to, even after the product moved.
+
+  Drift (e.g. queryset.update(status=...) skips signals):
+    python manage.py backfill_rollups
+====================================================
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (
+    CategorySales, DailySales, OrderItem, ProductSales, StatusSales,
+    VendorSales,
+)
+
+
+NOT_COUNTED_STATUSES = {'cancelled'}
+
+# Rows per INSERT (backfill batches can touch thousands of keys)
+UPSERT_CHUNK_SIZE = 1000
+
+
+def counts_as_sale(status):
+    return status not in NOT_COUNTED_STATUSES
+
+
+def sales_date(moment):
+    """Day an order belongs to (site timezone)."""
+    if isinstance(moment, datetime) and timezone.is_aware(moment):
+        return timezone.localdate(moment)
+    return moment.date() if isinstance(moment, datetime) else moment
+
+
+# ============================================================
+# UPSERT: key → field += delta, one statement per table
+# ============================================================
+def increment(model, key, rows):
+    """
+    rows = {key value: {field: delta}}
+    Missing keys are inserted with the delta as value.
+    """
+    rows = {
+        value: deltas for value, deltas in rows.items()
+        if value is not None and any(deltas.values())
+    }
+    if not rows:
+        return
+    fields = sorted({field for deltas in rows.values() for field in deltas})
+    connection = connections[router.db_for_write(model)]
+
+    if connection.vendor not in ('postgresql', 'sqlite', 'mysql'):
+        for value, deltas in rows.items():
+            _increment_orm(model, key, value, deltas)
+        return
+
+    quote = connection.ops.quote_name
+    opts = model._meta
+    table = quote(opts.db_table)
+    key_field = opts.get_field(key)
+    model_fields = [opts.get_field(field) for field in fields]
+    key_column = quote(key_field.column)
+    columns = [quote(field.column) for field in model_fields]
+
+    if connection.vendor == 'mysql':
+        updates = ', '.join(f'{c} = {c} + VALUES({c})' for c in columns)
+        conflict = f'ON DUPLICATE KEY UPDATE {updates}'
+    else:
+        updates = ', '.join(f'{c} = {table}.{c} + EXCLUDED.{c}' for c in columns)
+        conflict = f'ON CONFLICT ({key_column}) DO UPDATE SET {updates}'
+    placeholders = '(' + ', '.join(['%s'] * (len(fields) + 1)) + ')'
+
+    items = iter(rows.items())
+    with connection.cursor() as cursor:
+        while chunk := list(islice(items, UPSERT_CHUNK_SIZE)):
+            params = []
+            for value, deltas in chunk:
+                params.append(key_field.get_db_prep_value(value, connection))
+                params.extend(
+                    field.get_db_prep_value(deltas.get(field.name, 0), connection)
+                    for field in model_fields)
+            cursor.execute(
+                f'INSERT INTO {table} ({key_column}, {", ".join(columns)}) '
+                f'VALUES {", ".join([placeholders] * len(chunk))} {conflict}',
+                params)
+
+
+def _increment_orm(model, key, value, deltas):
+    updated = model.objects.filter(**{key: value}).update(
+        **{field: F(field) + delta for field, delta in deltas.items()})
+    if not updated:
+        model.objects.create(**{key: value}, **deltas)
+
+
+# ============================================================
+# ORDER → DELTAS
+# ============================================================
+def order_lines(order):
+    """(product_id, category_id, vendor_id, quantity, line_total) per item"""
+    return [
+        (product_id, category_id, vendor_id, quantity, price * quantity)
+        for product_id, category_id, vendor_id, quantity, price in
+        OrderItem.objects.filter(order=order).values_list(
+            'product_id', 'category_id', 'vendor_id', 'quantity', 'price')
+    ]
+
+
+def _record_sales(order, lines, sign):
+    """Day / product / category / vendor totals for one order."""
+    products, categories, vendors = (
+        defaultdict(lambda: defaultdict(int)) for _ in range(3))
+    units_total = 0
+    for product_id, category_id, vendor_id, quantity, line_total in lines:
+        units_total += quantity
+        for table, value in ((products, product_id),
+                             (categories, category_id),
+                             (vendors, vendor_id)):
+            table[value]['units'] += sign * quantity
+            table[value]['revenue'] += sign * line_total
+
+    increment(DailySales, 'date', {sales_date(order.created_at): {
+        'orders': sign, 'units': sign * units_total,
+        'revenue': sign * order.total_amount,
+    }})
+    increment(ProductSales, 'product', products)
+    increment(CategorySales, 'category', categories)
+    increment(VendorSales, 'vendor', vendors)
+
+
+def record_order(order, lines=None, sign=1):
+    """
+    Adds (sign=1) or removes (sign=-1) an order from every rollup.
+    `lines` as returned by order_lines(); read from the
+    database when not given.
+    """
+    # No savepoint: callers are usually inside the order's transaction
+    with transaction.atomic(savepoint=False):
+        increment(StatusSales, 'status', {order.status: {
+            'orders': sign, 'revenue': sign * order.total_amount}})
+        if counts_as_sale(order.status):
+            if lines is None:
+                lines = order_lines(order)
+            _record_sales(order, lines, sign)
+
+
+def record_status_change(order, old_status):
+    if old_status == order.status:
+        return
+    # No savepoint: callers are usually inside the order's transaction
+    with transaction.atomic(savepoint=False):
+        increment(StatusSales, 'status', {
+            old_status: {'orders': -1, 'revenue': -order.total_amount},
+            order.status: {'orders': 1, 'revenue': order.total_amount},
+        })
+        # Cancelled ↔ not cancelled moves the sale in or out
+        was_sale, is_sale = counts_as_sale(old_status), counts_as_sale(order.status)
+        if was_sale != is_sale:
+            _record_sales(order, order_lines(order), 1 if is_sale else -1)
+
+
+# ============================================================
+# DASHBOARD READS (rollup tables only)
+# ============================================================
+def dashboard(days=30, top=10):
+    """
+    Everything the admin dashboard shows. A fixed number of
+    indexed reads on small tables, whatever the order history.
+    """
+    today = timezone.localdate()
+    first_day = today - timedelta(days=days - 1)
+    by_date = {
+        row.date: row for row in
+        DailySales.objects.filter(date__gte=first_day, date__lte=today)
+    }
+    daily = [
+        by_date.get(day) or DailySales(date=day)
+        for day in (first_day + timedelta(days=n) for n in range(days))
+    ]
+    statuses = list(StatusSales.objects.order_by('status'))
+    return {
+        'daily': daily,
+        'period_revenue': sum((row.revenue for row in daily), Decimal('0')),
+        'period_orders': sum(row.orders for row in daily),
+        'period_units': sum(row.units for row in daily),
+        'max_daily_revenue': max((row.revenue for row in daily), default=0),
+        'statuses': statuses,
+        'lifetime_orders': sum(row.orders for row in statuses),
+        'top_products': list(
+            ProductSales.objects.select_related('product')
+            .order_by('-revenue')[:top]),
+        'top_categories': list(
+            CategorySales.objects.select_related('category')
+            .order_by('-revenue')[:top]),
+        'top_vendors': list(
+            VendorSales.objects.select_related('vendor')
+            .order_by('-revenue')[:top]),
+    }
@@ -0,0 +1,240 @@
+"""
+====================================================
+MULTISHOP - Product Search Backends
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEMS:
+1. name__icontains = LIKE '%q%' → full table scan every search
+2. Only matched product NAME (not description / category)
+3. No ranking — results came back in random-ish order
+
+NEW: Pluggable backends with one small interface:
+       index_product(product)   → called on product save
+       remove_product(id)       → called on product delete
+       rebuild(batch_size)      → bulk (re)index everything
+       search(query, limit, products)
+                                → ranked list of product ids,
+                                  only among `products` (the
+                                  shop filters) — the limit
+                                  applies AFTER the filters
+       match_condition(query)   → Q for EVERY match, unranked
+                                  and unlimited (counts / facets)
+
+     settings.STORE_SEARCH_BACKEND picks the backend.
+     Leave it empty to use FTS5 on SQLite and the plain
+     database backend everywhere else.
+====================================================
+"""
+
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Product
+
+
+# Storefront never shows more than this many matches
+SEARCH_RESULT_LIMIT = 500
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    return TOKEN_RE.findall((query or '').lower())
+
+
+# ============================================================
+# BASE BACKEND
+# ============================================================
+class BaseSearchBackend:
+
+    def index_product(self, product):
+        pass
+
+    def index_products(self, products):
+        for product in products:
+            self.index_product(product)
+
+    def remove_product(self, product_id):
+        pass
+
+    def rebuild(self, batch_size=1000):
+        """Returns number of products indexed."""
+        return 0
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT, products=None):
+        raise NotImplementedError
+
+    def match_condition(self, query):
+        raise NotImplementedError
+
+
+# ============================================================
+# DATABASE BACKEND (works on every database, no index)
+# WHY: Fallback for MySQL/PostgreSQL until a dedicated
+#      engine is plugged in. Still matches all three fields
+#      and ranks name > category > description.
+# ============================================================
+class DatabaseSearchBackend(BaseSearchBackend):
+
+    def _conditions(self, query):
+        """(every token matches, score expression)"""
+        matches = Q()
+        score = Value(0)
+        for token in tokenize(query):
+            in_name = Q(name__icontains=token)
+            in_category = Q(category__name__icontains=token)
+            in_description = Q(description__icontains=token)
+            matches &= in_name | in_category | in_description
+            score = (
+                score
+                + Case(When(in_name, then=10), default=0)
+                + Case(When(in_category, then=5), default=0)
+                + Case(When(in_description, then=1), default=0)
+            )
+        return matches, score
+
+    def match_condition(self, query):
+        if not tokenize(query):
+            return Q(pk__in=[])
+        return self._conditions(query)[0]
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT, products=None):
+        if not tokenize(query):
+            return []
+        matches, score = self._conditions(query)
+        if products is None:
+            products = Product.objects.all()
+
+        return list(
+            products.filter(matches)
+            .annotate(score=score)
+            .order_by('-score', '-created_at')
+            .values_list('id', flat=True)[:limit]
+        )
+
+
+# ============================================================
+# SQLITE FTS5 BACKEND
+# Virtual table is created by migration 0002.
+# rowid of the FTS row = Product.id
+# ============================================================
+class SQLiteFTS5Backend(BaseSearchBackend):
+
+    table = 'store_product_fts'
+
+    # bm25 column weights: name, category, description
+    weights = (10.0, 5.0, 1.0)
+
+    def _row(self, product):
+        return (product.pk, product.name, product.category.name,
+                product.description)
+
+    def _write_rows(self, cursor, rows, replace=True):
+        if replace:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(row[0],) for row in rows]
+            )
+        cursor.executemany(
+            f'INSERT INTO {self.table} (rowid, name, category, description) '
+            f'VALUES (%s, %s, %s, %s)',
+            rows
+        )
+
+    def index_product(self, product):
+        with connection.cursor() as cursor:
+            self._write_rows(cursor, [self._row(product)])
+
+    def index_products(self, products, batch_size=1000):
+        with connection.cursor() as cursor:
+            batch = []
+            for product in products:
+                batch.append(self._row(product))
+                if len(batch) >= batch_size:
+                    self._write_rows(cursor, batch)
+                    batch = []
+            if batch:
+                self._write_rows(cursor, batch)
+
+    def remove_product(self, product_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [product_id]
+            )
+
+    def rebuild(self, batch_size=1000):
+        products = (
+            Product.objects.select_related('category')
+            .only('id', 'name', 'description', 'category__name')
+            .order_by('id')
+        )
+        indexed = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            batch = []
+            for product in products.iterator(chunk_size=batch_size):
+                batch.append(self._row(product))
+                if len(batch) >= batch_size:
+                    self._write_rows(cursor, batch, replace=False)
+                    indexed += len(batch)
+                    batch = []
+            if batch:
+                self._write_rows(cursor, batch, replace=False)
+                indexed += len(batch)
+            # Merge index segments so lookups stay fast
+            cursor.execute(
+                f"INSERT INTO {self.table}({self.table}) VALUES ('optimize')"
+            )
+        return indexed
+
+    def match_expression(self, query):
+        # Every token quoted (no FTS syntax injection) + prefix match
+        return ' '.join(f'"{token}"*' for token in tokenize(query))
+
+    def match_condition(self, query):
+        expression = self.match_expression(query)
+        if not expression:
+            return Q(pk__in=[])
+        return Q(id__in=RawSQL(
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s',
+            [expression],
+        ))
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT, products=None):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        weights = ', '.join(str(weight) for weight in self.weights)
+        where, params = f'{self.table} MATCH %s', [expression]
+        if products is not None:
+            # Filters inside the FTS query, BEFORE the LIMIT
+            sql, filter_params = products.order_by().values('id').query.sql_with_params()
+            where += f' AND rowid IN ({sql})'
+            params.extend(filter_params)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} WHERE {where} '
+                f'ORDER BY bm25({self.table}, {weights}) LIMIT %s',
+                params + [limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+# ============================================================
+# BACKEND LOOKUP
+# ============================================================
+@lru_cache(maxsize=None)
+def get_search_backend():
+    path = getattr(settings, 'STORE_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTS5Backend()
+    return DatabaseSearchBackend()
@@ -0,0 +1,186 @@
+"""
+====================================================
+MULTISHOP - Model Signals
+Author  : Adarsh Pathak
+====================================================
+Keeps derived data (search index, category product
+counters, cart summaries, catalog cache version,
+image derivatives, sales rollups, ...) in sync with
+model changes.
+Connected in ProductsConfig.ready() (apps.py)
+====================================================
+"""
+
+import logging
+from collections import Counter
+
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from .cart_service import invalidate_cart
+from .catalog_cache import bump_catalog_version_on_commit
+from .images import generate_for_image
+from . import rollups
+from .models import Cart, Category, Order, Product, Profile, Vendor
+from .search import get_search_backend
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# SEARCH INDEX
+# WHY: Index is updated one row at a time on every change,
+#      so we never need a full rebuild in normal operation
+# ============================================================
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    get_search_backend().index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    get_search_backend().remove_product(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created=False, raw=False,
+                              **kwargs):
+    # Category name is part of every product's search row
+    if raw or created:
+        return
+    products = instance.products.select_related('category').only(
+        'id', 'name', 'description', 'category__name'
+    )
+    get_search_backend().index_products(products.iterator(chunk_size=1000))
+
+
+# ============================================================
+# CATEGORY PRODUCT COUNTERS
+# Product.save() is atomic, so the counter update commits
+# (or rolls back) together with the product row
+# ============================================================
+@receiver(pre_save, sender=Product)
+def remember_counted_state(sender, instance, raw=False, **kwargs):
+    instance._counted_state = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._counted_state = (
+        Product.objects.filter(pk=instance.pk)
+        .values_list('category_id', 'is_available')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Product)
+def update_category_counts(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = Counter()
+    old_state = getattr(instance, '_counted_state', None)
+    if old_state and old_state[1]:
+        deltas[old_state[0]] -= 1
+    if instance.is_available:
+        deltas[instance.category_id] += 1
+    Category.objects.adjust_product_counts(deltas)
+
+
+@receiver(post_delete, sender=Product)
+def decrement_category_count(sender, instance, **kwargs):
+    if instance.is_available:
+        Category.objects.adjust_product_counts({instance.category_id: -1})
+
+
+# ============================================================
+# CART SUMMARY CACHE
+# WHY: Summary is cached per user (cart_service.py).
+#      Any change to a cart line — or to the price of a product
+#      sitting in someone's cart — must drop that cache entry
+# ============================================================
+@receiver(post_save, sender=Cart)
+@receiver(post_delete, sender=Cart)
+def invalidate_cart_summary(sender, instance, **kwargs):
+    invalidate_cart(instance.user_id)
+
+
+@receiver(post_save, sender=Product)
+def invalidate_carts_with_product(sender, instance, created=False, raw=False,
+                                  **kwargs):
+    if raw or created:
+        return
+    user_ids = set(
+        Cart.objects.filter(product=instance).values_list('user_id', flat=True)
+    )
+    if user_ids:
+        invalidate_cart(*user_ids)
+
+
+# ============================================================
+# SALES ROLLUPS (rollups.py)
+# New orders are recorded by place_order() itself (the items
+# do not exist yet when Order's post_save fires). Here: status
+# changes (admin) and deleted orders.
+# ============================================================
+@receiver(pre_save, sender=Order)
+def remember_order_status(sender, instance, raw=False, **kwargs):
+    instance._rollup_status = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._rollup_status = (
+        Order.objects.filter(pk=instance.pk)
+        .values_list('status', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Order)
+def update_status_rollups(sender, instance, created=False, raw=False,
+                          **kwargs):
+    old_status = getattr(instance, '_rollup_status', None)
+    if raw or created or old_status is None:
+        return
+    rollups.record_status_change(instance, old_status)
+
+
+@receiver(pre_delete, sender=Order)
+def remove_order_from_rollups(sender, instance, **kwargs):
+    # pre_delete: the items are still there to be subtracted
+    rollups.record_order(instance, sign=-1)
+
+
+# ============================================================
+# CATALOG CACHE VERSION
+# WHY: Every cached catalog section is keyed by this version
+#      (catalog_cache.py), so one bump invalidates them all
+# ============================================================
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_catalog_version(sender, raw=False, **kwargs):
+    if raw:
+        return
+    bump_catalog_version_on_commit()
+
+
+# ============================================================
+# RESPONSIVE IMAGE DERIVATIVES
+# WHY: Resized WebP/JPEG copies are written when the image
+#      is saved, so page renders never resize anything
+# ============================================================
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Vendor)
+@receiver(post_save, sender=Profile)
+def create_image_derivatives(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        generate_for_image(instance.image)
+    except (OSError, ValueError):
+        # Broken / non-image upload: keep serving the original
+        logger.warning('Could not create derivatives for %s',
+                       instance.image.name, exc_info=True)
@@ -0,0 +1,48 @@
+"""
+====================================================
+MULTISHOP - Responsive Image Template Tag
+====================================================
+Usage:
+    {% load store_images %}
+    {% responsive_image product.image product.name sizes="33vw" class="card-img-top" %}
+
+Renders:
+    <picture>
+      <source type="image/webp" srcset="...-320w.webp 320w, ...">
+      <img src="original.jpg" srcset="...-320w.jpg 320w, ..." ...>
+    </picture>
+
+Falls back to a plain <img> when no derivatives exist yet.
+====================================================
+"""
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from store.images import srcset
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', **attributes):
+    if not image:
+        return ''
+
+    extra = format_html_join(
+        '', ' {}="{}"',
+        ((name.replace('_', '-'), value) for name, value in attributes.items())
+    )
+
+    jpeg_srcset = srcset(image.name, 'jpeg')
+    if not jpeg_srcset:
+        return format_html(
+            '<img src="{}" alt="{}" loading="lazy"{}>', image.url, alt, extra)
+
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="lazy"{}>'
+        '</picture>',
+        srcset(image.name, 'webp'), sizes,
+        image.url, jpeg_srcset, sizes, alt, extra,
+    )
@@ -1,3 +1,1915 @@
-from django.test import TestCase
+from collections import Counter
+import base64
+import csv
+from decimal import Decimal
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+import json
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.core.management import CommandError, call_command
+from django.db import (
+    IntegrityError, OperationalError, close_old_connections, connection,
+    connections, transaction,
+)
+from django.db.models import QuerySet
+from django.http import Http404, HttpResponse, QueryDict
+from django.test import (
+    AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase,
+    TransactionTestCase, override_settings,
+)
+from django.utils import timezone
+from django.urls import get_resolver, reverse
+
+from .cart_service import (
+    CART_COOKIE_NAME, MAX_LINE_QUANTITY, DatabaseCart, get_cart_summary,
+    summary_cache_key,
+)
+from .catalog import CatalogQuery, decode_cursor, encode_cursor, round_price
+from .catalog_cache import (
+    CATALOG_VERSION_KEY, aget_index_categories, get_catalog_version,
+    get_featured_products,
+)
+from .db_router import (
+    PIN_COOKIE_NAME, PrimaryPinningMiddleware, ReplicaRouter, pinning_scope,
+)
+from . import async_views, copurchase, inventory
+from .exports import export_rows
+from .images import derivative_name, pick_derivative
+from .instrumentation import QueryRecorder, fingerprint
+from .management.commands.import_products import unique_slugs
+from .models import (
+    BillingAddress, Cart, Category, CategorySales, DailySales, Order,
+    OrderItem, Product, ProductRecommendation, ProductSales, Profile,
+    StatusSales, StockReservation, Vendor, VendorSales,
+)
+from .orders import EmptyCartError, hold_cart, order_history, place_order
+from .page_cache import page_cache_key
+from .query_plans import ADMIN_SEARCHES, full_scans
+from .throttle import (
+    LOGIN_PER_IP, LOGIN_PER_USERNAME, SIGNUP_PER_IP, TokenBucket, client_ip,
+)
+from .warmup import warm_up
+from .search import SEARCH_RESULT_LIMIT, DatabaseSearchBackend, get_search_backend
+
+
+# ============================================================
+# TEST DATA HELPERS
+# ============================================================
+def make_category(name, **extra):
+    return Category.objects.create(name=name, slug=name.lower(), **extra)
+
+
+def make_product(category, name, price='100.00', **extra):
+    extra.setdefault('image', 'products/test.jpg')
+    extra.setdefault('stock', 100)
+    extra.setdefault('description', f'{name} description')
+    return Product.objects.create(
+        category=category,
+        name=name,
+        slug=name.lower().replace(' ', '-'),
+        price=Decimal(price),
+        **extra
+    )
+
+
+# ============================================================
+# CATALOG QUERY ENGINE
+# ============================================================
+class CatalogQueryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.phones = make_category('Phones')
+        cls.books = make_category('Books')
+        for i in range(7):
+            make_product(cls.phones, f'Phone {i}', price=f'{200 * (i + 1)}.00')
+        for i in range(3):
+            make_product(cls.books, f'Book {i}', price='250.00')
+        make_product(cls.books, 'Hidden Book', is_available=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_keyset_pages_cover_catalog_once(self):
+        seen = []
+        cursor = None
+        while True:
+            page = CatalogQuery(cursor=cursor, page_size=4).page()
+            seen.extend(p.pk for p in page.products)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        expected = list(
+            Product.objects.filter(is_available=True)
+            .order_by('-created_at', '-id').values_list('pk', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_page_is_bounded_query_count(self):
+        with self.assertNumQueries(1):
+            CatalogQuery(page_size=5).page()
+        # price quantiles + price aggregate + category GROUP BY + category list
+        with self.assertNumQueries(4):
+            CatalogQuery(category='phones').facets()
+        # Price facets cached for this filter combination
+        with self.assertNumQueries(2):
+            CatalogQuery(category='phones').facets()
+
+    def test_facets_respect_filters(self):
+        facets = CatalogQuery(
+            category='phones', max_price=Decimal('600')
+        ).facets()
+        self.assertEqual(facets['total'], 3)
+
+        counts = {c.slug: c.facet_count for c in facets['categories']}
+        # Category facets ignore the selected category
+        self.assertEqual(counts, {'books': 3, 'phones': 3})
+        # Price buckets ignore the price filter
+        self.assertEqual(sum(b['count'] for b in facets['price_buckets']), 7)
+
+    def test_price_buckets_follow_category_quantiles(self):
+        # Phones 200..1400 → NTILE(5) groups start at 200/600/1000/1200/1400
+        _total, buckets = CatalogQuery(category='phones').price_facets()
+        self.assertEqual(
+            [(b['label'], b['count']) for b in buckets],
+            [('Under ₹600', 2), ('₹600 - ₹1,000', 2), ('₹1,000 - ₹1,200', 1),
+             ('₹1,200 - ₹1,400', 1), ('₹1,400 & above', 1)])
+
+        # Every book costs the same → one bucket
+        _total, buckets = CatalogQuery(category='books').price_facets()
+        self.assertEqual([(b['label'], b['count']) for b in buckets],
+                         [('All prices', 3)])
+        self.assertEqual(round_price(Decimal('1234.50')), Decimal('1200'))
+        self.assertEqual(round_price(Decimal('4.57')), Decimal('4.5'))
+
+    def test_invalid_cursor_and_prices_are_ignored(self):
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+        huge = base64.urlsafe_b64encode(
+            f'2024-01-01T00:00:00+00:00|{2 ** 64}'.encode()).decode()
+        self.assertIsNone(decode_cursor(huge))
+        response = self.client.get(reverse('store:shop'), {'cursor': huge})
+        self.assertEqual(response.status_code, 200)
+        query = CatalogQuery.from_request(
+            {'cursor': '!!', 'min_price': 'abc', 'page_size': '9999'}
+        )
+        self.assertIsNone(query.min_price)
+        self.assertEqual(query.page_size, 96)
+        self.assertEqual(len(query.page().products), 10)
+
+    def test_cursor_round_trip(self):
+        product = Product.objects.first()
+        created_at, pk = decode_cursor(encode_cursor(product))
+        self.assertEqual((created_at, pk), (product.created_at, product.pk))
+
+    def test_shop_view_paginates(self):
+        response = self.client.get(reverse('store:shop'), {'page_size': 4})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['products']), 4)
+        self.assertEqual(response.context['filtered_total'], 10)
+        self.assertIn('cursor=', response.context['next_query'])
+
+    def test_first_page_link_keeps_filters(self):
+        params = {'page_size': 4, 'min_price': '10', 'search': 'phone'}
+        response = self.client.get(reverse('store:shop'), dict(params, cursor='abc'))
+        first = QueryDict(response.context['first_query'])
+        self.assertNotIn('cursor', first)
+        self.assertEqual(first.dict(), {k: str(v) for k, v in params.items()})
+
+
+# ============================================================
+# PRODUCT SEARCH
+# ============================================================
+class SearchBackendTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.audio = make_category('Audio')
+        cls.desc_hit = make_product(
+            cls.audio, 'Cable', description='Works with any headphone jack')
+        cls.name_hit = make_product(cls.audio, 'Wireless Headphones')
+        cls.other = make_product(make_category('Kitchen'), 'Kettle')
+
+    def test_ranks_name_before_description(self):
+        ids = get_search_backend().search('headphone')
+        self.assertEqual(ids, [self.name_hit.pk, self.desc_hit.pk])
+
+    def test_matches_category_name(self):
+        self.assertEqual(get_search_backend().search('kitch'), [self.other.pk])
+
+    def test_index_follows_save_and_delete(self):
+        backend = get_search_backend()
+        self.other.name = 'Espresso Machine'
+        self.other.save()
+        self.assertEqual(backend.search('espresso'), [self.other.pk])
+
+        self.other.delete()
+        self.assertEqual(backend.search('espresso'), [])
+
+        self.audio.name = 'Sound'
+        self.audio.save()
+        self.assertEqual(len(backend.search('sound')), 2)
+
+    def test_rebuild_command(self):
+        call_command('rebuild_search_index', batch_size=2, stdout=StringIO())
+        self.assertEqual(len(get_search_backend().search('headphone')), 2)
+
+    def test_database_backend_matches_all_fields(self):
+        ids = DatabaseSearchBackend().search('headphone')
+        self.assertEqual(ids, [self.name_hit.pk, self.desc_hit.pk])
+
+    def test_filters_apply_before_the_result_limit(self):
+        # 510 better-ranked matches outside the selected category
+        Product.objects.bulk_create([
+            Product(category=self.other.category, name=f'Headphone {i}',
+                    slug=f'headphone-{i}', price=Decimal('10.00'),
+                    image='products/test.jpg', description='x')
+            for i in range(SEARCH_RESULT_LIMIT + 10)
+        ])
+        get_search_backend().rebuild()
+
+        audio_only = Product.objects.filter(category=self.audio)
+        for backend in (get_search_backend(), DatabaseSearchBackend()):
+            self.assertEqual(
+                backend.search('headphone', products=audio_only),
+                [self.name_hit.pk, self.desc_hit.pk])
+
+        response = self.client.get(reverse('store:shop'),
+                                   {'search': 'headphone', 'category': 'audio'})
+        self.assertEqual([p.pk for p in response.context['products']],
+                         [self.name_hit.pk, self.desc_hit.pk])
+        self.assertEqual(response.context['filtered_total'], 2)
+
+        # Counts are not capped at the limit
+        response = self.client.get(reverse('store:shop'), {'search': 'headphone'})
+        self.assertEqual(response.context['filtered_total'], SEARCH_RESULT_LIMIT + 12)
+
+    def test_shop_search_is_ranked(self):
+        response = self.client.get(reverse('store:shop'), {'search': 'headphone'})
+        products = response.context['products']
+        self.assertEqual([p.pk for p in products],
+                         [self.name_hit.pk, self.desc_hit.pk])
+
+
+# ============================================================
+# CATEGORY PRODUCT COUNTERS
+# ============================================================
+class CategoryCounterTests(TestCase):
+
+    def setUp(self):
+        self.phones = make_category('Phones')
+        self.books = make_category('Books')
+
+    def counts(self):
+        return dict(Category.objects.values_list('slug', 'product_count'))
+
+    def test_counter_follows_create_update_delete(self):
+        phone = make_product(self.phones, 'Phone')
+        make_product(self.phones, 'Old Phone', is_available=False)
+        self.assertEqual(self.counts(), {'phones': 1, 'books': 0})
+
+        phone.category = self.books
+        phone.save()
+        self.assertEqual(self.counts(), {'phones': 0, 'books': 1})
+
+        phone.is_available = False
+        phone.save()
+        self.assertEqual(self.counts(), {'phones': 0, 'books': 0})
+
+        phone.is_available = True
+        phone.save()
+        phone.delete()
+        self.assertEqual(self.counts(), {'phones': 0, 'books': 0})
+
+    def test_recount_command_repairs_drift(self):
+        make_product(self.phones, 'Phone')
+        Category.objects.update(product_count=42)
+        call_command('recount_categories', stdout=StringIO())
+        self.assertEqual(self.counts(), {'phones': 1, 'books': 0})
+
+    def test_index_has_no_per_category_count_queries(self):
+        for i in range(5):
+            make_product(make_category(f'Extra{i}'), f'Item {i}')
+        cache.clear()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('store:index'))
+        self.assertContains(response, '1 Products')
+
+
+# ============================================================
+# CART SUMMARY SERVICE
+# ============================================================
+class CartSummaryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='secret-pass-1')
+        category = make_category('Phones')
+        cls.phone = make_product(category, 'Phone', price='300.00')
+        cls.case = make_product(category, 'Case', price='80.00',
+                                discount_price=Decimal('60.00'))
+
+    def setUp(self):
+        cache.clear()
+        Cart.objects.create(user=self.user, product=self.phone, quantity=1)
+        Cart.objects.create(user=self.user, product=self.case, quantity=2)
+        self.client.force_login(self.user)
+
+    def test_summary_uses_one_query_then_cache(self):
+        with self.assertNumQueries(1):
+            summary = get_cart_summary(self.user)
+        self.assertEqual((summary.count, summary.quantity), (2, 3))
+        self.assertEqual(summary.subtotal, Decimal('420.00'))
+        self.assertEqual(summary.shipping, Decimal('50'))
+        self.assertEqual(summary.total, Decimal('470.00'))
+
+        with self.assertNumQueries(0):
+            get_cart_summary(self.user)
+
+    def test_cart_changes_invalidate_summary(self):
+        get_cart_summary(self.user)
+        self.client.post(reverse('store:add_to_cart', args=[self.phone.pk]),
+                         {'quantity': 1})
+        self.assertEqual(get_cart_summary(self.user).subtotal, Decimal('720.00'))
+        self.assertEqual(get_cart_summary(self.user).shipping, Decimal('0'))
+
+        self.phone.price = Decimal('100.00')
+        self.phone.save()
+        self.assertEqual(get_cart_summary(self.user).subtotal, Decimal('320.00'))
+
+    def test_cart_page_has_no_per_line_queries(self):
+        self.client.get(reverse('store:cart'))
+        with self.assertNumQueries(4):
+            # session + user + cart lines + summary (header reuses it)
+            response = self.client.get(reverse('store:cart'))
+        self.assertEqual(response.context['total'], Decimal('470.00'))
+
+    def test_buyer_facing_totals_skip_the_cache(self):
+        # Stale copy, e.g. left by a worker that missed an invalidation
+        cache.set(summary_cache_key(self.user.pk),
+                  {'count': 1, 'quantity': 1, 'subtotal': Decimal('1.00')})
+        response = self.client.get(reverse('store:cart'))
+        self.assertEqual(response.context['total'], Decimal('470.00'))
+        response = self.client.get(reverse('store:checkout'))
+        self.assertEqual(response.context['total'], Decimal('470.00'))
+        # ...and the header copy is refreshed on the way
+        self.assertEqual(get_cart_summary(self.user).subtotal, Decimal('420.00'))
+
+    def test_add_is_an_atomic_upsert(self):
+        cart = DatabaseCart(self.user)
+        self.assertFalse(cart.add(self.phone, 2))
+        self.assertEqual(Cart.objects.get(product=self.phone).quantity, 3)
+
+        # Another click inserts the line between our UPDATE and INSERT
+        Cart.objects.filter(product=self.phone).delete()
+        original = DatabaseCart._increment
+        misses = []
+
+        def racing(cart, lines, delta):
+            if not misses:
+                misses.append(delta)
+                Cart.objects.create(user=self.user, product=self.phone, quantity=1)
+                return 0
+            return original(cart, lines, delta)
+
+        with mock.patch.object(DatabaseCart, '_increment', racing):
+            self.assertFalse(cart.add(self.phone, 2))
+        self.assertEqual(Cart.objects.get(product=self.phone).quantity, 3)
+
+    def test_add_rejects_bad_quantities(self):
+        url = reverse('store:add_to_cart', args=[self.phone.pk])
+        for quantity in ['0', '-2', 'abc', '100']:
+            response = self.client.post(url, {'quantity': quantity})
+            self.assertRedirects(
+                response, reverse('store:shop_details', args=[self.phone.slug]),
+                fetch_redirect_response=False)
+        self.assertEqual(Cart.objects.get(product=self.phone).quantity, 1)
+
+        with self.assertRaises(ValueError):
+            DatabaseCart(self.user).add(self.case, 0)
+        self.assertEqual(Cart.objects.get(product=self.case).quantity, 2)
+
+    def test_batch_update_applies_changes_together(self):
+        phone_line = Cart.objects.get(product=self.phone)
+        case_line = Cart.objects.get(product=self.case)
+        stranger = User.objects.create_user('stranger')
+        foreign = Cart.objects.create(user=stranger, product=self.phone)
+
+        response = self.client.post(
+            reverse('store:update_cart_batch'),
+            json.dumps({'changes': {
+                phone_line.pk: 3, case_line.pk: -5, foreign.pk: 4}}),
+            content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        state = response.json()
+        self.assertEqual(state['lines'], {
+            str(phone_line.pk): {'quantity': 4, 'total': '1200.00'}})
+        self.assertEqual(state['removed'], sorted([case_line.pk, foreign.pk]))
+        self.assertEqual((state['count'], state['total']), (1, '1200.00'))
+        self.assertFalse(Cart.objects.filter(pk=case_line.pk).exists())
+        self.assertEqual(Cart.objects.get(pk=foreign.pk).quantity, 1)
+
+        response = self.client.post(reverse('store:update_cart_batch'),
+                                    'nope', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+# ============================================================
+# ANONYMOUS COOKIE CART
+# ============================================================
+class AnonymousCartTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='secret-pass-1')
+        category = make_category('Phones')
+        cls.phone = make_product(category, 'Phone', price='300.00')
+        cls.case = make_product(category, 'Case', price='80.00')
+
+    def setUp(self):
+        cache.clear()
+
+    def add(self, product, quantity=1):
+        return self.client.post(
+            reverse('store:add_to_cart', args=[product.pk]),
+            {'quantity': quantity})
+
+    def test_browsing_cart_writes_nothing_to_database(self):
+        self.add(self.phone)
+        with self.assertNumQueries(1):
+            # product lookup only, the cart is the cookie
+            self.add(self.case, 2)
+        self.assertFalse(Cart.objects.exists())
+
+        response = self.client.get(reverse('store:cart'))
+        self.assertEqual(response.context['subtotal'], Decimal('460.00'))
+        self.assertEqual(
+            [line.id for line in response.context['cart_items']],
+            [self.phone.pk, self.case.pk])
+
+        self.client.post(reverse('store:update_cart', args=[self.case.pk]),
+                         {'action': 'decrease'})
+        self.client.get(reverse('store:remove_from_cart', args=[self.phone.pk]))
+        response = self.client.get(reverse('store:cart'))
+        self.assertEqual(response.context['subtotal'], Decimal('80.00'))
+
+    def test_batch_update_cookie_cart(self):
+        self.add(self.phone)
+        self.add(self.case, 2)
+        response = self.client.post(
+            reverse('store:update_cart_batch'),
+            json.dumps({'changes': {self.phone.pk: 2, self.case.pk: -2}}),
+            content_type='application/json')
+        self.assertEqual(response.json()['removed'], [self.case.pk])
+        self.assertEqual(response.json()['subtotal'], '900.00')
+        self.assertEqual(
+            self.client.get(reverse('store:cart')).context['subtotal'],
+            Decimal('900.00'))
+
+    def test_tampered_cookie_is_ignored(self):
+        self.add(self.phone)
+        self.client.cookies[CART_COOKIE_NAME] = f'{self.case.pk}:5:forged'
+        response = self.client.get(reverse('store:cart'))
+        self.assertEqual(list(response.context['cart_items']), [])
+
+    def test_login_merges_cookie_cart_in_bulk(self):
+        Cart.objects.create(user=self.user, product=self.phone, quantity=1)
+        self.add(self.phone, 2)
+        self.add(self.case, 1)
+
+        response = self.client.post(reverse('store:login'), {
+            'username': 'buyer', 'password': 'secret-pass-1'})
+        self.assertEqual(response.cookies[CART_COOKIE_NAME].value, '')
+        self.assertEqual(
+            dict(Cart.objects.filter(user=self.user)
+                 .values_list('product_id', 'quantity')),
+            {self.phone.pk: 3, self.case.pk: 1})
+        self.assertEqual(get_cart_summary(self.user).quantity, 4)
+
+    def test_merge_adds_to_lines_written_meanwhile(self):
+        self.add(self.phone, 2)
+        self.add(self.case, 90)
+        Cart.objects.create(user=self.user, product=self.case, quantity=50)
+        original = QuerySet.values_list
+
+        def racing(queryset, *fields, **kwargs):
+            rows = list(original(queryset, *fields, **kwargs))
+            if queryset.model is Cart and not Cart.objects.filter(
+                    product=self.phone).exists():
+                # A click inserts the phone line right after the merge
+                # read the user's lines → the merge INSERT conflicts
+                Cart.objects.create(user=self.user, product=self.phone, quantity=1)
+            return rows
+
+        with mock.patch.object(QuerySet, 'values_list', racing):
+            self.client.post(reverse('store:login'), {
+                'username': 'buyer', 'password': 'secret-pass-1'})
+        self.assertEqual(
+            dict(Cart.objects.filter(user=self.user)
+                 .values_list('product_id', 'quantity')),
+            {self.phone.pk: 3, self.case.pk: MAX_LINE_QUANTITY})
+
+    def test_database_cart_lines_are_capped(self):
+        cart = DatabaseCart(self.user)
+        self.assertTrue(cart.add(self.phone, 60))
+        self.assertFalse(cart.add(self.phone, 60))
+        self.assertEqual(Cart.objects.get().quantity, MAX_LINE_QUANTITY)
+
+
+# ============================================================
+# CHECKOUT PIPELINE
+# ============================================================
+BILLING = {
+    'first_name': 'Asha', 'last_name': 'Rao', 'email': 'asha@example.com',
+    'phone': '9999999999', 'address': '12 MG Road', 'city': 'Pune',
+    'state': 'MH', 'pin_code': '411001', 'notes': '',
+}
+
+
+class CheckoutPipelineTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='secret-pass-1')
+        category = make_category('Phones')
+        cls.products = [
+            make_product(category, f'Phone {i}', price='100.00')
+            for i in range(10)
+        ]
+
+    def fill_cart(self, count):
+        Cart.objects.bulk_create([
+            Cart(user=self.user, product=product, quantity=2)
+            for product in self.products[:count]
+        ])
+
+    def test_order_snapshots_prices_and_clears_cart(self):
+        self.fill_cart(3)
+        order = place_order(self.user, BILLING)
+
+        self.assertEqual(order.total_amount, Decimal('600.00'))
+        self.assertEqual(order.items.count(), 3)
+        self.assertEqual(order.item_count, 6)
+        self.assertEqual(
+            sorted(order.items.values_list('product_name', flat=True)),
+            ['Phone 0', 'Phone 1', 'Phone 2'])
+        self.assertEqual(order.billing_address.city, 'Pune')
+        self.assertFalse(Cart.objects.filter(user=self.user).exists())
+
+    def test_round_trips_do_not_grow_with_cart_size(self):
+        # 19 + one rollup upsert per table (no vendor on these products)
+        self.fill_cart(1)
+        with self.assertNumQueries(23):
+            place_order(self.user, BILLING)
+        self.fill_cart(10)
+        with self.assertNumQueries(23):
+            place_order(self.user, BILLING)
+
+    def test_failure_rolls_back_everything(self):
+        self.fill_cart(2)
+        with mock.patch.object(OrderItem.objects, 'bulk_create',
+                               side_effect=RuntimeError('db down')):
+            with self.assertRaises(RuntimeError):
+                place_order(self.user, BILLING)
+
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(Cart.objects.filter(user=self.user).count(), 2)
+
+    def test_empty_cart(self):
+        with self.assertRaises(EmptyCartError):
+            place_order(self.user, BILLING)
+
+    def test_double_submit_does_not_write_a_second_order(self):
+        self.fill_cart(2)
+        stale = hold_cart(self.user)
+        place_order(self.user, BILLING)
+
+        # Second submit read the cart + holds before the first committed
+        self.fill_cart(2)
+        with mock.patch('store.orders.hold_quantities', return_value=stale):
+            with self.assertRaises(inventory.OutOfStockError):
+                place_order(self.user, BILLING)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Cart.objects.filter(user=self.user).count(), 2)
+
+
+# ============================================================
+# INVENTORY RESERVATIONS
+# ============================================================
+class InventoryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='secret-pass-1')
+        cls.category = make_category('Phones')
+
+    def test_reserve_is_all_or_nothing(self):
+        plenty = make_product(self.category, 'Plenty', stock=10)
+        scarce = make_product(self.category, 'Scarce', stock=1)
+
+        with self.assertRaises(inventory.OutOfStockError) as caught:
+            inventory.reserve(self.user, {plenty.pk: 2, scarce.pk: 2})
+        self.assertEqual(caught.exception.product_ids, [scarce.pk])
+
+        plenty.refresh_from_db()
+        self.assertEqual(plenty.stock, 10)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_sold_out_product_becomes_unavailable_and_comes_back(self):
+        product = make_product(self.category, 'Last One', stock=1)
+        holds = inventory.reserve(self.user, {product.pk: 1})
+
+        product.refresh_from_db()
+        self.assertEqual((product.stock, product.is_available), (0, False))
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.product_count, 0)
+
+        inventory.release(holds)
+        product.refresh_from_db()
+        self.assertEqual((product.stock, product.is_available), (1, True))
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.product_count, 1)
+
+    def test_release_keeps_admin_hidden_products_hidden(self):
+        hidden = make_product(self.category, 'Hidden', stock=5, is_available=False)
+        sold = make_product(self.category, 'Sold', stock=1)
+        holds = inventory.reserve(self.user, {hidden.pk: 1, sold.pk: 1})
+        # Admin restocks + re-enables the sold-out product by hand
+        admin = User.objects.create_superuser('boss', 'b@example.com', 'secret-pass-1')
+        self.client.force_login(admin)
+        self.client.post(reverse('admin:store_product_change', args=[sold.pk]), {
+            'category': self.category.pk, 'name': 'Sold', 'slug': 'sold',
+            'description': 'x', 'price': '100.00', 'stock': 3, 'is_available': 'on',
+        })
+        sold.refresh_from_db()
+        self.assertEqual((sold.is_available, sold.sold_out), (True, False))
+
+        inventory.release(holds)
+        hidden.refresh_from_db()
+        self.assertEqual((hidden.stock, hidden.is_available), (5, False))
+
+    def test_releasing_the_same_holds_twice_restores_stock_once(self):
+        product = make_product(self.category, 'Phone', stock=5)
+        holds = inventory.reserve(self.user, {product.pk: 2})
+
+        # Two requests of the same user, each holding its own copy
+        self.assertEqual(inventory.release(holds), 1)
+        self.assertEqual(inventory.release(holds), 0)
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 5)
+
+        holds = inventory.hold_quantities(self.user, {product.pk: 2})
+        inventory.release(holds)
+        inventory.hold_quantities(self.user, {product.pk: 3})
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 2)
+        self.assertEqual(StockReservation.objects.get().quantity, 3)
+
+    def test_expired_holds_are_released_on_demand(self):
+        product = make_product(self.category, 'Hot Item', stock=1)
+        inventory.reserve(self.user, {product.pk: 1}, ttl=timedelta(0))
+
+        # Stock is "gone" but the hold already expired
+        other = User.objects.create_user('other')
+        inventory.reserve(other, {product.pk: 1})
+        self.assertEqual(
+            list(StockReservation.objects.values_list('user', flat=True)),
+            [other.pk])
+
+    def test_checkout_decrements_stock(self):
+        product = make_product(self.category, 'Phone', stock=5)
+        Cart.objects.create(user=self.user, product=product, quantity=3)
+        place_order(self.user, BILLING)
+
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 2)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_checkout_without_ids_from_bulk_insert(self):
+        # Like MySQL: bulk_create() leaves pk unset
+        product = make_product(self.category, 'Phone', stock=5)
+        Cart.objects.create(user=self.user, product=product, quantity=3)
+        with mock.patch.object(type(connection.features),
+                               'can_return_rows_from_bulk_insert', False):
+            holds = inventory.hold_quantities(self.user, {product.pk: 3})
+            self.assertTrue(all(hold.pk for hold in holds))
+            place_order(self.user, BILLING)
+
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 2)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_checkout_page_holds_stock_then_order_reuses_hold(self):
+        product = make_product(self.category, 'Phone', stock=5)
+        Cart.objects.create(user=self.user, product=product, quantity=2)
+        self.client.force_login(self.user)
+
+        self.client.get(reverse('store:checkout'))
+        self.client.get(reverse('store:checkout'))
+        self.assertEqual(StockReservation.objects.count(), 1)
+
+        self.client.post(reverse('store:checkout'), BILLING)
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 3)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class InventoryStressTests(TransactionTestCase):
+    """Hundreds of buyers race for the same SKU."""
+
+    BUYERS = 200
+    STOCK = 37
+    THREADS = 16
+
+    def test_no_oversell_under_concurrent_checkouts(self):
+        product = make_product(make_category('Sale'), 'Deal', stock=self.STOCK)
+        users = [User(username=f'racer{i}') for i in range(self.BUYERS)]
+        User.objects.bulk_create(users)
+        users = list(User.objects.filter(username__startswith='racer'))
+        Cart.objects.bulk_create([
+            Cart(user=user, product=product, quantity=1) for user in users
+        ])
+
+        start = threading.Barrier(self.THREADS)
+        results = Counter()
+        lock = threading.Lock()
+        pending = list(users)
+
+        def buyer():
+            start.wait()
+            try:
+                while True:
+                    with lock:
+                        if not pending:
+                            return
+                        user = pending.pop()
+                    while True:
+                        try:
+                            place_order(user, BILLING)
+                            outcome = 'sold'
+                        except inventory.OutOfStockError:
+                            outcome = 'out'
+                        except OperationalError:
+                            # SQLite "database is locked": back off, retry
+                            time.sleep(0.002)
+                            continue
+                        break
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=buyer) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        product.refresh_from_db()
+        self.assertEqual(results['sold'], self.STOCK)
+        self.assertEqual(results['out'], self.BUYERS - self.STOCK)
+        self.assertEqual(product.stock, 0)
+        self.assertFalse(product.is_available)
+        self.assertEqual(OrderItem.objects.filter(product=product).count(),
+                         self.STOCK)
+
+
+# ============================================================
+# CATALOG FRAGMENT CACHE
+# ============================================================
+class CatalogCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.category = make_category('Phones')
+        self.product = make_product(self.category, 'Phone', is_featured=True)
+
+    def test_hot_index_skips_database(self):
+        self.client.get(reverse('store:index'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('store:index'))
+        self.assertContains(response, 'Phone')
+
+    def test_product_and_category_changes_are_visible_immediately(self):
+        self.client.get(reverse('store:index'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Renamed Phone'
+            self.product.save()
+        self.assertContains(self.client.get(reverse('store:index')),
+                            'Renamed Phone')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_category('Laptops')
+        self.assertContains(self.client.get(reverse('store:index')), 'Laptops')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.delete()
+        self.assertNotContains(self.client.get(reverse('store:index')),
+                               'Renamed Phone')
+
+    def test_version_survives_cache_loss(self):
+        version = get_catalog_version()
+        cache.delete(CATALOG_VERSION_KEY)
+        self.assertNotEqual(get_catalog_version(), version)
+
+    @override_settings(STORE_CATALOG_VERSION_TIMEOUT=30)
+    def test_per_process_version_expires(self):
+        # Another worker's bump never reaches this cache: the
+        # version must expire on its own
+        version = get_catalog_version()
+        later = time.time() + 31
+        with mock.patch('django.core.cache.backends.locmem.time.time',
+                        return_value=later):
+            self.assertNotEqual(get_catalog_version(), version)
+
+
+# ============================================================
+# ANONYMOUS PAGE CACHE
+# ============================================================
+@override_settings(STORE_PAGE_CACHE_ENABLED=True)
+class PageCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.product = make_product(make_category('Phones'), 'Phone')
+        self.details_url = reverse('store:shop_details', args=[self.product.slug])
+
+    def test_hit_skips_database_and_params_are_normalized(self):
+        first = self.client.get(reverse('store:shop'),
+                                {'search': 'Phone', 'utm_source': 'ad'})
+        self.assertEqual(first['X-Page-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('store:shop'), {'search': ' phone '})
+        self.assertEqual(second['X-Page-Cache'], 'HIT')
+        self.assertEqual(first.content, second.content)
+
+    def test_conditional_get_returns_304(self):
+        response = self.client.get(self.details_url)
+        self.assertTrue(response['ETag'])
+        self.assertTrue(response['Last-Modified'])
+
+        by_etag = self.client.get(self.details_url,
+                                  HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(by_etag.status_code, 304)
+
+        by_date = self.client.get(
+            self.details_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(by_date.status_code, 304)
+
+    def test_each_visitor_gets_own_csrf_token(self):
+        self.client.get(self.details_url)
+        other = self.client_class(enforce_csrf_checks=True)
+        response = other.get(self.details_url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertNotIn(b'__STORE_PAGE_CACHE_CSRF__', response.content)
+        self.assertIn('csrftoken', response.cookies)
+
+    def test_stale_entry_served_while_one_request_refreshes(self):
+        self.client.get(self.details_url)
+        key = page_cache_key('shop_details', RequestFactory().get('/'), [],
+                             {'slug': self.product.slug})
+        entry = cache.get(key)
+        entry['fresh_until'] = 0
+        cache.set(key, entry)
+
+        self.assertEqual(self.client.get(self.details_url)['X-Page-Cache'], 'MISS')
+        entry['fresh_until'] = 0
+        cache.set(key, entry)
+        cache.add(f'{key}:refresh', 1)
+        self.assertEqual(self.client.get(self.details_url)['X-Page-Cache'], 'STALE')
+
+    def test_logged_in_users_bypass_cache(self):
+        user = User.objects.create_user('buyer')
+        self.client.force_login(user)
+        response = self.client.get(self.details_url)
+        self.assertNotIn('X-Page-Cache', response)
+
+
+# ============================================================
+# ASYNC CATALOG VIEWS (ASGI)
+# ============================================================
+def async_get(path, **params):
+    request = AsyncRequestFactory().get(path, params)
+    request.user = AnonymousUser()
+    return request
+
+
+class AsyncViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.phones = make_category('Phones')
+        cls.phone = make_product(cls.phones, 'Phone', is_featured=True)
+        cls.other = make_product(cls.phones, 'Other Phone', price='900.00')
+        make_product(make_category('Books'), 'Book', price='20.00')
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_shop_matches_sync_view(self):
+        params = {'category': 'phones', 'page_size': 1}
+        response = await async_views.shop(async_get('/shop/', **params))
+        sync_context = (await sync_to_async(self.client.get)(
+            reverse('store:shop'), params)).context
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, sync_context['products'][0].name)
+        self.assertContains(
+            response, f'<strong>{sync_context["filtered_total"]}</strong> products')
+
+        query = CatalogQuery(category='phones', page_size=1)
+        page, facets = await query.apage_and_facets()
+        self.assertEqual(
+            [p.pk for p in page.products],
+            [p.pk for p in sync_context['products']])
+        self.assertEqual(page.next_cursor, sync_context['page'].next_cursor)
+        self.assertEqual(facets['total'], sync_context['filtered_total'])
+        self.assertEqual(
+            [b['count'] for b in facets['price_buckets']],
+            [b['count'] for b in sync_context['price_buckets']])
+
+    async def test_search_page(self):
+        query = CatalogQuery(search='phone')
+        page, facets = await query.apage_and_facets()
+        self.assertEqual({p.pk for p in page.products},
+                         {self.phone.pk, self.other.pk})
+        self.assertEqual(facets['total'], 2)
+
+    async def test_shop_details_and_related_products(self):
+        response = await async_views.shop_details(
+            async_get('/product/phone/'), slug='phone')
+        self.assertContains(response, 'Other Phone')
+        self.assertTrue(response['Last-Modified'])
+
+        with self.assertRaises(Http404):
+            await async_views.shop_details(
+                async_get('/product/nope/'), slug='nope')
+
+    async def test_index_uses_catalog_cache(self):
+        await async_views.index(async_get('/'))
+        categories = await aget_index_categories()
+        self.assertEqual({c.name for c in categories}, {'Phones', 'Books'})
+        self.assertEqual(
+            [p.pk for p in await sync_to_async(get_featured_products)()],
+            [self.phone.pk])
+
+    @override_settings(STORE_PAGE_CACHE_ENABLED=True)
+    async def test_page_cache_wraps_async_view(self):
+        first = await async_views.shop(async_get('/shop/'))
+        second = await async_views.shop(async_get('/shop/'))
+        self.assertEqual(first['X-Page-Cache'], 'MISS')
+        self.assertEqual(second['X-Page-Cache'], 'HIT')
+
+
+# ============================================================
+# READ REPLICA ROUTER
+# ============================================================
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.router.replicas = ['replica_1']
+        self.enterContext(pinning_scope())
+
+    def test_catalog_reads_go_to_replica(self):
+        self.assertEqual(self.router.db_for_read(Product), 'replica_1')
+        self.assertEqual(self.router.db_for_read(Category), 'replica_1')
+        self.assertEqual(self.router.db_for_read(Cart), 'default')
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        self.assertEqual(self.router.db_for_write(Product), 'default')
+
+    def test_reads_after_write_or_in_transaction_use_primary(self):
+        with mock.patch.object(connections['default'], 'in_atomic_block', True):
+            self.assertEqual(self.router.db_for_read(Product), 'default')
+
+        self.router.db_for_write(Cart)
+        self.assertEqual(self.router.db_for_read(Product), 'default')
+
+    def test_no_replicas_means_default(self):
+        self.router.replicas = []
+        self.assertEqual(self.router.db_for_read(Product), 'default')
+        self.assertFalse(self.router.allow_migrate('replica_1', 'store'))
+
+    def test_middleware_pins_following_requests_after_write(self):
+        router = self.router
+        seen = []
+
+        def view(request):
+            seen.append(router.db_for_read(Product))
+            if request.method == 'POST':
+                router.db_for_write(Cart)
+            return HttpResponse()
+
+        middleware = PrimaryPinningMiddleware(view)
+        factory = RequestFactory()
+        with mock.patch('store.db_router.replica_aliases',
+                        return_value=['replica_1']):
+            browse = middleware(factory.get('/shop/'))
+            write = middleware(factory.post('/add-to-cart/1/'))
+            pinned = factory.get('/cart/')
+            pinned.COOKIES[PIN_COOKIE_NAME] = '1'
+            after = middleware(pinned)
+
+        self.assertEqual(seen, ['replica_1', 'default', 'default'])
+        self.assertNotIn(PIN_COOKIE_NAME, browse.cookies)
+        self.assertIn(PIN_COOKIE_NAME, write.cookies)
+        # Reading while pinned does not extend the pin
+        self.assertNotIn(PIN_COOKIE_NAME, after.cookies)
+        self.assertEqual(router.db_for_read(Product), 'replica_1')
+
+
+# ============================================================
+# QUERY BUDGETS (every URL in store/urls.py)
+# WHY: an N+1 shows up as a budget failure + the repeated
+#      query shape, before it reaches production
+# ============================================================
+# (url name, method, logged in, max queries)
+QUERY_BUDGETS = [
+    ('index',            'GET',  False, 2),
+    ('index',            'GET',  True,  5),
+    ('shop',             'GET',  False, 5),  # + price quantiles (cold cache)
+    ('shop_details',     'GET',  False, 4),  # + category top-up
+    ('contact',          'GET',  False, 0),
+    ('cart',             'GET',  False, 0),
+    ('cart',             'GET',  True,  4),
+    ('add_to_cart',      'POST', False, 1),
+    ('add_to_cart',      'POST', True,  5),
+    ('update_cart',      'POST', True,  4),
+    ('update_cart_batch', 'POST', False, 1),
+    ('update_cart_batch', 'POST', True,  6),
+    ('remove_from_cart', 'GET',  True,  4),
+    ('checkout',         'GET',  True,  14),
+    ('checkout',         'POST', True,  26),  # 4 rollup upserts
+    ('profile',          'GET',  True,  6),
+    ('order_history',    'GET',  True,  6),  # orders + items + product slugs
+    ('login',            'GET',  False, 0),
+    ('login',            'POST', False, 9),
+    ('signup',           'GET',  False, 0),
+    ('signup',           'POST', False, 5),  # 1 check + 2 inserts in a savepoint
+    ('logout',           'GET',  True,  4),
+]
+
+
+class QueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='secret-pass-1')
+        Profile.objects.create(user=cls.user)
+        for index in range(4):
+            category = make_category(f'Category {index}')
+            for number in range(10):
+                make_product(category, f'Product {index} {number}',
+                             is_featured=number < 2)
+        products = list(Product.objects.order_by('id'))
+        cls.product = products[0]
+        for product in products[:5]:
+            Cart.objects.create(user=cls.user, product=product, quantity=2)
+        for _ in range(3):
+            order = Order.objects.create(
+                user=cls.user, total_amount=Decimal('300.00'))
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=product, quantity=1,
+                          price=product.price)
+                for product in products[5:8]
+            ])
+        cls.cart_line = Cart.objects.filter(user=cls.user).first()
+
+    def setUp(self):
+        cache.clear()
+
+    def request_for(self, name, method):
+        args = {
+            'shop_details':     [self.product.slug],
+            'add_to_cart':      [self.product.pk],
+            'update_cart':      [self.cart_line.pk],
+            'remove_from_cart': [self.cart_line.pk],
+        }.get(name, [])
+        data = {
+            'update_cart': {'action': 'increase'},
+            'update_cart_batch': json.dumps(
+                {'changes': {self.cart_line.pk: 2}}),
+            'login':       {'username': 'buyer', 'password': 'secret-pass-1'},
+            'signup':      {'username': 'new-buyer', 'email': 'new@example.com',
+                            'first_name': 'New', 'last_name': 'Buyer',
+                            'phone': '9999999999',
+                            'password1': 'secret-pass-1',
+                            'password2': 'secret-pass-1'},
+            'checkout':    BILLING,
+        }.get(name, {})
+        return reverse(f'store:{name}', args=args), data
+
+    def test_every_store_url_has_a_budget(self):
+        resolver = get_resolver('store.urls')
+        names = {pattern.name for pattern in resolver.url_patterns}
+        self.assertEqual(names, {name for name, *_ in QUERY_BUDGETS})
+
+    def test_query_budgets(self):
+        for name, method, logged_in, budget in QUERY_BUDGETS:
+            with self.subTest(url=name, method=method, logged_in=logged_in):
+                cache.clear()
+                client = self.client_class()
+                if logged_in:
+                    client.force_login(self.user)
+                url, data = self.request_for(name, method)
+                send = client.post if method == 'POST' else client.get
+                extra = {'content_type': 'application/json'} if isinstance(
+                    data, str) else {}
+
+                with transaction.atomic():
+                    with QueryRecorder() as recorded:
+                        response = send(url, data, **extra)
+                    transaction.set_rollback(True)
+
+                self.assertLess(response.status_code, 400)
+                self.assertLessEqual(
+                    recorded.count, budget,
+                    f'{method} {url}: {recorded.count} queries '
+                    f'(budget {budget}), repeated: {recorded.duplicates()}')
+                self.assertEqual(recorded.duplicates(), {}, f'{method} {url}')
+
+    def test_fingerprint_ignores_values(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 7 AND name = 'o''k'"),
+            fingerprint('SELECT  * FROM t WHERE id = 12 AND name = \'x\''))
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            'SELECT * FROM t WHERE id IN (...)')
+
+    def test_recorder_finds_n_plus_one(self):
+        with QueryRecorder() as recorded:
+            for category in Category.objects.all():
+                list(category.products.all())
+        self.assertEqual(recorded.count, 5)
+        self.assertEqual(recorded.duplicate_count(), 3)
+
+    @override_settings(STORE_QUERY_INSTRUMENTATION=True)
+    def test_middleware_headers_and_log(self):
+        client = self.client_class()
+        with self.assertLogs('store.queries', 'INFO') as logs:
+            response = client.get(reverse('store:shop'))
+        self.assertEqual(response['X-DB-Query-Count'], '5')
+        self.assertEqual(response['X-DB-Duplicate-Queries'], '0')
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('GET /shop/ 200: 5 queries', logs.output[0])
+
+
+# ============================================================
+# BENCHMARK SEEDER + RUNNER
+# ============================================================
+class BenchmarkCommandTests(TestCase):
+
+    def seed(self, *extra):
+        call_command('seed_catalog', '--products', '300', '--batch-size', '128',
+                     '--skip-search-index', *extra, stdout=StringIO())
+
+    def snapshot(self):
+        return (
+            list(Product.objects.order_by('slug')
+                 .values_list('slug', 'name', 'price', 'stock')),
+            Cart.objects.count(),
+            OrderItem.objects.count(),
+        )
+
+    def test_seed_is_deterministic_and_replaceable(self):
+        self.seed()
+        first = self.snapshot()
+        self.assertEqual(len(first[0]), 300)
+        self.assertTrue(first[1] and first[2])
+        self.assertEqual(
+            sum(Category.objects.values_list('product_count', flat=True)),
+            Product.objects.filter(is_available=True).count())
+
+        self.seed('--replace')
+        self.assertEqual(self.snapshot(), first)
+
+    def test_bench_endpoints_writes_json(self):
+        self.seed()
+        out = StringIO()
+        call_command('bench_endpoints', '--requests', '4', '--warmup', '1',
+                     '--json', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report['results']),
+                         {'shop', 'shop_details', 'cart', 'checkout'})
+        for row in report['results'].values():
+            self.assertEqual((row['requests'], row['errors']), (4, 0))
+            self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+
+    def test_bench_checkout_without_ids_from_bulk_insert(self):
+        # Like MySQL: bulk_create() leaves pk unset
+        out = StringIO()
+        with mock.patch.object(type(connection.features),
+                               'can_return_rows_from_bulk_insert', False):
+            call_command('bench_checkout', '--sizes', '1', '3', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines[1:]], ['1', '3'])
+        self.assertFalse(Product.objects.exists())
+
+
+# ============================================================
+# BULK CATALOG IMPORT
+# ============================================================
+class ImportProductsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.phones = make_category('Phones')
+        cls.vendor = Vendor.objects.create(
+            user=User.objects.create_user('shop', password='pass12345'),
+            shop_name='Pune Gadgets')
+        cls.old = make_product(cls.phones, 'Phone', price='500.00')
+
+    def run_import(self, name, content, *extra):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = f'{directory}/{name}'
+        with open(path, 'w') as handle:
+            handle.write(content)
+        out, err = StringIO(), StringIO()
+        call_command('import_products', path, '--batch-size', '2', *extra,
+                     stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_upserts_by_slug_and_generates_unique_slugs(self):
+        out, err = self.run_import('feed.csv', (
+            'slug,name,category,vendor,price,stock\n'
+            'phone,,,,450,7\n'
+            ',Phone,phones,Pune Gadgets,300,5\n'
+            ',Phone,phones,,200,5\n'
+            ',Ghost,tablets,,100,1\n'
+        ))
+        self.assertIn('2 new, 1 updated, 1 errors', out)
+        self.assertIn("line 5: unknown category 'tablets'", err)
+
+        self.old.refresh_from_db()
+        self.assertEqual((self.old.price, self.old.stock, self.old.name),
+                         (Decimal('450.00'), 7, 'Phone'))
+        self.assertEqual(
+            list(Product.objects.filter(name='Phone').order_by('slug')
+                 .values_list('slug', 'vendor__shop_name')),
+            [('phone', None), ('phone-2', 'Pune Gadgets'), ('phone-3', None)])
+        self.phones.refresh_from_db()
+        self.assertEqual(self.phones.product_count, 3)
+        self.assertEqual(len(get_search_backend().search('phone')), 3)
+
+    def test_generated_slugs_read_only_exact_candidates(self):
+        Product.objects.bulk_create([
+            Product(category=self.phones, name='x', slug=slug, price=1)
+            for slug in ['product', 'productivity', 'product-blue']
+            + [f'product-{n}' for n in range(2, 12)]
+        ])
+        with QueryRecorder() as recorded:
+            slugs = unique_slugs(['product', 'phone', 'product'])
+        self.assertEqual(slugs, ['product-12', 'phone-2', 'product-13'])
+        self.assertFalse(any('LIKE' in sql for sql, _ in recorded.queries))
+
+    def test_jsonl_dry_run_writes_nothing(self):
+        out, _ = self.run_import(
+            'feed.jsonl',
+            '{"name": "Tablet", "category": "phones", "price": "99"}\n',
+            '--dry-run')
+        self.assertIn('Checked 1 rows (1 new', out)
+        self.assertFalse(Product.objects.filter(name='Tablet').exists())
+
+
+# ============================================================
+# STREAMING ORDER EXPORT (admin)
+# ============================================================
+class OrderExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'boss', 'boss@example.com', 'secret-pass-1')
+        buyer = User.objects.create_user('buyer', password='secret-pass-1')
+        phone = make_product(make_category('Phones'), 'Phone', price='100.00')
+        billing = BillingAddress.objects.create(user=buyer, **BILLING)
+        cls.orders = []
+        for status, quantity in [('delivered', 2), ('pending', 1), ('delivered', 3)]:
+            order = Order.objects.create(
+                user=buyer, billing_address=billing, status=status,
+                total_amount=Decimal('100.00') * quantity)
+            OrderItem.objects.create(order=order, product=phone, product_name='Phone',
+                                     quantity=quantity, price=Decimal('100.00'))
+            cls.orders.append(order)
+        # Last order is from last year
+        Order.objects.filter(pk=cls.orders[2].pk).update(
+            created_at=timezone.now() - timedelta(days=365))
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_csv_export_filters_by_status_and_date(self):
+        today = timezone.localdate().isoformat()
+        response = self.client.get(reverse('admin:store_order_export'), {
+            'status': 'delivered', 'start': today, 'end': today})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        header, *rows = list(csv.reader(lines))
+        self.assertEqual(len(rows), 1)
+        row = dict(zip(header, rows[0]))
+        self.assertEqual(
+            (row['order_id'], row['username'], row['billing_name'],
+             row['product_name'], row['line_total']),
+            (str(self.orders[0].pk), 'buyer', 'Asha Rao', 'Phone', '200.00'))
+
+    def test_export_is_one_query_however_many_orders(self):
+        with self.assertNumQueries(1):
+            rows = list(export_rows(Order.objects.all()))
+        self.assertEqual(len(rows), 3)
+
+    def test_export_reads_keyset_batches(self):
+        with mock.patch('store.exports.EXPORT_CHUNK_SIZE', 2), \
+                self.assertNumQueries(2):
+            rows = list(export_rows(Order.objects.all()))
+        self.assertEqual([row['order_id'] for row in rows],
+                         sorted(order.pk for order in self.orders))
+
+    def test_admin_action_streams_jsonl(self):
+        response = self.client.post(reverse('admin:store_order_changelist'), {
+            'action': 'export_jsonl',
+            '_selected_action': [self.orders[1].pk],
+        })
+        rows = [json.loads(line) for line in
+                b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(r['order_id'], r['order_status']) for r in rows],
+                         [(self.orders[1].pk, 'pending')])
+
+    def test_invalid_filter_redirects_with_message(self):
+        response = self.client.get(reverse('admin:store_order_export'),
+                                   {'status': 'lost'})
+        self.assertRedirects(response, reverse('admin:store_order_changelist'))
+
+
+# ============================================================
+# SALES ROLLUPS + DASHBOARD
+# ============================================================
+class SalesRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='secret-pass-1')
+        cls.vendor = Vendor.objects.create(
+            user=User.objects.create_user('seller'), shop_name='Pune Gadgets')
+        phones, books = make_category('Phones'), make_category('Books')
+        cls.phone = make_product(phones, 'Phone', price='300.00', vendor=cls.vendor)
+        cls.book = make_product(books, 'Book', price='50.00')
+
+    def buy(self, *lines):
+        for product, quantity in lines:
+            Cart.objects.create(user=self.user, product=product, quantity=quantity)
+        return place_order(self.user, BILLING)
+
+    def snapshot(self):
+        return {
+            model.__name__: sorted(
+                model.objects.values_list(key, *fields).order_by(key))
+            for model, key, fields in [
+                (DailySales, 'date', ['orders', 'units', 'revenue']),
+                (ProductSales, 'product', ['units', 'revenue']),
+                (CategorySales, 'category', ['units', 'revenue']),
+                (VendorSales, 'vendor', ['units', 'revenue']),
+                (StatusSales, 'status', ['orders', 'revenue']),
+            ]
+        }
+
+    def test_orders_are_rolled_up_incrementally(self):
+        first = self.buy((self.phone, 2), (self.book, 1))
+        self.buy((self.book, 3))
+
+        self.assertEqual(ProductSales.objects.get(product=self.book).units, 4)
+        self.assertEqual(VendorSales.objects.get(vendor=self.vendor).revenue,
+                         Decimal('600.00'))
+        day = DailySales.objects.get()
+        self.assertEqual((day.orders, day.units), (2, 6))
+        self.assertEqual(day.revenue, first.total_amount
+                         + Order.objects.exclude(pk=first.pk).get().total_amount)
+
+        # Cancelling takes the sale out of everything but the status table
+        first.status = 'cancelled'
+        first.save()
+        self.assertFalse(VendorSales.objects.exclude(units=0).exists())
+        self.assertEqual(DailySales.objects.get().orders, 1)
+        self.assertEqual(
+            dict(StatusSales.objects.values_list('status', 'orders')),
+            {'pending': 1, 'cancelled': 1})
+
+    def test_cancellation_subtracts_from_the_category_of_the_sale(self):
+        order = self.buy((self.phone, 2))
+        phones = self.phone.category
+        self.phone.category = self.book.category
+        self.phone.vendor = None
+        self.phone.save()
+
+        order.status = 'cancelled'
+        order.save()
+        self.assertEqual(CategorySales.objects.get(category=phones).units, 0)
+        self.assertFalse(CategorySales.objects.filter(
+            category=self.book.category).exclude(units=0).exists())
+        self.assertEqual(VendorSales.objects.get(vendor=self.vendor).units, 0)
+
+        # The backfill attributes it the same way
+        order.status = 'pending'
+        order.save()
+        call_command('backfill_rollups', stdout=StringIO())
+        self.assertEqual(CategorySales.objects.get(category=phones).units, 2)
+
+    def test_backfill_matches_incremental_totals(self):
+        self.buy((self.phone, 1), (self.book, 2))
+        order = self.buy((self.phone, 1))
+        order.status = 'delivered'
+        order.save()
+        self.buy((self.book, 1)).delete()
+        incremental = self.snapshot()
+
+        call_command('backfill_rollups', '--batch-size', '1', stdout=StringIO())
+        rebuilt = self.snapshot()
+        # Incremental side keeps zero rows (the deleted order)
+        for name, rows in incremental.items():
+            self.assertEqual([row for row in rows if any(row[1:])], rebuilt[name])
+
+    def test_dashboard_reads_only_rollups(self):
+        admin_user = User.objects.create_superuser(
+            'boss', 'boss@example.com', 'secret-pass-1')
+        self.client.force_login(admin_user)
+        url = reverse('admin:store_dailysales_changelist')
+
+        self.buy((self.phone, 1))
+        with QueryRecorder() as few_orders:
+            response = self.client.get(url)
+        self.assertContains(response, 'Pune Gadgets')
+        for _ in range(3):
+            self.buy((self.book, 1), (self.phone, 1))
+        with QueryRecorder() as more_orders:
+            self.client.get(url)
+
+        self.assertEqual(few_orders.count, more_orders.count)
+        self.assertFalse(any(
+            '"store_order"' in sql or '"store_orderitem"' in sql
+            for sql, _ in more_orders.queries))
+
+
+# ============================================================
+# "BOUGHT TOGETHER" RECOMMENDATIONS
+# ============================================================
+class RecommendationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer')
+        phones, books = make_category('Phones'), make_category('Books')
+        cls.phone = make_product(phones, 'Phone')
+        cls.case = make_product(phones, 'Case')
+        cls.other_phone = make_product(phones, 'Other Phone')
+        cls.charger = make_product(phones, 'Charger')
+        cls.novel = make_product(books, 'Novel')
+        cls.poems = make_product(books, 'Poems')
+
+    def order(self, *products, status='delivered'):
+        order = Order.objects.create(
+            user=self.user, total_amount=Decimal('100.00'), status=status)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=1,
+                      price=Decimal('100.00'))
+            for product in products
+        ])
+        return order
+
+    def build(self, *extra):
+        call_command('build_recommendations', '--min-support', '1', *extra,
+                     stdout=StringIO())
+
+    def recommended(self, product):
+        return list(product.recommendations.order_by('rank')
+                    .values_list('recommended__name', flat=True))
+
+    def test_scores_from_sparse_basket_matrix(self):
+        matrix, products = copurchase.basket_matrix(
+            [1, 1, 2, 2, 3, 3, 3], [10, 20, 10, 20, 10, 30, 30])
+        results = {
+            product: (list(neighbours), list(supports))
+            for product, neighbours, _, supports in
+            copurchase.top_neighbors(matrix, products, min_support=1)
+        }
+        # 10 & 20 share two orders; a duplicate line counts once
+        self.assertEqual(results[10], ([20, 30], [2, 1]))
+        self.assertEqual(results[30], ([10], [1]))
+
+    def test_full_and_incremental_refresh(self):
+        for _ in range(3):
+            self.order(self.phone, self.case)
+        self.order(self.phone, self.novel)
+        self.order(self.phone, self.poems, status='cancelled')
+        self.build()
+        self.assertEqual(self.recommended(self.phone), ['Case', 'Novel'])
+        self.assertEqual(self.recommended(self.poems), [])
+
+        # Only products of changed orders are recomputed
+        Order.objects.update(updated_at=timezone.now() - timedelta(hours=2))
+        ProductRecommendation.objects.update(
+            computed_at=timezone.now() - timedelta(hours=1))
+        for _ in range(5):
+            self.order(self.novel, self.charger)
+        self.build()
+        self.assertEqual(self.recommended(self.novel), ['Charger', 'Phone'])
+        self.assertEqual(
+            set(ProductRecommendation.objects.filter(
+                computed_at__gt=timezone.now() - timedelta(minutes=5))
+                .values_list('product__name', flat=True)),
+            {'Novel', 'Charger'})
+        self.assertEqual(self.recommended(self.phone), ['Case', 'Novel'])
+
+    def test_product_page_reads_recommendations_then_category(self):
+        for _ in range(2):
+            self.order(self.phone, self.novel)
+        self.build()
+        response = self.client.get(reverse('store:shop_details', args=['phone']))
+        first, *top_up = [
+            product.name for product in response.context['related_products']]
+        self.assertEqual(first, 'Novel')
+        self.assertEqual(set(top_up), {'Case', 'Charger', 'Other Phone'})
+
+
+# ============================================================
+# ADMIN CHANGELISTS AT SCALE
+# WHY: a column that loads a related object per row makes
+#      the query count grow with the page size
+# ============================================================
+class AdminChangelistTests(TestCase):
+
+    CHANGELISTS = [
+        'admin:store_order_changelist',
+        'admin:store_cart_changelist',
+        'admin:store_product_changelist',
+        'admin:store_orderitem_changelist',
+        'admin:store_billingaddress_changelist',
+        'admin:store_profile_changelist',
+        'admin:store_vendor_changelist',
+        'admin:store_stockreservation_changelist',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'boss', 'boss@example.com', 'secret-pass-1')
+        cls.category = make_category('Phones')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.rows = 0
+
+    def add_rows(self, count):
+        for _ in range(count):
+            self.rows += 1
+            user = User.objects.create_user(f'buyer{self.rows}')
+            product = make_product(self.category, f'Phone {self.rows}',
+                                   vendor=Vendor.objects.create(
+                                       user=user, shop_name=f'Shop {self.rows}'))
+            billing = BillingAddress.objects.create(user=user, **BILLING)
+            order = Order.objects.create(user=user, billing_address=billing,
+                                         total_amount=Decimal('100.00'))
+            OrderItem.objects.create(order=order, product=product,
+                                     quantity=1, price=Decimal('100.00'))
+            Cart.objects.create(user=user, product=product)
+
+    def changelist_queries(self, url_name, **params):
+        with QueryRecorder() as recorded:
+            response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, 200)
+        return recorded
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.add_rows(2)
+        before = {name: self.changelist_queries(name).count
+                  for name in self.CHANGELISTS}
+        self.add_rows(4)
+        for name in self.CHANGELISTS:
+            with self.subTest(changelist=name):
+                recorded = self.changelist_queries(name)
+                self.assertEqual(recorded.count, before[name])
+                self.assertEqual(recorded.duplicates(), {})
+
+    def test_order_items_show_sales_snapshot_read_only(self):
+        self.add_rows(1)
+        order = Order.objects.get()
+        OrderItem.objects.filter(order=order).update(
+            category=self.category, vendor=Vendor.objects.get())
+        with QueryRecorder() as recorded:
+            response = self.client.get(
+                reverse('admin:store_order_change', args=[order.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'name="items-0-category"')
+        self.assertNotContains(response, 'name="items-0-price"')
+        self.assertContains(response, 'Shop 1')
+        # Category / vendor come with the items query (JOIN)
+        self.assertFalse([sql for sql, _ in recorded.queries if sql.startswith(
+            ('SELECT "store_category"', 'SELECT "store_vendor"'))])
+
+        item = OrderItem.objects.get()
+        response = self.client.get(
+            reverse('admin:store_orderitem_change', args=[item.pk]))
+        self.assertNotContains(response, 'name="vendor"')
+
+    def test_search_uses_an_index(self):
+        self.add_rows(2)
+        response = self.client.get(
+            reverse('admin:store_order_changelist'), {'q': 'BUYER1'})
+        self.assertContains(response, 'buyer1')
+        for name, build in ADMIN_SEARCHES:
+            with self.subTest(search=name):
+                scanned, plan = full_scans(build())
+                self.assertEqual(scanned, [], plan)
+
+    def test_paginator_uses_estimate_for_unfiltered_big_table(self):
+        self.add_rows(2)
+        with mock.patch('store.paginators.estimated_row_count',
+                        return_value=5_000_000):
+            with QueryRecorder() as recorded:
+                response = self.client.get(
+                    reverse('admin:store_order_changelist'))
+            self.assertEqual(response.context['cl'].result_count, 5_000_000)
+            self.assertFalse(any('COUNT(' in sql for sql, _ in recorded.queries))
+
+            # Filtered → exact count
+            response = self.client.get(
+                reverse('admin:store_order_changelist'), {'status__exact': 'pending'})
+            self.assertEqual(response.context['cl'].result_count, 2)
+
+
+# ============================================================
+# RESPONSIVE IMAGE DERIVATIVES
+# ============================================================
+def make_jpeg(width, height):
+    from PIL import Image
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), (200, 120, 40)).save(buffer, 'JPEG')
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(),
+                              content_type='image/jpeg')
+
+
+class ImageDerivativeTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.mkdtemp()
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.media, True)
+        self.category = make_category('Phones')
+
+    def test_saving_product_writes_derivatives(self):
+        product = make_product(self.category, 'Phone', image=make_jpeg(800, 600))
+        name = product.image.name
+
+        for width in (320, 640):
+            for image_format in ('webp', 'jpeg'):
+                self.assertTrue(default_storage.exists(
+                    derivative_name(name, width, image_format)))
+        # No upscaling past the original width
+        self.assertFalse(default_storage.exists(derivative_name(name, 1024, 'jpeg')))
+
+        self.assertEqual(pick_derivative(name, 600),
+                         derivative_name(name, 640, 'webp'))
+        self.assertLess(
+            default_storage.size(derivative_name(name, 320, 'webp')),
+            default_storage.size(name))
+
+    def test_tag_emits_srcset(self):
+        product = make_product(self.category, 'Phone', image=make_jpeg(800, 600))
+        html = Template(
+            '{% load store_images %}'
+            '{% responsive_image product.image product.name sizes="50vw" class="x" %}'
+        ).render(Context({'product': product}))
+
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('-320w.webp 320w', html)
+        self.assertIn('-640w.jpg 640w', html)
+        self.assertIn('class="x"', html)
+
+    def test_backfill_command(self):
+        product = make_product(self.category, 'Phone', image=make_jpeg(700, 700))
+        shutil.rmtree(f'{self.media}/products/derivatives')
+        cache.clear()
+
+        call_command('generate_image_derivatives', workers=2, stdout=StringIO())
+        self.assertTrue(default_storage.exists(
+            derivative_name(product.image.name, 640, 'webp')))
+
+
+# ============================================================
+# HOT QUERY PLANS (explain_hot_queries)
+# ============================================================
+class QueryPlanTests(TestCase):
+
+    def test_hot_queries_use_indexes(self):
+        out = StringIO()
+        call_command('explain_hot_queries', stdout=out)
+        self.assertIn('All', out.getvalue())
+        self.assertNotIn('FULL SCAN', out.getvalue())
+
+    def test_full_scan_is_reported(self):
+        # description has no index
+        scanned, _plan = full_scans(Product.objects.filter(description='x'))
+        self.assertEqual(scanned, [Product._meta.db_table])
+
+        with mock.patch('store.query_plans.HOT_QUERIES', [
+            ('unindexed', lambda: Product.objects.filter(description='x')),
+        ]):
+            with self.assertRaises(CommandError):
+                call_command('explain_hot_queries', stdout=StringIO())
+
+
+# ============================================================
+# WORKER WARM-UP + STARTUP REPORT
+# ============================================================
+class WarmupTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_up_primes_caches(self):
+        category = make_category('Phones')
+        make_product(category, 'Phone', is_featured=True)
+
+        report = warm_up()
+        self.assertTrue(all(step['items'] for step in report.values()), report)
+        with self.assertNumQueries(0):
+            get_featured_products()
+            CatalogQuery().price_facets()
+
+    def test_failing_step_does_not_stop_the_worker(self):
+        with mock.patch('store.warmup.get_index_categories',
+                        side_effect=OperationalError('database is down')):
+            with self.assertLogs('store.warmup', 'ERROR'):
+                report = warm_up()
+        self.assertIsNone(report['catalog_cache']['items'])
+        self.assertTrue(report['templates']['items'])
+
+    def test_startup_report(self):
+        out = StringIO()
+        call_command('startup_report', '--runs', '1', '--no-warmup', '--json',
+                     stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertGreater(report['import_ms'], 0)
+        self.assertIn('django', [entry['name'] for entry in report['packages']])
+
+        with self.assertRaises(CommandError):
+            call_command('startup_report', '--runs', '1', '--no-warmup',
+                         '--budget-ms', '0', stdout=StringIO())
+
+
+# ============================================================
+# LOGIN / SIGNUP THROTTLING
+# ============================================================
+class ThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, username, ip='203.0.113.1'):
+        return self.client.post(
+            reverse('store:login'),
+            {'username': username, 'password': 'wrong-password'},
+            REMOTE_ADDR=ip)
+
+    def test_token_bucket_refills(self):
+        bucket = TokenBucket('test', capacity=2, period=10)
+        self.assertEqual(bucket.take('key', now=100), 0)
+        self.assertEqual(bucket.take('key', now=100), 0)
+        self.assertEqual(bucket.take('key', now=100), 5)
+        self.assertEqual(bucket.take('key', now=105), 0)
+        self.assertEqual(bucket.take('other', now=105), 0)
+
+    @mock.patch('store.views.authenticate', return_value=None)
+    def test_login_rejected_before_hashing(self, authenticate):
+        for _ in range(LOGIN_PER_USERNAME.capacity):
+            self.assertEqual(self.login('Buyer').status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.login('buyer ', ip='203.0.113.2')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(int(response['Retry-After']) > 0)
+        self.assertEqual(authenticate.call_count, LOGIN_PER_USERNAME.capacity)
+
+        # Per IP: many usernames from one address
+        for number in range(LOGIN_PER_IP.capacity - LOGIN_PER_USERNAME.capacity):
+            self.login(f'user-{number}')
+        self.assertEqual(self.login('someone-else').status_code, 429)
+        self.assertEqual(self.login('someone-else', ip='203.0.113.3').status_code, 200)
+
+    @override_settings(STORE_THROTTLE_PROXY_COUNT=1)
+    def test_client_ip_behind_proxy(self):
+        request = RequestFactory().get(
+            '/', HTTP_X_FORWARDED_FOR='1.2.3.4, 10.0.0.1', REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(client_ip(request), '10.0.0.1')
+
+    def test_signup_checks_uniqueness_once(self):
+        User.objects.create_user('taken', email='taken@example.com')
+        User.objects.create_user('no-email')
+        form = {'first_name': 'New', 'last_name': 'Buyer', 'phone': '1',
+                'password1': 'secret-pass-1', 'password2': 'secret-pass-1'}
+        url = reverse('store:signup')
+
+        self.client.post(url, dict(form, username='other', email='taken@example.com'))
+        self.assertFalse(User.objects.filter(username='other').exists())
+
+        # A blank email is never "already registered"
+        self.client.post(url, dict(form, username='fresh', email=''))
+        self.assertTrue(Profile.objects.filter(user__username='fresh').exists())
+
+        for _ in range(SIGNUP_PER_IP.capacity):
+            self.client.post(url, dict(form, username='taken', email=''))
+        self.assertEqual(
+            self.client.post(url, dict(form, username='late', email='')).status_code,
+            429)
+
+    def test_signup_integrity_error_names_the_real_cause(self):
+        form = {'first_name': 'New', 'last_name': 'Buyer', 'phone': '1',
+                'username': 'racer', 'email': '',
+                'password1': 'secret-pass-1', 'password2': 'secret-pass-1'}
+        with mock.patch.object(Profile.objects, 'create',
+                               side_effect=IntegrityError('profile')):
+            response = self.client.post(reverse('store:signup'), form, follow=True)
+        self.assertNotContains(response, 'Username already taken!')
+        self.assertContains(response, 'Could not create your account')
+        self.assertFalse(User.objects.filter(username='racer').exists())
+
+    def test_bench_login_throttle(self):
+        out = StringIO()
+        with mock.patch('store.views.authenticate', return_value=None):
+            call_command('bench_login_throttle', '--attempts', '8', '--json',
+                         stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['rejected'], 8 - LOGIN_PER_USERNAME.capacity)
+
+
+
+# ============================================================
+# ORDER HISTORY
+# ============================================================
+class OrderHistoryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='secret-pass-1')
+        category = make_category('Phones')
+        cls.products = [
+            make_product(category, f'Phone {i}', price='100.00')
+            for i in range(3)
+        ]
+        for count in range(1, 4):
+            Cart.objects.bulk_create([
+                Cart(user=cls.user, product=product, quantity=1)
+                for product in cls.products[:count]
+            ])
+            place_order(cls.user, BILLING)
+        # Same timestamp: the id must break the tie
+        Order.objects.update(created_at=timezone.now())
+
+    def test_pages_cover_every_order_once(self):
+        seen, cursor = [], None
+        while True:
+            page = order_history(self.user, cursor=cursor, page_size=2)
+            seen.extend(order.pk for order in page.orders)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(
+            seen, list(Order.objects.order_by('-id').values_list('id', flat=True)))
+
+    def test_items_in_constant_queries(self):
+        with self.assertNumQueries(3):
+            page = order_history(self.user)
+            lines = [(item.product_name, item.product.slug)
+                     for order in page.orders for item in order.items.all()]
+        self.assertEqual(len(lines), 6)
+        self.assertEqual([order.item_count for order in page.orders], [3, 2, 1])
+
+    def test_history_survives_product_deletion(self):
+        self.products[0].delete()
+        self.assertEqual(OrderItem.objects.filter(product__isnull=True).count(), 3)
+
+        response = self.client.get(reverse('store:order_history'))
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('store:order_history'))
+        self.assertContains(response, 'Phone 0', count=3)
+        self.assertContains(response, reverse('store:shop_details', args=['phone-1']))
+        self.assertNotContains(response, reverse('store:shop_details', args=['phone-0']))
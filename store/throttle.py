@@ -0,0 +1,107 @@
+"""
+====================================================
+MULTISHOP - Login / Signup Throttling
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEM:
+  Every login POST ran authenticate() = one full PBKDF2
+  hash (~100 ms of CPU by design), even for a username
+  that does not exist. A credential-stuffing burst of a
+  few hundred requests/sec kept every worker busy hashing.
+
+NEW: Token buckets in the Django cache
+  - Per client IP AND per username (login), per IP (signup)
+  - A bucket holds `capacity` attempts and refills
+    continuously at capacity / period
+  - Checked BEFORE any hashing or database query — a
+    rejected attempt costs a cache lookup, not a hash
+  - Works with the local-memory cache (per process limits)
+    and with a shared cache (Redis / Memcached → limits
+    across all workers). Get + set is not atomic: two
+    concurrent requests can both take the last token —
+    good enough for a rate limit.
+====================================================
+"""
+
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class TokenBucket:
+
+    def __init__(self, scope, capacity, period):
+        self.scope = scope
+        self.capacity = capacity
+        self.period = period                  # seconds to refill completely
+        self.rate = capacity / period         # tokens per second
+
+    def cache_key(self, key):
+        # Usernames may contain characters memcached keys cannot
+        digest = hashlib.md5(str(key).encode()).hexdigest()
+        return f'store:throttle:{self.scope}:{digest}'
+
+    def take(self, key, now=None):
+        """Returns 0 if allowed, else seconds until the next token."""
+        now = time.time() if now is None else now
+        cache_key = self.cache_key(key)
+        tokens, updated = cache.get(cache_key) or (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+
+        retry_after = 0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = math.ceil((1 - tokens) / self.rate)
+        # Expires once the bucket would be full again anyway
+        cache.set(cache_key, (tokens, now), math.ceil(self.period) + 1)
+        return retry_after
+
+
+LOGIN_PER_IP = TokenBucket('login-ip', capacity=20, period=60)
+LOGIN_PER_USERNAME = TokenBucket('login-user', capacity=5, period=300)
+SIGNUP_PER_IP = TokenBucket('signup-ip', capacity=5, period=3600)
+
+
+def client_ip(request):
+    """
+    REMOTE_ADDR, or — behind STORE_THROTTLE_PROXY_COUNT
+    trusted proxies — the address the nearest of them saw.
+    """
+    proxies = getattr(settings, 'STORE_THROTTLE_PROXY_COUNT', 0)
+    if proxies:
+        forwarded = [
+            address.strip() for address in
+            request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+            if address.strip()
+        ]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _check(*buckets_and_keys):
+    if not getattr(settings, 'STORE_THROTTLE_ENABLED', True):
+        return 0
+    for bucket, key in buckets_and_keys:
+        retry_after = bucket.take(key)
+        if retry_after:
+            # Later buckets keep their tokens
+            return retry_after
+    return 0
+
+
+def throttle_login(request, username):
+    """0 = go ahead, else Retry-After seconds."""
+    return _check(
+        (LOGIN_PER_IP, client_ip(request)),
+        (LOGIN_PER_USERNAME, (username or '').strip().lower()),
+    )
+
+
+def throttle_signup(request):
+    return _check((SIGNUP_PER_IP, client_ip(request)))
@@ -1,11 +1,18 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# ASGI (asgi.py) → async catalog views, WSGI → sync views
+if settings.STORE_ASYNC_VIEWS:
+    from . import async_views as catalog_views
+else:
+    catalog_views = views
+
 app_name = 'store'
 
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('shop/', views.shop, name='shop'),
+    path('', catalog_views.index, name='index'),
+    path('shop/', catalog_views.shop, name='shop'),
     path('contact/', views.contact, name='contact'),
     path('cart/', views.cart, name='cart'),
     path('checkout/', views.checkout, name='checkout'),
@@ -13,10 +20,12 @@ urlpatterns = [
     path('logout/', views.user_logout, name='logout'),
     path('signup/', views.user_signup, name='signup'),
     path('profile/', views.profile, name='profile'),
-    path('product/<slug:slug>/', views.shop_details, name='shop_details'),
+    path('orders/', views.order_history_view, name='order_history'),
+    path('product/<slug:slug>/', catalog_views.shop_details, name='shop_details'),
     path('add-to-cart/<int:product_id>/', views.add_to_cart, name='add_to_cart'),
 
     # ✅ New Cart URLs
     path('update-cart/<int:cart_id>/', views.update_cart, name='update_cart'),
+    path('update-cart/batch/', views.update_cart_batch, name='update_cart_batch'),
     path('remove-from-cart/<int:cart_id>/', views.remove_from_cart, name='remove_from_cart'),
 ]
\ No newline at end of file
@@ -1,17 +1,35 @@
+from decimal import Decimal
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from .models import Category, Product, Cart, Profile
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils.http import http_date
+from .models import Order, Product, Profile
+from .catalog import CatalogQuery
+from .catalog_cache import get_featured_products, get_index_categories
+from .page_cache import anonymous_page_cache
+from . import recommendations
+from .cart_service import (
+    MAX_LINE_QUANTITY, get_cart, get_cart_lines, get_cart_summary,
+    merge_cookie_cart, parse_cart_changes, parse_quantity,
+)
+from .inventory import OutOfStockError
+from .throttle import throttle_login, throttle_signup
+from .orders import (
+    EmptyCartError, billing_data_from, hold_cart, order_history, place_order,
+)
 
 
 def index(request):
-    categories = Category.objects.all()
-    featured_products = Product.objects.filter(
-        is_featured=True,
-        is_available=True
-    )[:8]
+    # OLD: 2 queries on every request
+    # NEW: cached sections, rebuilt only when the catalog changes
+    categories = get_index_categories()
+    featured_products = get_featured_products()
     context = {
         'categories': categories,
         'featured_products': featured_products,
@@ -48,12 +66,21 @@ def user_login(request):
         username = request.POST.get('username')
         password = request.POST.get('password')
 
+        # OLD: every attempt paid a full password hash
+        # NEW: over-limit attempts stop here (throttle.py)
+        retry_after = throttle_login(request, username)
+        if retry_after:
+            return throttled(request, 'store/login.html', retry_after)
+
         user = authenticate(request, username=username, password=password)
 
         if user is not None:
             login(request, user)
             messages.success(request, f'Welcome back, {username}!')
-            return redirect('store:index')
+            response = redirect('store:index')
+            # Anonymous cookie cart → Cart rows
+            merge_cookie_cart(request, user, response)
+            return response
         else:
             messages.error(request, 'Invalid username or password!')
 
@@ -76,32 +103,50 @@ def user_signup(request):
         password1  = request.POST.get('password1')
         password2  = request.POST.get('password2')
 
+        retry_after = throttle_signup(request)
+        if retry_after:
+            return throttled(request, 'store/signup.html', retry_after)
+
         # Check passwords match
         if password1 != password2:
             messages.error(request, 'Passwords do not match!')
             return redirect('store:signup')
 
-        # Check username already exists
-        if User.objects.filter(username=username).exists():
+        # OLD: one exists() for the username + one for the email
+        # NEW: ONE query for both (blank email never "taken")
+        taken = Q(username=username)
+        if email:
+            taken |= Q(email=email)
+        taken_usernames = set(
+            User.objects.filter(taken).values_list('username', flat=True))
+        if username in taken_usernames:
             messages.error(request, 'Username already taken!')
             return redirect('store:signup')
-
-        # Check email already exists
-        if User.objects.filter(email=email).exists():
+        if taken_usernames:
             messages.error(request, 'Email already registered!')
             return redirect('store:signup')
 
-        # Create user
-        user = User.objects.create_user(
-            username=username,
-            email=email,
-            password=password1,
-            first_name=first_name,
-            last_name=last_name
-        )
-
-        # Create profile for user
-        Profile.objects.create(user=user, phone=phone)
+        # Create user + profile together
+        # WHY: a concurrent signup with the same username passes
+        #      the check too — auth_user.username is UNIQUE, so
+        #      the database turns the second one away. Email has
+        #      no unique constraint: the check above is best-effort
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    username=username,
+                    email=email,
+                    password=password1,
+                    first_name=first_name,
+                    last_name=last_name
+                )
+                Profile.objects.create(user=user, phone=phone)
+        except IntegrityError:
+            if User.objects.filter(username=username).exists():
+                messages.error(request, 'Username already taken!')
+            else:
+                messages.error(request, 'Could not create your account, please try again.')
+            return redirect('store:signup')
 
         messages.success(request, 'Account created! Please login.')
         return redirect('store:login')
@@ -109,6 +154,13 @@ def user_signup(request):
     return render(request, 'store/signup.html')
 
 
+def throttled(request, template, retry_after):
+    messages.error(request, 'Too many attempts. Please try again in a few minutes.')
+    response = render(request, template, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
 # ============================================================
 # LOGOUT VIEW
 # ============================================================
@@ -119,174 +171,198 @@ def user_logout(request):
 
 
 
-def shop(request):
-    products = Product.objects.filter(is_available=True)
-    categories = Category.objects.all()
-
-    # Filter by category
-    selected_category = request.GET.get('category')
-    if selected_category:
-        products = products.filter(category__slug=selected_category)
-
-    # Filter by price
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
-    if min_price:
-        products = products.filter(price__gte=min_price)
-    if max_price:
-        products = products.filter(price__lte=max_price)
-
-    # Search
-    search_query = request.GET.get('search')
-    if search_query:
-        products = products.filter(name__icontains=search_query)
+def shop_context(request, query, page, facets):
+    """Shared with async_views.shop"""
+    # Keep current filters in the "Next page" link
+    next_params = request.GET.copy()
+    if page.has_next:
+        next_params['cursor'] = page.next_cursor
+    # "First page" link: same filters, no cursor
+    first_params = request.GET.copy()
+    first_params.pop('cursor', None)
+
+    # Bucket links keep category + search, replace the price range
+    for bucket in facets['price_buckets']:
+        low = bucket['min']
+        # Upper bound is exclusive, max_price inclusive
+        high = bucket['max'] - Decimal('0.01') if bucket['max'] is not None else None
+        params = request.GET.copy()
+        for name, value in (('min_price', low), ('max_price', high)):
+            params.pop(name, None)
+            if value is not None:
+                params[name] = value
+        params.pop('cursor', None)
+        bucket['query'] = params.urlencode()
+        bucket['selected'] = (
+            (low, high) != (None, None) and
+            (query.min_price, query.max_price) == (low, high)
+        )
 
-    context = {
-        'products': products,
-        'categories': categories,
-        'selected_category': selected_category,
-        'total_products': Product.objects.count(),
-        'search_query': search_query or '',
-        'min_price': min_price or '',
-        'max_price': max_price or '',
+    return {
+        'products': page.products,
+        'page': page,
+        'next_query': next_params.urlencode() if page.has_next else '',
+        'first_query': first_params.urlencode(),
+        'categories': facets['categories'],
+        'price_buckets': facets['price_buckets'],
+        'selected_category': query.category,
+        'total_products': facets['all_categories_total'],
+        'filtered_total': facets['total'],
+        'search_query': query.search or '',
+        'min_price': query.min_price if query.min_price is not None else '',
+        'max_price': query.max_price if query.max_price is not None else '',
+        'is_paginated': bool(query.cursor) or page.has_next,
     }
+
+
+@anonymous_page_cache('shop', params=[
+    'category', 'min_price', 'max_price', 'search', 'cursor', 'page_size',
+])
+def shop(request):
+    # OLD: Rendered every available product + unfiltered count()
+    # NEW: CatalogQuery → one page of products + bounded facet queries
+    query = CatalogQuery.from_request(request.GET)
+    context = shop_context(request, query, query.page(), query.facets())
     return render(request, 'store/shop.html', context)
 
 
 
 
+@anonymous_page_cache('shop_details')
 def shop_details(request, slug):
     # Get product or show 404 if not found
     product = get_object_or_404(Product, slug=slug)
 
-    # Get related products from same category
-    related_products = Product.objects.filter(
-        category=product.category,
-        is_available=True
-    ).exclude(id=product.id)[:4]
+    # OLD: 4 arbitrary products from the same category
+    # NEW: "frequently bought together" (recommendations.py),
+    #      topped up from the same category
+    related_products = recommendations.related_products(slug)
 
     context = {
         'product': product,
         'related_products': related_products,
     }
-    return render(request, 'store/shop_details.html', context)
+    response = render(request, 'store/shop_details.html', context)
+    # Used by the page cache for conditional GET (304)
+    response['Last-Modified'] = http_date(product.updated_at.timestamp())
+    return response
 
 
-@login_required
 def add_to_cart(request, product_id):
     product = get_object_or_404(Product, id=product_id)
-    quantity = int(request.POST.get('quantity', 1))
-
-    # Check if already in cart
-    cart_item, created = Cart.objects.get_or_create(
-        user=request.user,
-        product=product,
-    )
-
-    if not created:
-        # Already in cart — increase quantity
-        cart_item.quantity += quantity
-        cart_item.save()
-        messages.success(request, f'Updated {product.name} quantity in cart!')
-    else:
-        cart_item.quantity = quantity
-        cart_item.save()
+    try:
+        quantity = parse_quantity(request.POST.get('quantity', 1))
+    except ValueError:
+        messages.error(request, f'Please choose a quantity from 1 to {MAX_LINE_QUANTITY}.')
+        return redirect('store:shop_details', slug=product.slug)
+
+    # OLD: @login_required + a Cart row write on every click
+    # NEW: anonymous carts live in a signed cookie (cart_service.py)
+    cart = get_cart(request)
+    try:
+        created = cart.add(product, quantity)
+    except ValueError:
+        messages.error(request, 'Your cart is full!')
+        return redirect('store:cart')
+
+    if created:
         messages.success(request, f'{product.name} added to cart!')
+    else:
+        messages.success(request, f'Updated {product.name} quantity in cart!')
 
-    return redirect('store:cart')
+    return cart.save(redirect('store:cart'))
 
 
-@login_required
 def cart(request):
-    cart_items = Cart.objects.filter(user=request.user)
-
-    # Calculate totals
-    subtotal = sum(item.get_total() for item in cart_items)
-    shipping = 0 if subtotal >= 500 else 50
-    total = subtotal + shipping
+    # OLD: item.get_total() per line loaded each Product (N+1)
+    # NEW: lines come with product joined, totals from cart service
+    cart = get_cart(request)
+    cart_items = cart.lines()
+    summary = cart.summary()
 
     context = {
         'cart_items': cart_items,
-        'subtotal': subtotal,
-        'total': total,
+        'subtotal': summary.subtotal,
+        'shipping': summary.shipping,
+        'total': summary.total,
     }
     return render(request, 'store/cart.html', context)
 
 
-@login_required
 def update_cart(request, cart_id):
-    cart_item = get_object_or_404(Cart, id=cart_id, user=request.user)
-    action = request.POST.get('action')
-
-    if action == 'increase':
-        cart_item.quantity += 1
-        cart_item.save()
-    elif action == 'decrease':
-        if cart_item.quantity > 1:
-            cart_item.quantity -= 1
-            cart_item.save()
-        else:
-            cart_item.delete()
-
-    return redirect('store:cart')
+    cart = get_cart(request)
+    cart.update(cart_id, request.POST.get('action'))
+    return cart.save(redirect('store:cart'))
+
+
+def money(value):
+    return f'{value:.2f}'
+
+
+def update_cart_batch(request):
+    """
+    POST {"changes": {"<line id>": <delta>}} → JSON cart state
+    OLD: one POST + redirect + full cart page per +/- click
+    NEW: cart.html sums rapid clicks per line and sends them
+         here together, applied in ONE transaction
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    try:
+        deltas = parse_cart_changes(request.body)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    cart = get_cart(request)
+    cart.apply(deltas)
+    summary = cart.summary()
+    lines = {
+        line.id: {'quantity': line.quantity, 'total': money(line.get_total())}
+        for line in cart.lines() if line.id in deltas
+    }
+    return cart.save(JsonResponse({
+        'lines': lines,
+        # Emptied, or not in this cart at all
+        'removed': sorted(set(deltas) - set(lines)),
+        'count': summary.count,
+        'subtotal': money(summary.subtotal),
+        'shipping': money(summary.shipping),
+        'total': money(summary.total),
+    }))
 
 
-@login_required
 def remove_from_cart(request, cart_id):
-    cart_item = get_object_or_404(Cart, id=cart_id, user=request.user)
-    cart_item.delete()
+    cart = get_cart(request)
+    cart.remove(cart_id)
     messages.success(request, 'Item removed from cart!')
-    return redirect('store:cart')
+    return cart.save(redirect('store:cart'))
 
 
 @login_required
 def checkout(request):
-    cart_items = Cart.objects.filter(user=request.user)
+    # Totals the buyer confirms: never from the cache
+    summary = get_cart_summary(request.user, fresh=True)
 
-    if not cart_items:
+    if summary.is_empty:
         messages.error(request, 'Your cart is empty!')
         return redirect('store:cart')
 
-    subtotal = sum(item.get_total() for item in cart_items)
-    shipping = 0 if subtotal >= 500 else 50
-    total = subtotal + shipping
+    subtotal = summary.subtotal
+    total = summary.total
 
     if request.method == 'POST':
-        from .models import BillingAddress, Order, OrderItem
-
-        # Save billing address
-        billing = BillingAddress.objects.create(
-            user=request.user,
-            first_name=request.POST.get('first_name'),
-            last_name=request.POST.get('last_name'),
-            email=request.POST.get('email'),
-            phone=request.POST.get('phone'),
-            address=request.POST.get('address'),
-            city=request.POST.get('city'),
-            state=request.POST.get('state'),
-            pin_code=request.POST.get('pin_code'),
-            notes=request.POST.get('notes'),
-        )
-
-        # Create order
-        order = Order.objects.create(
-            user=request.user,
-            billing_address=billing,
-            total_amount=total,
-            status='pending'
-        )
-
-        # Create order items
-        for item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                quantity=item.quantity,
-                price=item.product.get_price()
+        # OLD: create() per OrderItem in a loop, no transaction
+        # NEW: one transactional pipeline with bulk insert (orders.py)
+        try:
+            order = place_order(
+                request.user, billing_data_from(request.POST)
             )
-
-        # Clear cart after order
-        cart_items.delete()
+        except EmptyCartError:
+            messages.error(request, 'Your cart is empty!')
+            return redirect('store:cart')
+        except OutOfStockError:
+            messages.error(request, 'Some items in your cart are out of stock!')
+            return redirect('store:cart')
 
         messages.success(
             request,
@@ -294,9 +370,18 @@ def checkout(request):
         )
         return redirect('store:index')
 
+    # Hold the stock while the customer fills in the form
+    cart_items = list(get_cart_lines(request.user))
+    try:
+        hold_cart(request.user, cart_items)
+    except OutOfStockError:
+        messages.error(request, 'Some items in your cart are out of stock!')
+        return redirect('store:cart')
+
     context = {
         'cart_items': cart_items,
         'subtotal': subtotal,
+        'shipping': summary.shipping,
         'total': total,
     }
     return render(request, 'store/checkout.html', context)
@@ -314,15 +399,31 @@ def contact(request):
 
 @login_required
 def profile(request):
-    from .models import Order
+    # OLD: function-local "from .models import Order" — paid on
+    #      the first profile request of every worker
     orders = Order.objects.filter(
         user=request.user
     ).order_by('-created_at')[:5]
 
-    cart_count = Cart.objects.filter(user=request.user).count()
+    cart_count = get_cart_summary(request.user).count
 
     context = {
         'orders': orders,
         'cart_count': cart_count,
     }
-    return render(request, 'store/profile.html', context)
\ No newline at end of file
+    return render(request, 'store/profile.html', context)
+
+
+# ============================================================
+# ORDER HISTORY VIEW
+#  NEW: every order with its items, keyset pages
+#       (orders.order_history — 3 queries per page)
+# ============================================================
+@login_required
+def order_history_view(request):
+    page = order_history(request.user, cursor=request.GET.get('cursor'))
+    context = {
+        'page': page,
+        'orders': page.orders,
+    }
+    return render(request, 'store/order_history.html', context)
\ No newline at end of file
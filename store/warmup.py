@@ -0,0 +1,141 @@
+"""
+====================================================
+MULTISHOP - Worker Warm-up
+Author  : Adarsh Pathak
+====================================================
+
+OLD CODE PROBLEM:
+  A fresh gunicorn worker did its one-time work on the
+  first requests it served:
+    - URL resolver populated on the first reverse()
+    - every template read + compiled on first render
+    - view / admin / search modules imported on first use
+    - catalog caches empty after a deploy
+  → latency spike after every deploy and every
+    max_requests recycle.
+
+NEW:
+  warm_up() does all of it up front. gunicorn.conf.py
+  calls it in post_worker_init, before the worker
+  accepts connections. Returns the time per step.
+
+  A database / cache outage must not stop workers from
+  booting — a failing step is logged and skipped.
+====================================================
+"""
+
+import importlib
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+from django.template.loader import get_template
+from django.urls import URLPattern, get_resolver, reverse
+from django.urls.converters import IntConverter
+
+from .catalog import CatalogQuery
+from .catalog_cache import (
+    get_catalog_last_modified, get_featured_products, get_index_categories,
+)
+
+
+logger = logging.getLogger('store.warmup')
+
+# Imported lazily by Django / the views otherwise
+MODULES = [
+    'store.views',
+    'store.async_views',
+    'store.admin',
+    'store.search',
+    'store.recommendations',
+    'store.exports',
+]
+
+
+def import_modules():
+    for module in MODULES:
+        importlib.import_module(module)
+    return len(MODULES)
+
+
+def reverse_store_urls():
+    """Populates the resolver + reverses every store URL."""
+    get_resolver()
+    resolver = get_resolver('store.urls')
+    count = 0
+    for pattern in resolver.url_patterns:
+        if not isinstance(pattern, URLPattern) or not pattern.name:
+            continue
+        # Placeholder values, only to build the URL
+        kwargs = {
+            name: 1 if isinstance(converter, IntConverter) else 'warm-up'
+            for name, converter in pattern.pattern.converters.items()
+        }
+        reverse(f'store:{pattern.name}', kwargs=kwargs)
+        count += 1
+    return count
+
+
+def template_names():
+    """Every template under the project template dirs."""
+    names = set()
+    for root in map(Path, settings.TEMPLATES[0]['DIRS']):
+        names.update(
+            path.relative_to(root).as_posix()
+            for path in root.glob('**/*.html')
+        )
+    return sorted(names)
+
+
+def compile_templates():
+    """
+    With DEBUG off Django uses the cached template loader:
+    get_template() keeps the compiled template for the
+    life of the worker.
+    """
+    compiled = 0
+    for name in template_names():
+        try:
+            get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError):
+            logger.exception('Warm-up: template %s failed to compile', name)
+            continue
+        compiled += 1
+    return compiled
+
+
+def prime_catalog_caches():
+    """Index sections + shop facets (price buckets, categories)."""
+    get_index_categories()
+    get_featured_products()
+    get_catalog_last_modified()
+    CatalogQuery().facets()
+    return 4
+
+
+STEPS = [
+    ('modules', import_modules),
+    ('urls', reverse_store_urls),
+    ('templates', compile_templates),
+    ('catalog_cache', prime_catalog_caches),
+]
+
+
+def warm_up():
+    """{step: {'items': n, 'ms': t}} (items None = step failed)"""
+    report = {}
+    for name, step in STEPS:
+        started = time.perf_counter()
+        try:
+            items = step()
+        except Exception:
+            logger.exception('Warm-up: %s skipped', name)
+            items = None
+        report[name] = {
+            'items': items,
+            'ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+    logger.info('Warm-up done: %s', report)
+    return report